@@ -0,0 +1,167 @@
+import math
+import statistics
+import threading
+import time
+from contextlib import ExitStack
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List
+
+from fastapi.testclient import TestClient
+
+from seed import SeededData
+
+
+class QueryCounter:
+    """Counts the statements sent to the database; attached to the engines with `before_cursor_execute`."""
+
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, *args, **kwargs):
+        self.count += 1
+
+
+@dataclass
+class Measurement:
+    name: str
+    latencies_ms: List[float] = field(default_factory=list)
+    queries: List[int] = field(default_factory=list)
+    errors: int = 0
+
+    def summary(self) -> dict:
+        latencies = sorted(self.latencies_ms)
+        result = {"count": len(latencies), "errors": self.errors}
+        if latencies:
+            result.update({
+                "mean": statistics.fmean(latencies),
+                "p50": percentile(latencies, 50),
+                "p95": percentile(latencies, 95),
+                "p99": percentile(latencies, 99),
+                "max": latencies[-1],
+            })
+        if self.queries:
+            result.update({"queriesMean": statistics.fmean(self.queries), "queriesMax": max(self.queries)})
+        return result
+
+
+def percentile(sorted_values: List[float], p: float) -> float:
+    # nearest rank on the sorted sample
+    rank = math.ceil(p / 100 * len(sorted_values))
+    return sorted_values[min(max(rank, 1), len(sorted_values)) - 1]
+
+
+def bearer_token(user_headers: Dict) -> str:
+    return user_headers["Authorization"].split(" ", 1)[1]
+
+
+def measure(name: str, requests: int, call: Callable[[int], object], counter: QueryCounter) -> Measurement:
+    measurement = Measurement(name)
+    for index in range(requests):
+        counter.count = 0
+        started = time.perf_counter()
+        response = call(index)
+        measurement.latencies_ms.append((time.perf_counter() - started) * 1000)
+        measurement.queries.append(counter.count)
+        if response.status_code >= 400:
+            measurement.errors += 1
+    return measurement
+
+
+def run_rest_scenarios(client: TestClient, data: SeededData, headers: Dict, requests: int,
+                       counter: QueryCounter) -> List[Measurement]:
+    workspaces = data.workspaces
+    users = data.user_ids
+
+    def workspace_of(index):
+        return workspaces[index % len(workspaces)]
+
+    def create_task(index):
+        workspace = workspace_of(index)
+        return client.post("/api/task/", headers=headers[workspace.member_ids[0]], json={
+            "title": f"Benchmark task {index}",
+            "description": "Created by the benchmark",
+            "workspaceId": str(workspace.id),
+            "statusId": str(workspace.status_ids[0]),
+            "assignees": [str(user_id) for user_id in workspace.member_ids[:2]],
+        })
+
+    def update_task(index):
+        workspace = workspace_of(index)
+        task_id = workspace.task_ids[index // len(workspaces) % len(workspace.task_ids)]
+        return client.put(f"/api/task/{task_id}", headers=headers[workspace.member_ids[0]], json={
+            "title": f"Benchmark update {index}",
+        })
+
+    def workspace_tasks(index):
+        workspace = workspace_of(index)
+        return client.get(f"/api/workspace/{workspace.id}/tasks", headers=headers[workspace.member_ids[0]])
+
+    def unread_notifications(index):
+        return client.get("/api/notifications/unread", headers=headers[users[index % len(users)]])
+
+    def dashboard(index):
+        return client.get("/api/user/dashboard/summary", headers=headers[users[index % len(users)]])
+
+    return [
+        measure("create_task", requests, create_task, counter),
+        measure("update_task", requests, update_task, counter),
+        measure("workspace_tasks", requests, workspace_tasks, counter),
+        measure("notifications_unread", requests, unread_notifications, counter),
+        measure("dashboard", requests, dashboard, counter),
+    ]
+
+
+def run_fanout(client: TestClient, data: SeededData, headers: Dict, clients: int, rounds: int,
+               timeout: float = 10) -> Measurement:
+    """
+    Connects `clients` users over websockets, assigns them all to one task and times how long each update
+    of that task takes to reach every socket, from just before the PUT is sent.
+    """
+    measurement = Measurement("websocket_fanout")
+    workspace = data.workspaces[0]
+    updater = workspace.member_ids[0]
+    # the updater is not notified about its own change
+    recipients = [user_id for user_id in data.user_ids if user_id != updater][:clients]
+    task_id = workspace.task_ids[0]
+
+    response = client.put(f"/api/task/{task_id}", headers=headers[updater], json={
+        "assignees": [str(user_id) for user_id in recipients],
+    })
+    response.raise_for_status()
+
+    with ExitStack() as stack:
+        sockets = [
+            stack.enter_context(client.websocket_connect(f"/ws/{user_id}?token={bearer_token(headers[user_id])}"))
+            for user_id in recipients
+        ]
+
+        for round_index in range(rounds):
+            arrivals: List[float] = []
+            lock = threading.Lock()
+
+            def wait_for_notification(socket):
+                while True:
+                    message = socket.receive_json()
+                    if message.get("type") == "notification" and message.get("taskId") == str(task_id):
+                        with lock:
+                            arrivals.append(time.perf_counter())
+                        return
+
+            threads = [threading.Thread(target=wait_for_notification, args=(socket,), daemon=True)
+                       for socket in sockets]
+            for thread in threads:
+                thread.start()
+
+            started = time.perf_counter()
+            response = client.put(f"/api/task/{task_id}", headers=headers[updater], json={
+                "title": f"Fan-out round {round_index}",
+            })
+            if response.status_code >= 400:
+                measurement.errors += 1
+            for thread in threads:
+                thread.join(timeout)
+
+            measurement.errors += len(sockets) - len(arrivals)
+            measurement.latencies_ms += [(arrival - started) * 1000 for arrival in arrivals]
+
+    return measurement
@@ -0,0 +1,156 @@
+import random
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from typing import List
+from uuid import UUID
+
+from sqlalchemy import insert, text
+from sqlalchemy.engine import Engine
+
+from db.models import (User, Workspace, WorkspaceUser, WorkspaceTaskStatus, Task, AssigneeTask, Notification,
+                       RecipientNotification)
+from db.models.Base import uuid7
+from db.models.Notification import EventTypeEnum
+from db.models.Workspace import WorkspaceStatusEnum
+from db.partitions import month_partition_ddl, month_start, add_months
+from utils.auth import get_password_hash
+
+INSERT_CHUNK_SIZE = 1000
+# seeded notifications are spread over this many days before now
+NOTIFICATION_DAYS = 30
+
+
+@dataclass
+class SeedSizes:
+    users: int = 50
+    workspaces: int = 5
+    members_per_workspace: int = 10
+    tasks_per_workspace: int = 200
+    assignees_per_task: int = 2
+    notifications_per_user: int = 100
+    # share of the seeded notifications left unread
+    unread_ratio: float = 0.5
+
+
+@dataclass
+class SeededWorkspace:
+    id: UUID
+    member_ids: List[UUID]
+    status_ids: List[UUID]
+    task_ids: List[UUID] = field(default_factory=list)
+
+
+@dataclass
+class SeededData:
+    user_ids: List[UUID]
+    workspaces: List[SeededWorkspace]
+
+
+def insert_chunked(connection, model, rows: list):
+    for start in range(0, len(rows), INSERT_CHUNK_SIZE):
+        connection.execute(insert(model), rows[start:start + INSERT_CHUNK_SIZE])
+
+
+def create_partitions(connection):
+    """Monthly partitions covering the seeded notifications and the months ahead (Postgres only)."""
+    if connection.dialect.name != "postgresql":
+        return
+    now = datetime.now(timezone.utc)
+    month, last = month_start(now - timedelta(days=NOTIFICATION_DAYS)), add_months(month_start(now), 3)
+    while month <= last:
+        for table in (Notification.__tablename__, RecipientNotification.__tablename__):
+            connection.execute(text(month_partition_ddl(table, month)))
+        month = add_months(month, 1)
+
+
+def seed(engine: Engine, sizes: SeedSizes, rng: random.Random) -> SeededData:
+    password_hash = get_password_hash("benchmark")
+    user_ids = [uuid7() for _ in range(sizes.users)]
+    workspaces = []
+
+    with engine.begin() as connection:
+        create_partitions(connection)
+
+        insert_chunked(connection, User, [
+            {
+                "id": user_id,
+                "email": f"bench{index}@example.com",
+                "username": f"bench{index}",
+                "fullName": f"Bench User {index}",
+                "passwordHash": password_hash,
+            }
+            for index, user_id in enumerate(user_ids)
+        ])
+
+        memberships, statuses, tasks, assignees = [], [], [], []
+        members_per_workspace = min(sizes.members_per_workspace, sizes.users)
+        for index in range(sizes.workspaces):
+            # consecutive users, so every user belongs to some workspace when there are enough of them
+            first = index * members_per_workspace
+            member_ids = [user_ids[(first + offset) % sizes.users] for offset in range(members_per_workspace)]
+            workspace = SeededWorkspace(uuid7(), member_ids, [uuid7() for _ in range(3)])
+            workspaces.append(workspace)
+
+            memberships += [{"workspaceId": workspace.id, "userId": user_id} for user_id in member_ids]
+            statuses += [
+                {"id": status_id, "name": name, "workspaceId": workspace.id}
+                for status_id, name in zip(workspace.status_ids, ["To Do", "In Progress", "Completed"])
+            ]
+            for task_index in range(sizes.tasks_per_workspace):
+                task_id = uuid7()
+                workspace.task_ids.append(task_id)
+                tasks.append({
+                    "id": task_id,
+                    "title": f"Task {index}-{task_index}",
+                    "description": f"Seeded task {task_index} of workspace {index}",
+                    "dueDate": (datetime.now(timezone.utc) + timedelta(days=rng.randint(-30, 60))).date(),
+                    "workspaceId": workspace.id,
+                    "statusId": rng.choice(workspace.status_ids),
+                })
+                assignees += [
+                    {"assigneeId": user_id, "taskId": task_id}
+                    for user_id in rng.sample(member_ids, min(sizes.assignees_per_task, len(member_ids)))
+                ]
+
+        connection.execute(insert(Workspace), [
+            {"id": workspace.id, "name": f"Workspace {index}", "description": "Seeded workspace",
+             "status": WorkspaceStatusEnum.ACTIVE}
+            for index, workspace in enumerate(workspaces)
+        ])
+        insert_chunked(connection, WorkspaceUser, memberships)
+        insert_chunked(connection, WorkspaceTaskStatus, statuses)
+        insert_chunked(connection, Task, tasks)
+        insert_chunked(connection, AssigneeTask, assignees)
+
+        # notifications about tasks of the user's workspaces, each with the user as its recipient
+        tasks_of_user = {user_id: [] for user_id in user_ids}
+        for workspace in workspaces:
+            for user_id in workspace.member_ids:
+                tasks_of_user[user_id] += workspace.task_ids
+        notifications, recipients = [], []
+        now = datetime.now(timezone.utc)
+        for user_id, task_ids in tasks_of_user.items():
+            if not task_ids:
+                continue
+            for _ in range(sizes.notifications_per_user):
+                notification_id = uuid7()
+                created_at = now - timedelta(seconds=rng.uniform(0, NOTIFICATION_DAYS * 86400))
+                notifications.append({
+                    "id": notification_id,
+                    "message": "Seeded notification",
+                    "eventType": EventTypeEnum.TASK_UPDATED,
+                    "createdAt": created_at,
+                    "taskId": rng.choice(task_ids),
+                    "creatorId": rng.choice(user_ids),
+                })
+                recipients.append({
+                    "recipientId": user_id,
+                    "notificationId": notification_id,
+                    "notificationCreatedAt": created_at,
+                    "isRead": rng.random() >= sizes.unread_ratio,
+                    "notifiedAt": created_at,
+                })
+        insert_chunked(connection, Notification, notifications)
+        insert_chunked(connection, RecipientNotification, recipients)
+
+    return SeededData(user_ids, workspaces)
@@ -1,31 +1,46 @@
 from fastapi import APIRouter, Depends, HTTPException
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
-from db.db import get_db
+from db.db import get_db, get_async_db
 from db.models import User
 from schemas.user import UserCreate, UserResponse, TokenResponse, LoginRequest
 from services.user import UserService
-from utils.auth import verify_password, create_access_token
+from utils.auth import create_access_token, hash_password, verify_and_update_password
 
 router = APIRouter(prefix="/api/auth", tags=["auth"])
 
 
 @router.post("/register", response_model=UserResponse)
-def register_user(user: UserCreate, db: Session = Depends(get_db)):
+async def register_user(user: UserCreate, db: Session = Depends(get_db)):
     user_service = UserService(db)
     try:
-        new_user = user_service.create_user(user)
+        # taken emails and usernames are refused before spending a hash on them
+        await run_in_threadpool(user_service.check_user_available, user)
+        password_hash = await hash_password(user.password)
+        new_user = await run_in_threadpool(user_service.create_user, user, password_hash)
         return new_user
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
 
 
 @router.post("/login", response_model=TokenResponse)
-def login(form_data: LoginRequest, db: Session = Depends(get_db)):
-    user = db.query(User).filter(User.username == form_data.username).first()
+async def login(form_data: LoginRequest, db: AsyncSession = Depends(get_async_db)):
+    user = await db.scalar(select(User).where(User.username == form_data.username))
 
-    if not user or not verify_password(form_data.password, user.passwordHash):
+    if not user:
         raise HTTPException(status_code=401, detail="Invalid username or password")
 
+    valid, new_hash = await verify_and_update_password(form_data.password, user.passwordHash)
+    if not valid:
+        raise HTTPException(status_code=401, detail="Invalid username or password")
+
+    # rehash-on-login when the configured cost factor changed
+    if new_hash:
+        user.passwordHash = new_hash
+        await db.commit()
+
     token = create_access_token({"sub": str(user.id)})
     return TokenResponse(accessToken=token)
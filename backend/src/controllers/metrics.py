@@ -0,0 +1,12 @@
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+
+from db.instrumentation import metrics
+
+router = APIRouter(tags=["metrics"])
+
+
+# Prometheus scrape endpoint for the query metrics of this worker
+@router.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+def get_metrics() -> str:
+    return metrics.render()
@@ -1,43 +1,64 @@
-from typing import List
+from typing import List, Optional
 from uuid import UUID
 
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from db.db import get_db
-from schemas.notifications import NotificationResponse
-from services.notifications import NotificationService
-from utils.auth import get_current_user
+from db.db import get_async_db
+from schemas.notifications import NotificationResponse, NotificationsReadUpdate, NotificationsReadResponse
+from services.notifications import NotificationService, DEFAULT_NOTIFICATIONS_PAGE_SIZE, \
+    MAX_NOTIFICATIONS_PAGE_SIZE
+from services.retention import retention_job
+from utils.auth import get_current_user_id
 
 router = APIRouter(prefix="/api/notifications", tags=["notifications"])
 
 
 @router.get("/unread", response_model=List[NotificationResponse])
-def list_unread_notifications(
-        db: Session = Depends(get_db),
-        current_user=Depends(get_current_user)
+async def list_unread_notifications(
+        before: Optional[UUID] = Query(None, description="Id of the last notification of the previous page"),
+        limit: int = Query(DEFAULT_NOTIFICATIONS_PAGE_SIZE, ge=1, le=MAX_NOTIFICATIONS_PAGE_SIZE),
+        db: AsyncSession = Depends(get_async_db),
+        current_user_id: UUID = Depends(get_current_user_id)
 ) -> List[NotificationResponse]:
     notificationService = NotificationService(db)
-    return notificationService.list_notifications(current_user.id)
+    return await notificationService.list_notifications(current_user_id, before, limit)
+
+
+@router.patch("/read", response_model=NotificationsReadResponse)
+async def mark_notifications_read(
+        request: NotificationsReadUpdate,
+        db: AsyncSession = Depends(get_async_db),
+        current_user_id: UUID = Depends(get_current_user_id)
+) -> NotificationsReadResponse:
+    notificationService = NotificationService(db)
+    updated = await notificationService.mark_notifications_read(current_user_id, request.ids, request.before)
+    return NotificationsReadResponse(updated=updated)
 
 
 @router.patch("/{notification_id}/read", status_code=204)
-def mark_notification_read(
+async def mark_notification_read(
         notification_id: UUID,
-        db: Session = Depends(get_db),
-        current_user=Depends(get_current_user)
+        db: AsyncSession = Depends(get_async_db),
+        current_user_id: UUID = Depends(get_current_user_id)
 ) -> None:
     notificationService = NotificationService(db)
-    result = notificationService.update_notification_read(notification_id, current_user.id)
+    result = await notificationService.update_notification_read(notification_id, current_user_id)
 
     if result is None:
         raise HTTPException(status_code=404, detail="Notification not found")
 
 
 @router.get("/unread/count", response_model=int)
-def count_unread_notifications(
-        db: Session = Depends(get_db),
-        current_user=Depends(get_current_user)
+async def count_unread_notifications(
+        db: AsyncSession = Depends(get_async_db),
+        current_user_id: UUID = Depends(get_current_user_id)
 ) -> int:
     notificationService = NotificationService(db)
-    return notificationService.get_unred_notifications_count(current_user.id)
+    return await notificationService.get_unred_notifications_count(current_user_id)
+
+
+# progress of the notification retention job on the worker that serves the request
+@router.get("/retention")
+async def get_retention_progress(current_user_id: UUID = Depends(get_current_user_id)) -> dict:
+    return retention_job.progress()
@@ -1,19 +1,21 @@
+from typing import List, Optional
 from uuid import UUID
 
-from fastapi import APIRouter, Depends, HTTPException, status, Response
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Query, status, Request, Response
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from db.db import get_db
-from schemas.task import TaskCreate, TaskResponse, TaskUpdate, TaskCreateResponse
+from db.db import get_async_db
+from schemas.task import TaskCreate, TaskResponse, TaskUpdate, TaskCreateResponse, TaskBulkCreate
 from schemas.workspace import WorkspaceStatusResponse
-from services.task import TaskService
-from utils.auth import get_current_user
+from services.task import TaskService, DEFAULT_SEARCH_PAGE_SIZE, MAX_SEARCH_PAGE_SIZE
+from utils.auth import get_current_user, get_current_user_id
+from utils.etag import etag_headers, etag_matches, not_modified, version_etag
 
 router = APIRouter(prefix="/api/task", tags=["task"])
 
 
 @router.post("/", response_model=TaskCreateResponse)
-async def create_task(task_create: TaskCreate, db: Session = Depends(get_db), current_user=Depends(get_current_user),
+async def create_task(task_create: TaskCreate, db: AsyncSession = Depends(get_async_db), current_user=Depends(get_current_user),
                       ):
     task_service = TaskService(db)
 
@@ -33,15 +35,40 @@ async def create_task(task_create: TaskCreate, db: Session = Depends(get_db), cu
     )
 
 
+@router.post("/bulk", response_model=List[TaskCreateResponse])
+async def create_tasks_bulk(request: TaskBulkCreate, db: AsyncSession = Depends(get_async_db),
+                            current_user=Depends(get_current_user)):
+    task_service = TaskService(db)
+
+    # all tasks are created in a single transaction
+    try:
+        new_tasks = await task_service.create_tasks(request.tasks, current_user.id)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    return [
+        TaskCreateResponse(
+            id=new_task.id,
+            title=new_task.title,
+            description=new_task.description,
+            dueDate=new_task.dueDate,
+            workspaceId=new_task.workspaceId,
+            statusId=new_task.statusId,
+            assigneesIds=[assignee.assigneeId for assignee in new_task.assignees]
+        )
+        for new_task in new_tasks
+    ]
+
+
 @router.put("/{task_id}", response_model=TaskCreateResponse)
-async def update_task(task_id: UUID, task_update: TaskUpdate, db: Session = Depends(get_db),
+async def update_task(task_id: UUID, task_update: TaskUpdate, db: AsyncSession = Depends(get_async_db),
                       current_user=Depends(get_current_user)):
     task_service = TaskService(db)
 
     try:
         task = await task_service.update_task(task_id, task_update, current_user.id)
         if task is None:
-            HTTPException(status_code=404, detail="Task not found")
+            raise HTTPException(status_code=404, detail="Task not found")
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
 
@@ -56,13 +83,48 @@ async def update_task(task_id: UUID, task_update: TaskUpdate, db: Session = Depe
     )
 
 
+# declared before /{task_id}, which would take "search" for an id
+@router.get("/search", response_model=List[TaskResponse])
+async def search_tasks(
+        q: str = Query(..., min_length=1, max_length=200, description="Words, \"phrases\" or -excluded words"),
+        workspaceId: Optional[UUID] = Query(None, description="Only search this workspace"),
+        offset: int = Query(0, ge=0, le=10000),
+        limit: int = Query(DEFAULT_SEARCH_PAGE_SIZE, ge=1, le=MAX_SEARCH_PAGE_SIZE),
+        db: AsyncSession = Depends(get_async_db),
+        current_user_id: UUID = Depends(get_current_user_id)
+):
+    task_service = TaskService(db)
+    tasks = await task_service.search_tasks(current_user_id, q, workspaceId, offset, limit)
+
+    return [
+        TaskResponse(
+            id=task.id,
+            title=task.title,
+            description=task.description,
+            dueDate=task.dueDate,
+            workspaceId=task.workspaceId,
+            status=task.status,
+            assignees=[a.assignee for a in task.assignees]
+        )
+        for task in tasks
+    ]
+
+
 @router.get("/{task_id}", response_model=TaskResponse)
-def get_task(task_id: UUID, db: Session = Depends(get_db)):
+async def get_task(task_id: UUID, request: Request, response: Response, db: AsyncSession = Depends(get_async_db)):
     task_service = TaskService(db)
 
-    task, assignees = task_service.get_task(task_id)
+    # a primary key lookup decides between 304 and loading the task with its status and assignees
+    version = await task_service.get_task_version(task_id)
+    if version is not None:
+        etag = version_etag("task", version)
+        if etag_matches(request, etag):
+            return not_modified(etag)
+        response.headers.update(etag_headers(etag))
+
+    task, assignees = await task_service.get_task(task_id)
     if task is None:
-        HTTPException(status_code=404, detail="Task not found")
+        raise HTTPException(status_code=404, detail="Task not found")
 
     return TaskResponse(
         id=task.id,
@@ -76,17 +138,18 @@ def get_task(task_id: UUID, db: Session = Depends(get_db)):
 
 
 @router.get("/{task_id}/status", response_model=WorkspaceStatusResponse)
-def get_task_status(task_id: UUID, db: Session = Depends(get_db)):
+async def get_task_status(task_id: UUID, db: AsyncSession = Depends(get_async_db)):
     task_service = TaskService(db)
 
-    status = task_service.get_task_status(task_id)
+    status = await task_service.get_task_status(task_id)
 
     return status
 
 
 @router.delete("/{task_id}", status_code=status.HTTP_204_NO_CONTENT,
                responses={404: {"description": "Task not found"}})
-async def delete_task(task_id: UUID, db: Session = Depends(get_db), current_user=Depends(get_current_user)):
+async def delete_task(task_id: UUID, db: AsyncSession = Depends(get_async_db),
+                      current_user_id: UUID = Depends(get_current_user_id)):
     service = TaskService(db)
 
     success = await service.delete_task(task_id)
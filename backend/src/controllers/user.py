@@ -1,14 +1,15 @@
-from typing import List
+from typing import List, Optional
 from uuid import UUID
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
 
 from db.db import get_db  # Make sure to import your database session
-from db.models import User
 from schemas.user import UserUpdate, UserResponse, UserNotificationResponse, DashboardSummary
+from services.notifications import DEFAULT_NOTIFICATIONS_PAGE_SIZE, MAX_NOTIFICATIONS_PAGE_SIZE
 from services.user import UserService
-from utils.auth import get_current_user
+from utils.auth import get_current_user_id, hash_password
 
 router = APIRouter(prefix="/api/user", tags=["user"])
 
@@ -21,7 +22,7 @@ def get_users(db: Session = Depends(get_db)):
 
 
 @router.get("/{user_id}", response_model=UserResponse)
-def get_user(user_id: UUID, db: Session = Depends(get_db), current_user=Depends(get_current_user)):
+def get_user(user_id: UUID, db: Session = Depends(get_db), current_user_id: UUID = Depends(get_current_user_id)):
     user_service = UserService(db)
     user = user_service.get_user(user_id)
     if not user:
@@ -30,9 +31,10 @@ def get_user(user_id: UUID, db: Session = Depends(get_db), current_user=Depends(
 
 
 @router.put("/{user_id}", response_model=UserResponse)
-def update_user(user_id: UUID, user_update: UserUpdate, db: Session = Depends(get_db)):
+async def update_user(user_id: UUID, user_update: UserUpdate, db: Session = Depends(get_db)):
     user_service = UserService(db)
-    updated_user = user_service.update_user(user_id, user_update)
+    password_hash = await hash_password(user_update.password) if user_update.password else None
+    updated_user = await run_in_threadpool(user_service.update_user, user_id, user_update, password_hash)
     if not updated_user:
         raise HTTPException(status_code=404, detail="User not found")
     return updated_user
@@ -48,10 +50,16 @@ def delete_user(user_id: UUID, db: Session = Depends(get_db)):
 
 
 @router.get("/{user_id}/notifications", response_model=List[UserNotificationResponse])
-def get_user_notifications(user_id: UUID, db: Session = Depends(get_db)):
+def get_user_notifications(
+        user_id: UUID,
+        before: Optional[UUID] = Query(None, description="Id of the last notification of the previous page"),
+        limit: int = Query(DEFAULT_NOTIFICATIONS_PAGE_SIZE, ge=1, le=MAX_NOTIFICATIONS_PAGE_SIZE),
+        db: Session = Depends(get_db)
+):
     user_service = UserService(db)
-    notifications = user_service.get_user_notifications(user_id)
-    if not notifications:
+    notifications = user_service.get_user_notifications(user_id, before, limit)
+    # an empty first page means there is no such user (or no history); later pages may run out
+    if not notifications and before is None:
         raise HTTPException(status_code=404, detail="User not found")
     return notifications
 
@@ -59,10 +67,11 @@ def get_user_notifications(user_id: UUID, db: Session = Depends(get_db)):
 @router.get("/dashboard/summary", response_model=DashboardSummary)
 def get_user_dashboard_summary(
         db: Session = Depends(get_db),
-        user: User = Depends(get_current_user)
+        current_user_id: UUID = Depends(get_current_user_id)
 ):
     user_service = UserService(db)
-    summary = user_service.get_dashboard_summary(user.id)
+    # the summary query itself tells whether the user exists
+    summary = user_service.get_dashboard_summary(current_user_id)
 
     if not summary:
         raise HTTPException(status_code=404, detail="User not found")
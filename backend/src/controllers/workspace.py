@@ -1,15 +1,20 @@
-from typing import List
+from datetime import date
+from typing import List, Optional
 from uuid import UUID
 
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, HTTPException, Depends, Query, Request, Response
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
-from db.db import get_db
-from schemas.task import TaskResponse
+from db.db import get_db, get_async_db
+from schemas.task import TaskResponse, TaskChangesResponse
 from schemas.user import UserResponse
 from schemas.workspace import WorkspaceCreate, WorkspaceResponse, WorkspaceStatusResponse, WorkspaceMembersCreate
-from services.workspace import WorkspaceService
-from utils.auth import get_current_user
+from services.taskChange import TaskChangeService
+from services.workspace import WorkspaceService, DEFAULT_TASKS_PAGE_SIZE, MAX_TASKS_PAGE_SIZE
+from services.workspaceMetadata import get_metadata_version, STATUSES, MEMBERS
+from utils.auth import get_current_user, get_current_user_id
+from utils.etag import etag_headers, etag_matches, not_modified, version_etag, digest_etag
 
 router = APIRouter(prefix="/api/workspace", tags=["workspace"])
 
@@ -38,15 +43,26 @@ def delete_workspace_member(workspace_id: UUID, member_id: UUID, db: Session = D
 
 
 @router.get("/all", response_model=List[WorkspaceResponse])
-def get_workspaces_by_user(db: Session = Depends(get_db), current_user=Depends(get_current_user)):
+def get_workspaces_by_user(request: Request, response: Response, db: Session = Depends(get_db),
+                           current_user=Depends(get_current_user)):
     workspace_service = WorkspaceService(db)
+    etag = digest_etag("workspaces", workspace_service.get_workspace_versions_by_user(current_user.id))
+    if etag_matches(request, etag):
+        return not_modified(etag)
+    response.headers.update(etag_headers(etag))
     workspaces = workspace_service.get_workspaces_by_user(current_user.id)
     return workspaces
 
 
 @router.get("/{workspace_id}", response_model=WorkspaceResponse)
-def get_workspace_by_id(workspace_id: UUID, db: Session = Depends(get_db)):
+def get_workspace_by_id(workspace_id: UUID, request: Request, response: Response, db: Session = Depends(get_db)):
     workspace_service = WorkspaceService(db)
+    version = workspace_service.get_workspace_version(workspace_id)
+    if version is not None:
+        etag = version_etag("workspace", version)
+        if etag_matches(request, etag):
+            return not_modified(etag)
+        response.headers.update(etag_headers(etag))
     workspace = workspace_service.get_workspace_by_id(workspace_id)
     if not workspace:
         raise HTTPException(status_code=404, detail="Workspace not found")
@@ -61,27 +77,59 @@ def delete_workspace(workspace_id: UUID, db: Session = Depends(get_db)):
 
 
 @router.get("/{workspace_id}/statuses", response_model=List[WorkspaceStatusResponse])
-def get_workspace_statuses(workspace_id: UUID, db: Session = Depends(get_db)):
+def get_workspace_statuses(workspace_id: UUID, request: Request, response: Response, db: Session = Depends(get_db)):
+    # taken before loading, so a concurrent change can only make the ETag older than the body
+    version = get_metadata_version(db, workspace_id)
+    if version is not None:
+        etag = version_etag(STATUSES, version)
+        if etag_matches(request, etag):
+            return not_modified(etag)
+        response.headers.update(etag_headers(etag))
     workspace_service = WorkspaceService(db)
-    statuses = workspace_service.get_workspace_statuses(workspace_id)
+    statuses = workspace_service.get_workspace_statuses(workspace_id, version)
     return statuses
 
 
 @router.get("/{workspace_id}/members", response_model=List[UserResponse])
-def get_workspace_members(workspace_id: UUID, db: Session = Depends(get_db), current_user=Depends(get_current_user)):
+def get_workspace_members(workspace_id: UUID, request: Request, response: Response, db: Session = Depends(get_db),
+                          current_user_id: UUID = Depends(get_current_user_id)):
+    version = get_metadata_version(db, workspace_id)
+    if version is not None:
+        etag = version_etag(MEMBERS, version)
+        if etag_matches(request, etag):
+            return not_modified(etag)
+        response.headers.update(etag_headers(etag))
     workspace_service = WorkspaceService(db)
-    members = workspace_service.get_workspace_members(workspace_id)
+    members = workspace_service.get_workspace_members(workspace_id, version)
     return members
 
 
 @router.get("/{workspace_id}/tasks", response_model=list[TaskResponse])
 def get_tasks_by_workspace(
         workspace_id: UUID,
+        request: Request,
+        response: Response,
+        after: Optional[UUID] = Query(None, description="Id of the last task of the previous page"),
+        limit: int = Query(DEFAULT_TASKS_PAGE_SIZE, ge=1, le=MAX_TASKS_PAGE_SIZE),
+        statusId: Optional[UUID] = None,
+        assigneeId: Optional[UUID] = None,
+        dueFrom: Optional[date] = None,
+        dueTo: Optional[date] = None,
+        q: Optional[str] = Query(None, description="Text to look for in the title or description"),
         db: Session = Depends(get_db),
-        user=Depends(get_current_user)
+        current_user_id: UUID = Depends(get_current_user_id)
 ):
     workspace_service = WorkspaceService(db)
-    tasks = workspace_service.get_workspace_tasks(workspace_id)
+    # every page and filter of the list shares the workspace's task version (ETags are per URL)
+    version = workspace_service.get_tasks_version(workspace_id)
+    if version is not None:
+        etag = version_etag("tasks", version)
+        if etag_matches(request, etag):
+            return not_modified(etag)
+        response.headers.update(etag_headers(etag))
+    tasks = workspace_service.get_workspace_tasks(
+        workspace_id, after, limit, statusId, assigneeId, dueFrom, dueTo, q
+    )
 
     result = []
     for task in tasks:
@@ -96,3 +144,18 @@ def get_tasks_by_workspace(
         ))
 
     return result
+
+
+@router.get("/{workspace_id}/changes", response_model=TaskChangesResponse)
+async def get_task_changes(
+        workspace_id: UUID,
+        since: Optional[int] = Query(None, description="Cursor of the previous response; omit to get the current one"),
+        db: AsyncSession = Depends(get_async_db),
+        current_user_id: UUID = Depends(get_current_user_id)
+):
+    # clients take the cursor before loading the full list, then apply the changes after it
+    task_change_service = TaskChangeService(db)
+    changes = await task_change_service.get_changes(workspace_id, since)
+    if changes is None:
+        raise HTTPException(status_code=404, detail="Workspace not found")
+    return changes
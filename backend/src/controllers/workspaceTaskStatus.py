@@ -1,12 +1,14 @@
 from typing import List
 from uuid import UUID
 
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, HTTPException, Depends, Request, Response
 from sqlalchemy.orm import Session
 
 from db.db import get_db
 from schemas.workspaceTaskStatus import WorkspaceTaskStatusCreate, WorkspaceTaskStatusResponse
+from services.workspaceMetadata import get_metadata_version, STATUSES
 from services.workspaceTaskStatus import WorkspaceTaskStatusService
+from utils.etag import etag_headers, etag_matches, not_modified, version_etag
 
 router = APIRouter(prefix="/api/workspace_task_status", tags=["workspace_task_status"])
 
@@ -28,7 +30,14 @@ def get_workspace_task_status(task_status_id: UUID, db: Session = Depends(get_db
 
 
 @router.get("/workspace/{workspace_id}", response_model=List[WorkspaceTaskStatusResponse])
-def get_workspace_task_statuses_by_workspace(workspace_id: UUID, db: Session = Depends(get_db)):
+def get_workspace_task_statuses_by_workspace(workspace_id: UUID, request: Request, response: Response,
+                                             db: Session = Depends(get_db)):
+    version = get_metadata_version(db, workspace_id)
+    if version is not None:
+        etag = version_etag(STATUSES, version)
+        if etag_matches(request, etag):
+            return not_modified(etag)
+        response.headers.update(etag_headers(etag))
     task_status_service = WorkspaceTaskStatusService(db)
-    task_statuses = task_status_service.get_workspace_task_statuses_by_workspace(workspace_id)
+    task_statuses = task_status_service.get_workspace_task_statuses_by_workspace(workspace_id, version)
     return task_statuses
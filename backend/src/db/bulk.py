@@ -0,0 +1,13 @@
+from typing import List
+
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+# Rows per multi-row INSERT, keeps a statement well below the driver's bind parameter limit (32767)
+INSERT_CHUNK_SIZE = 1000
+
+
+# Insert rows with as few multi-row INSERT statements as possible (does not commit)
+async def insert_rows(db: AsyncSession, model, rows: List[dict]):
+    for start in range(0, len(rows), INSERT_CHUNK_SIZE):
+        await db.execute(insert(model).values(rows[start:start + INSERT_CHUNK_SIZE]))
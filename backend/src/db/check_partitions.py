@@ -0,0 +1,85 @@
+"""
+Checks on a migrated Postgres database that the retention job can drop an emptied month of notifications.
+
+    cd src
+    python -m db.check_partitions
+
+It works on January 2000 only: the partitions of that month are created, a notification is written into
+it, and NotificationRetentionService.drop_archived_months runs with a cutoff of February 2000. The month must
+be kept while it has the notification and dropped once it is deleted. Exits with status 1 otherwise.
+"""
+import asyncio
+import sys
+import uuid
+from datetime import datetime, timezone
+
+from sqlalchemy import delete, insert
+
+from db.db import AsyncSessionLocal, async_engine
+from db.models import Notification
+from db.models.Notification import EventTypeEnum
+from db.partitions import ensure_month_partitions, list_month_partitions, drop_partition, month_start
+from services.retention import NotificationRetentionService, NOTIFICATION_TABLES
+
+CHECKED_AT = datetime(2000, 1, 15, tzinfo=timezone.utc)
+CUTOFF = datetime(2000, 2, 1, tzinfo=timezone.utc)
+
+
+async def month_partitions(db) -> dict:
+    month = month_start(CHECKED_AT)
+    partitions = {}
+    for table in NOTIFICATION_TABLES:
+        name = (await list_month_partitions(db, table)).get(month)
+        if name:
+            partitions[table] = name
+    return partitions
+
+
+async def check() -> bool:
+    async with AsyncSessionLocal() as db:
+        if db.get_bind().dialect.name != "postgresql":
+            print("Partitions are only used on Postgres", file=sys.stderr)
+            return False
+
+        for table in NOTIFICATION_TABLES:
+            await ensure_month_partitions(db, table, CHECKED_AT, CHECKED_AT)
+        notification_id = uuid.uuid4()
+        await db.execute(insert(Notification).values(
+            id=notification_id, message="partition check", eventType=EventTypeEnum.TASK_CREATED,
+            createdAt=CHECKED_AT,
+        ))
+        await db.commit()
+        service = NotificationRetentionService(db)
+
+        try:
+            await service.drop_archived_months(CUTOFF)
+            kept = len(await month_partitions(db)) == len(NOTIFICATION_TABLES)
+            print(f"{'ok  ' if kept else 'FAIL'} a month with notifications is kept")
+
+            await db.execute(delete(Notification).where(Notification.id == notification_id))
+            await db.commit()
+            await service.drop_archived_months(CUTOFF)
+            left = await month_partitions(db)
+            dropped = not left
+            print(f"{'ok  ' if dropped else 'FAIL'} an emptied month is dropped"
+                  f"{'' if dropped else ': ' + ', '.join(left.values()) + ' left'}")
+            return kept and dropped
+        finally:
+            await db.rollback()
+            # the month is left as it was found: without partitions
+            await db.execute(delete(Notification).where(Notification.id == notification_id))
+            for table, name in reversed(list((await month_partitions(db)).items())):
+                await drop_partition(db, table, name)
+            await db.commit()
+
+
+async def main() -> int:
+    try:
+        ok = await check()
+    finally:
+        await async_engine.dispose()
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
@@ -3,14 +3,17 @@ import os
 
 from dotenv import load_dotenv
 from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker
 
+from db.instrumentation import instrument_engine
+
+# Load environment variables from .env
+load_dotenv()
+
 
 # Function to construct the connection string
 def get_database_url() -> str:
-    # Load environment variables from .env
-    load_dotenv()
-
     # Fetch variables
     db_user = os.getenv("DB_USER")
     db_password = os.getenv("DB_PASSWORD")
@@ -21,10 +24,52 @@ def get_database_url() -> str:
     return f"postgresql+psycopg2://{db_user}:{db_password}@{db_host}:{db_port}/{db_name}?sslmode=require"
 
 
+# Same database as get_database_url, but through the asyncpg driver (which spells sslmode as ssl)
+def get_async_database_url() -> str:
+    return (
+        get_database_url()
+        .replace("postgresql+psycopg2://", "postgresql+asyncpg://", 1)
+        .replace("sslmode=require", "ssl=require")
+    )
+
+
+# Pool settings shared by the sync and async engines, tunable per deployment
+def get_pool_settings() -> dict:
+    return {
+        "pool_size": int(os.getenv("DB_POOL_SIZE", "10")),
+        "max_overflow": int(os.getenv("DB_MAX_OVERFLOW", "20")),
+        "pool_timeout": int(os.getenv("DB_POOL_TIMEOUT", "30")),
+        "pool_recycle": int(os.getenv("DB_POOL_RECYCLE", "1800")),
+        "pool_pre_ping": os.getenv("DB_POOL_PRE_PING", "true").lower() in ("1", "true", "yes"),
+    }
+
+
+# Server side statement timeout in milliseconds (0 disables it)
+STATEMENT_TIMEOUT_MS = int(os.getenv("DB_STATEMENT_TIMEOUT_MS", "30000"))
+# Logs every statement through the sqlalchemy.engine logger (costly, meant for local debugging)
+DB_ECHO = os.getenv("DB_ECHO", "false").lower() in ("1", "true", "yes")
+
 # Create the SQLAlchemy engine
-engine = create_engine(get_database_url(), echo=True)  # echo set to True to see SQL logs
+engine = create_engine(
+    get_database_url(),
+    echo=DB_ECHO,
+    connect_args={"options": f"-c statement_timeout={STATEMENT_TIMEOUT_MS}"},
+    **get_pool_settings(),
+)
+instrument_engine(engine)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Async engine used by the request paths that run on the event loop (tasks, notifications)
+async_engine = create_async_engine(
+    get_async_database_url(),
+    echo=DB_ECHO,
+    connect_args={"server_settings": {"statement_timeout": str(STATEMENT_TIMEOUT_MS)}},
+    **get_pool_settings(),
+)
+instrument_engine(async_engine.sync_engine)
+# expire_on_commit is off so committed objects can still be read without implicit (blocking) IO
+AsyncSessionLocal = async_sessionmaker(async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False)
+
 
 # For interaction with database
 def get_db():
@@ -33,3 +78,9 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+# For interaction with database from async endpoints
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
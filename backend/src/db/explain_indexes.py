@@ -0,0 +1,211 @@
+"""
+Runs the hot service reads and checks that each one is planned with the index meant for it.
+
+    cd src
+    python -m db.explain_indexes              # plans as the planner picks them for the current data
+    python -m db.explain_indexes --no-seqscan  # discourages sequential scans, for small or fresh databases
+
+The services are called as the endpoints call them and the statements they send are captured, then explained
+with the same parameters, so the check follows the services as their queries change. Sample ids are taken
+from the database itself, so run it against a database that has some data.
+Exits with status 1 when a call is not planned with its index.
+"""
+import argparse
+import asyncio
+import json
+import sys
+from contextlib import contextmanager
+from typing import List, NamedTuple, Optional, Tuple
+
+from sqlalchemy import select, and_, event, text
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from db.db import engine, async_engine
+from db.models import Notification, RecipientNotification, Task
+from services.notifications import NotificationService
+from services.task import TaskService
+from services.user import UserService, invalidate_dashboard_summaries
+from services.workspace import WorkspaceService
+
+
+class Sample(NamedTuple):
+    user_id: object
+    workspace_id: object
+    status_id: object
+    task_id: object
+
+
+class StatementCapture:
+    """Records the statements sent through an engine while `capturing` (a before_cursor_execute listener)."""
+
+    def __init__(self):
+        self.statements: Optional[List[Tuple[str, object]]] = None
+
+    def __call__(self, conn, cursor, statement, parameters, context, executemany):
+        if self.statements is not None:
+            self.statements.append((statement, parameters))
+
+    @contextmanager
+    def capturing(self):
+        self.statements = []
+        try:
+            yield self.statements
+        finally:
+            self.statements = None
+
+
+def sync_calls(sample: Sample):
+    """(description, call on a Session, indexes expected in the plans) for the sync services."""
+    return [
+        (
+            "WorkspaceService.get_workspaces_by_user",
+            lambda db: WorkspaceService(db).get_workspaces_by_user(sample.user_id),
+            ("ix_workspace_user_userId",),
+        ),
+        (
+            "UserService.get_dashboard_summary",
+            lambda db: UserService(db).get_dashboard_summary(sample.user_id),
+            ("assignee_task_pkey",),
+        ),
+        (
+            "WorkspaceService.get_workspace_tasks",
+            lambda db: WorkspaceService(db).get_workspace_tasks(sample.workspace_id),
+            ("ix_task_workspaceId_id", "ix_assignee_task_taskId"),
+        ),
+        (
+            "WorkspaceService.get_workspace_tasks (status filter)",
+            lambda db: WorkspaceService(db).get_workspace_tasks(sample.workspace_id, status_id=sample.status_id),
+            ("ix_task_workspaceId_statusId_id",),
+        ),
+    ]
+
+
+def async_calls(sample: Sample):
+    """(description, coroutine function of an AsyncSession, indexes expected in the plans) for the async ones."""
+    return [
+        (
+            "NotificationService.count_unread",
+            lambda db: NotificationService(db).count_unread([sample.user_id]),
+            ("ix_recipient_notification_unread",),
+        ),
+        (
+            "NotificationService.list_notifications",
+            lambda db: NotificationService(db).list_notifications(sample.user_id),
+            ("ix_recipient_notification_unread",),
+        ),
+        (
+            "TaskService.get_unread_recipient_ids (task deletion)",
+            lambda db: TaskService(db).get_unread_recipient_ids(sample.task_id),
+            ("ix_notification_taskId_createdAt",),
+        ),
+    ]
+
+
+def index_names(plan: dict) -> set:
+    names = {plan["Index Name"]} if "Index Name" in plan else set()
+    for child in plan.get("Plans", []):
+        names |= index_names(child)
+    return names
+
+
+def plan_indexes(plan) -> set:
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return index_names(plan[0]["Plan"])
+
+
+PARTITION_INDEXES = text(
+    "SELECT child.relname FROM pg_inherits "
+    "JOIN pg_class parent ON parent.oid = pg_inherits.inhparent "
+    "JOIN pg_class child ON child.oid = pg_inherits.inhrelid "
+    "WHERE parent.relname = :index"
+)
+
+
+def report(description: str, expected: Tuple[str, ...], used: set, partition_indexes: dict, statements: int) -> bool:
+    # on partitioned tables the plan names the index of each partition, attached to the parent index
+    missing = [index for index in expected if not used & {index, *partition_indexes[index]}]
+    print(f"{'MISS' if missing else 'ok  '} {description}: expected {', '.join(expected)}, "
+          f"{statements} statements use {', '.join(sorted(used)) or 'no index'}")
+    return not missing
+
+
+def check_sync(sample: Sample, capture: StatementCapture, no_seqscan: bool) -> int:
+    failures = 0
+    with Session(engine) as db:
+        if no_seqscan:
+            db.execute(text("SET enable_seqscan = off"))
+        for description, call, expected in sync_calls(sample):
+            with capture.capturing() as statements:
+                call(db)
+            used = set()
+            for statement, parameters in statements:
+                plan = db.connection().exec_driver_sql(f"EXPLAIN (FORMAT JSON) {statement}", parameters).scalar()
+                used |= plan_indexes(plan)
+            partition_indexes = {
+                index: set(db.scalars(PARTITION_INDEXES, {"index": index})) for index in expected
+            }
+            failures += not report(description, expected, used, partition_indexes, len(statements))
+        db.rollback()
+    return failures
+
+
+async def check_async(sample: Sample, capture: StatementCapture, no_seqscan: bool) -> int:
+    failures = 0
+    async with AsyncSession(async_engine) as db:
+        if no_seqscan:
+            await db.execute(text("SET enable_seqscan = off"))
+        for description, call, expected in async_calls(sample):
+            with capture.capturing() as statements:
+                await call(db)
+            connection = await db.connection()
+            used = set()
+            for statement, parameters in statements:
+                result = await connection.exec_driver_sql(f"EXPLAIN (FORMAT JSON) {statement}", parameters)
+                used |= plan_indexes(result.scalar())
+            partition_indexes = {
+                index: set(await db.scalars(PARTITION_INDEXES, {"index": index})) for index in expected
+            }
+            failures += not report(description, expected, used, partition_indexes, len(statements))
+        await db.rollback()
+    return failures
+
+
+async def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--no-seqscan", action="store_true", help="set enable_seqscan = off for the session")
+    args = parser.parse_args()
+
+    engine.echo = async_engine.echo = False
+    with engine.connect() as connection:
+        row = connection.execute(
+            select(RecipientNotification.recipientId, Task.workspaceId, Task.statusId, Task.id)
+            .join(Notification, and_(
+                Notification.id == RecipientNotification.notificationId,
+                Notification.createdAt == RecipientNotification.notificationCreatedAt,
+            ))
+            .join(Task, Task.id == Notification.taskId)
+            .limit(1)
+        ).first()
+    if row is None:
+        print("No notifications in the database to take sample ids from", file=sys.stderr)
+        return 1
+    sample = Sample(*row)
+    # a cached summary would skip its query
+    invalidate_dashboard_summaries([sample.user_id])
+
+    capture = StatementCapture()
+    event.listen(engine, "before_cursor_execute", capture)
+    event.listen(async_engine.sync_engine, "before_cursor_execute", capture)
+    try:
+        failures = check_sync(sample, capture, args.no_seqscan)
+        failures += await check_async(sample, capture, args.no_seqscan)
+    finally:
+        await async_engine.dispose()
+
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
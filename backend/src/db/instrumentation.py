@@ -0,0 +1,216 @@
+import logging
+import os
+import re
+import threading
+import time
+from collections import Counter
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+logger = logging.getLogger(__name__)
+
+# Statements slower than this are logged with their SQL (0 disables the log)
+DB_SLOW_QUERY_MS = float(os.getenv("DB_SLOW_QUERY_MS", "200"))
+# A statement shape repeated more than this many times in one request is logged as a possible N+1 (0 disables it)
+DB_N_PLUS_ONE_THRESHOLD = int(os.getenv("DB_N_PLUS_ONE_THRESHOLD", "10"))
+# Adds the Server-Timing header with the database time of the request
+DB_SERVER_TIMING = os.getenv("DB_SERVER_TIMING", "true").lower() in ("1", "true", "yes")
+
+# upper bounds of the queries-per-request histogram
+QUERIES_PER_REQUEST_BUCKETS = (1, 2, 5, 10, 20, 50, 100)
+
+# bind parameters in the styles of psycopg2 (%(name)s), asyncpg ($1) and sqlite (?); expanded IN lists are
+# collapsed so a list of any length has the same shape
+_PARAMETER = r"(?:%\(\w+\)s|\$\d+|\?)"
+_PARAMETER_LIST = re.compile(rf"\(\s*{_PARAMETER}(?:\s*,\s*{_PARAMETER})*\s*\)")
+_WHITESPACE = re.compile(r"\s+")
+
+
+def statement_shape(statement: str) -> str:
+    return _PARAMETER_LIST.sub("(?)", _WHITESPACE.sub(" ", statement).strip())
+
+
+@dataclass
+class RequestQueryStats:
+    """Statements executed on behalf of one request."""
+    count: int = 0
+    duration_ms: float = 0
+    slowest_ms: float = 0
+    slowest_statement: Optional[str] = None
+    shapes: Counter = field(default_factory=Counter)
+
+    def record(self, statement: str, duration_ms: float):
+        self.count += 1
+        self.duration_ms += duration_ms
+        if duration_ms > self.slowest_ms:
+            self.slowest_ms = duration_ms
+            self.slowest_statement = statement
+        self.shapes[statement_shape(statement)] += 1
+
+    def repeated_shapes(self, threshold: int) -> list[tuple[str, int]]:
+        return [(shape, count) for shape, count in self.shapes.items() if count > threshold]
+
+
+# stats of the request being handled; the threadpool running sync endpoints and the greenlets of the async
+# engine copy the context, so their statements land on the same object
+current_query_stats: ContextVar[Optional[RequestQueryStats]] = ContextVar("current_query_stats", default=None)
+
+
+class QueryMetrics:
+    """Process wide aggregates, rendered in the Prometheus text format by /metrics."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.statements = 0
+        self.statement_seconds = 0.0
+        self.slow_statements = 0
+        # per (method, route)
+        self.requests: Counter = Counter()
+        self.request_statements: Counter = Counter()
+        self.request_seconds: Counter = Counter()
+        self.n_plus_one: Counter = Counter()
+        self.queries_per_request = [0] * (len(QUERIES_PER_REQUEST_BUCKETS) + 1)
+        self.queries_per_request_sum = 0
+
+    def record_statement(self, duration_ms: float):
+        with self.lock:
+            self.statements += 1
+            self.statement_seconds += duration_ms / 1000
+            if DB_SLOW_QUERY_MS and duration_ms >= DB_SLOW_QUERY_MS:
+                self.slow_statements += 1
+
+    def record_request(self, method: str, route: str, stats: RequestQueryStats, n_plus_one: int):
+        key = (method, route)
+        with self.lock:
+            self.requests[key] += 1
+            self.request_statements[key] += stats.count
+            self.request_seconds[key] += stats.duration_ms / 1000
+            if n_plus_one:
+                self.n_plus_one[key] += n_plus_one
+            bucket = next((index for index, bound in enumerate(QUERIES_PER_REQUEST_BUCKETS) if stats.count <= bound),
+                          len(QUERIES_PER_REQUEST_BUCKETS))
+            self.queries_per_request[bucket] += 1
+            self.queries_per_request_sum += stats.count
+
+    def render(self) -> str:
+        def labels(key):
+            method, route = key
+            return f'{{method="{method}",route="{route}"}}'
+
+        with self.lock:
+            lines = [
+                "# HELP insync_db_statements_total Statements executed by the database engines.",
+                "# TYPE insync_db_statements_total counter",
+                f"insync_db_statements_total {self.statements}",
+                "# HELP insync_db_statement_seconds_total Time spent executing statements.",
+                "# TYPE insync_db_statement_seconds_total counter",
+                f"insync_db_statement_seconds_total {self.statement_seconds}",
+                f"# HELP insync_db_slow_statements_total Statements slower than {DB_SLOW_QUERY_MS:g} ms.",
+                "# TYPE insync_db_slow_statements_total counter",
+                f"insync_db_slow_statements_total {self.slow_statements}",
+                "# HELP insync_http_requests_total Requests handled, by route.",
+                "# TYPE insync_http_requests_total counter",
+                *(f"insync_http_requests_total{labels(key)} {value}" for key, value in self.requests.items()),
+                "# HELP insync_db_request_statements_total Statements executed for requests, by route.",
+                "# TYPE insync_db_request_statements_total counter",
+                *(f"insync_db_request_statements_total{labels(key)} {value}"
+                  for key, value in self.request_statements.items()),
+                "# HELP insync_db_request_seconds_total Database time of requests, by route.",
+                "# TYPE insync_db_request_seconds_total counter",
+                *(f"insync_db_request_seconds_total{labels(key)} {value}"
+                  for key, value in self.request_seconds.items()),
+                "# HELP insync_db_n_plus_one_total Statement shapes repeated past the N+1 threshold, by route.",
+                "# TYPE insync_db_n_plus_one_total counter",
+                *(f"insync_db_n_plus_one_total{labels(key)} {value}" for key, value in self.n_plus_one.items()),
+                "# HELP insync_db_queries_per_request Statements executed per request.",
+                "# TYPE insync_db_queries_per_request histogram",
+            ]
+            cumulative = 0
+            for bound, count in zip(QUERIES_PER_REQUEST_BUCKETS, self.queries_per_request):
+                cumulative += count
+                lines.append(f'insync_db_queries_per_request_bucket{{le="{bound}"}} {cumulative}')
+            cumulative += self.queries_per_request[-1]
+            lines += [
+                f'insync_db_queries_per_request_bucket{{le="+Inf"}} {cumulative}',
+                f"insync_db_queries_per_request_sum {self.queries_per_request_sum}",
+                f"insync_db_queries_per_request_count {cumulative}",
+            ]
+        return "\n".join(lines) + "\n"
+
+
+metrics = QueryMetrics()
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_started_at", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    duration_ms = (time.perf_counter() - conn.info["query_started_at"].pop()) * 1000
+    metrics.record_statement(duration_ms)
+    if DB_SLOW_QUERY_MS and duration_ms >= DB_SLOW_QUERY_MS:
+        logger.warning("Slow query (%.1f ms): %s", duration_ms, statement_shape(statement))
+    stats = current_query_stats.get()
+    if stats is not None:
+        stats.record(statement, duration_ms)
+
+
+def _handle_error(exception_context):
+    # the failed statement never reaches after_cursor_execute
+    started_at = exception_context.connection.info.get("query_started_at") if exception_context.connection else None
+    if started_at:
+        started_at.pop()
+
+
+def instrument_engine(engine: Engine):
+    """Times every statement of the engine (for an async engine, pass its sync_engine)."""
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(engine, "handle_error", _handle_error)
+
+
+class QueryInstrumentationMiddleware:
+    """
+    Collects the statements of each HTTP request: adds the Server-Timing header, records the per route metrics
+    and logs statement shapes repeated past DB_N_PLUS_ONE_THRESHOLD.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        stats = RequestQueryStats()
+        token = current_query_stats.set(stats)
+
+        async def send_with_timing(message):
+            # the body is usually built by now, so the header covers all of the request's statements
+            if message["type"] == "http.response.start" and DB_SERVER_TIMING:
+                headers = list(message.get("headers", []))
+                headers.append((b"server-timing", server_timing(stats).encode("latin-1")))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            current_query_stats.reset(token)
+            # the route template, so the metrics are not labelled with ids
+            route = getattr(scope.get("route"), "path", "unmatched")
+            repeated = stats.repeated_shapes(DB_N_PLUS_ONE_THRESHOLD) if DB_N_PLUS_ONE_THRESHOLD else []
+            for shape, count in repeated:
+                logger.warning("Possible N+1 in %s %s: %d executions of %s", scope["method"], route, count, shape)
+            metrics.record_request(scope["method"], route, stats, len(repeated))
+
+
+def server_timing(stats: RequestQueryStats) -> str:
+    timing = f'db;dur={stats.duration_ms:.1f};desc="{stats.count} queries"'
+    if stats.count:
+        timing += f", db-slowest;dur={stats.slowest_ms:.1f}"
+    return timing
@@ -0,0 +1,39 @@
+"""add task change
+
+Revision ID: 0a9d3c6e5f17
+Revises: f7c1e4a92b63
+Create Date: 2026-10-18 16:27:03.118452
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0a9d3c6e5f17'
+down_revision: Union[str, None] = 'f7c1e4a92b63'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('task_change',
+                    sa.Column('workspaceId', sa.UUID(), nullable=False),
+                    sa.Column('version', sa.INTEGER(), nullable=False),
+                    sa.Column('taskId', sa.UUID(), nullable=False),
+                    sa.Column('deleted', sa.BOOLEAN(), nullable=False),
+                    sa.Column('createdAt', sa.DateTime(timezone=True), server_default=sa.text('now()'),
+                              nullable=False),
+                    sa.ForeignKeyConstraint(['workspaceId'], ['workspace.id'], ondelete='CASCADE'),
+                    sa.PrimaryKeyConstraint('workspaceId', 'version', 'taskId')
+                    )
+    op.create_index('ix_task_change_createdAt', 'task_change', ['createdAt'])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_task_change_createdAt', table_name='task_change')
+    op.drop_table('task_change')
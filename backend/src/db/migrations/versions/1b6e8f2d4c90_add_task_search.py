@@ -0,0 +1,45 @@
+"""add task search
+
+Revision ID: 1b6e8f2d4c90
+Revises: 0a9d3c6e5f17
+Create Date: 2026-10-18 17:05:39.620881
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '1b6e8f2d4c90'
+down_revision: Union[str, None] = '0a9d3c6e5f17'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    # a stored generated column rewrites the table once, filling the vector of every existing task
+    op.add_column('task', sa.Column(
+        'searchVector',
+        postgresql.TSVECTOR(),
+        sa.Computed(
+            "setweight(to_tsvector('english', coalesce(title, '')), 'A') || "
+            "setweight(to_tsvector('english', coalesce(description, '')), 'B')",
+            persisted=True,
+        ),
+        nullable=True,
+    ))
+    op.create_index('ix_task_searchVector', 'task', ['searchVector'], postgresql_using='gin')
+    op.create_index('ix_task_title_trgm', 'task', ['title'], postgresql_using='gin',
+                    postgresql_ops={'title': 'gin_trgm_ops'})
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_task_title_trgm', table_name='task')
+    op.drop_index('ix_task_searchVector', table_name='task')
+    op.drop_column('task', 'searchVector')
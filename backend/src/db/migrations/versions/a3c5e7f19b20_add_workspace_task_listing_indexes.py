@@ -0,0 +1,31 @@
+"""add workspace task listing indexes
+
+Revision ID: a3c5e7f19b20
+Revises: 864711cbeb93
+Create Date: 2026-10-18 10:12:40.118302
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a3c5e7f19b20'
+down_revision: Union[str, None] = '864711cbeb93'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_task_workspaceId_id', 'task', ['workspaceId', 'id'])
+    op.create_index('ix_task_workspaceId_statusId_id', 'task', ['workspaceId', 'statusId', 'id'])
+    op.create_index('ix_task_workspaceId_dueDate', 'task', ['workspaceId', 'dueDate'])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_task_workspaceId_dueDate', table_name='task')
+    op.drop_index('ix_task_workspaceId_statusId_id', table_name='task')
+    op.drop_index('ix_task_workspaceId_id', table_name='task')
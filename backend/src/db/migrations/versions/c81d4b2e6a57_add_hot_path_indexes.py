@@ -0,0 +1,35 @@
+"""add hot path indexes
+
+Revision ID: c81d4b2e6a57
+Revises: a3c5e7f19b20
+Create Date: 2026-10-18 11:02:07.534910
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c81d4b2e6a57'
+down_revision: Union[str, None] = 'a3c5e7f19b20'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_recipient_notification_unread', 'recipient_notification', ['recipientId', 'notificationId'],
+                    postgresql_where=sa.text('"isRead" = false'))
+    op.create_index('ix_notification_taskId_createdAt', 'notification', ['taskId', 'createdAt'])
+    op.create_index('ix_workspace_user_userId', 'workspace_user', ['userId'])
+    op.create_index('ix_assignee_task_taskId', 'assignee_task', ['taskId'])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_assignee_task_taskId', table_name='assignee_task')
+    op.drop_index('ix_workspace_user_userId', table_name='workspace_user')
+    op.drop_index('ix_notification_taskId_createdAt', table_name='notification')
+    op.drop_index('ix_recipient_notification_unread', table_name='recipient_notification')
@@ -0,0 +1,47 @@
+"""add notification archive
+
+Revision ID: d4f0a9c3e812
+Revises: c81d4b2e6a57
+Create Date: 2026-10-18 12:20:51.903174
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd4f0a9c3e812'
+down_revision: Union[str, None] = 'c81d4b2e6a57'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # monthly partitions are created by the retention job before it moves rows into them
+    op.create_table('notification_archive',
+                    sa.Column('recipientId', sa.UUID(), nullable=False),
+                    sa.Column('notificationId', sa.UUID(), nullable=False),
+                    sa.Column('createdAt', sa.DateTime(timezone=True), nullable=False),
+                    sa.Column('message', sa.TEXT(), nullable=False),
+                    sa.Column('eventType', postgresql.ENUM(name='eventtypeenum', create_type=False), nullable=False),
+                    sa.Column('taskId', sa.UUID(), nullable=True),
+                    sa.Column('creatorId', sa.UUID(), nullable=True),
+                    sa.Column('notifiedAt', sa.DateTime(timezone=True), nullable=False),
+                    sa.Column('archivedAt', sa.DateTime(timezone=True), server_default=sa.text('now()'),
+                              nullable=False),
+                    sa.PrimaryKeyConstraint('recipientId', 'notificationId', 'createdAt'),
+                    postgresql_partition_by='RANGE ("createdAt")'
+                    )
+    op.create_index('ix_notification_archive_recipientId_createdAt', 'notification_archive',
+                    ['recipientId', 'createdAt'])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    # dropping the partitioned table drops its partitions
+    op.drop_index('ix_notification_archive_recipientId_createdAt', table_name='notification_archive')
+    op.drop_table('notification_archive')
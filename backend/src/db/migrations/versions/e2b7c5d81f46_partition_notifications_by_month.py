@@ -0,0 +1,154 @@
+"""partition notifications by month
+
+Revision ID: e2b7c5d81f46
+Revises: d4f0a9c3e812
+Create Date: 2026-10-18 13:41:26.275018
+
+"""
+from datetime import datetime, timezone
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+from db.partitions import month_partition_ddl, month_start, add_months
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e2b7c5d81f46'
+down_revision: Union[str, None] = 'd4f0a9c3e812'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# partitions created ahead of the current month; the retention job keeps extending them
+MONTHS_AHEAD = 3
+
+
+def months_to_create():
+    oldest = op.get_bind().execute(sa.text('SELECT min("createdAt") FROM notification')).scalar()
+    now = datetime.now(timezone.utc)
+    # partition bounds are UTC months; the timestamp comes back in the session's time zone
+    oldest = oldest.astimezone(timezone.utc) if oldest else now
+    month, last = month_start(oldest), add_months(month_start(now), MONTHS_AHEAD)
+    months = []
+    while month <= last:
+        months.append(month)
+        month = add_months(month, 1)
+    return months
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    months = months_to_create()
+
+    # built next to the old tables, filled, then swapped in under the old names
+    op.create_table('notification_partitioned',
+                    sa.Column('id', sa.UUID(), nullable=False),
+                    sa.Column('message', sa.TEXT(), nullable=False),
+                    sa.Column('eventType', postgresql.ENUM(name='eventtypeenum', create_type=False), nullable=False),
+                    sa.Column('createdAt', sa.DateTime(timezone=True), server_default=sa.text('now()'),
+                              nullable=False),
+                    sa.Column('taskId', sa.UUID(), nullable=True),
+                    sa.Column('creatorId', sa.UUID(), nullable=True),
+                    sa.ForeignKeyConstraint(['taskId'], ['task.id'], name='notification_taskId_fkey',
+                                            ondelete='CASCADE'),
+                    sa.ForeignKeyConstraint(['creatorId'], ['user.id'], name='notification_creatorId_fkey',
+                                            ondelete='SET NULL'),
+                    sa.PrimaryKeyConstraint('id', 'createdAt', name='notification_partitioned_pkey'),
+                    postgresql_partition_by='RANGE ("createdAt")'
+                    )
+    for month in months:
+        op.execute(month_partition_ddl('notification', month, parent='notification_partitioned'))
+    op.execute(
+        'INSERT INTO notification_partitioned (id, message, "eventType", "createdAt", "taskId", "creatorId") '
+        'SELECT id, message, "eventType", "createdAt", "taskId", "creatorId" FROM notification'
+    )
+
+    op.create_table('recipient_notification_partitioned',
+                    sa.Column('recipientId', sa.UUID(), nullable=False),
+                    sa.Column('notificationId', sa.UUID(), nullable=False),
+                    sa.Column('notificationCreatedAt', sa.DateTime(timezone=True), nullable=False),
+                    sa.Column('isRead', sa.BOOLEAN(), nullable=True),
+                    sa.Column('notifiedAt', sa.DateTime(timezone=True), server_default=sa.text('now()'),
+                              nullable=False),
+                    sa.ForeignKeyConstraint(['recipientId'], ['user.id'],
+                                            name='recipient_notification_recipientId_fkey'),
+                    sa.ForeignKeyConstraint(['notificationId', 'notificationCreatedAt'],
+                                            ['notification_partitioned.id', 'notification_partitioned.createdAt'],
+                                            name='recipient_notification_notification_fkey', ondelete='CASCADE'),
+                    sa.PrimaryKeyConstraint('recipientId', 'notificationId', 'notificationCreatedAt',
+                                            name='recipient_notification_partitioned_pkey'),
+                    postgresql_partition_by='RANGE ("notificationCreatedAt")'
+                    )
+    for month in months:
+        op.execute(month_partition_ddl('recipient_notification', month, parent='recipient_notification_partitioned'))
+    op.execute(
+        'INSERT INTO recipient_notification_partitioned '
+        '("recipientId", "notificationId", "notificationCreatedAt", "isRead", "notifiedAt") '
+        'SELECT rn."recipientId", rn."notificationId", n."createdAt", rn."isRead", rn."notifiedAt" '
+        'FROM recipient_notification rn JOIN notification n ON n.id = rn."notificationId"'
+    )
+
+    op.drop_table('recipient_notification')
+    op.drop_table('notification')
+    op.rename_table('notification_partitioned', 'notification')
+    op.execute('ALTER TABLE notification RENAME CONSTRAINT notification_partitioned_pkey TO notification_pkey')
+    op.rename_table('recipient_notification_partitioned', 'recipient_notification')
+    op.execute('ALTER TABLE recipient_notification '
+               'RENAME CONSTRAINT recipient_notification_partitioned_pkey TO recipient_notification_pkey')
+
+    op.create_index('ix_notification_taskId_createdAt', 'notification', ['taskId', 'createdAt'])
+    op.create_index('ix_recipient_notification_unread', 'recipient_notification', ['recipientId', 'notificationId'],
+                    postgresql_where=sa.text('"isRead" = false'))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.create_table('notification_plain',
+                    sa.Column('id', sa.UUID(), nullable=False),
+                    sa.Column('message', sa.TEXT(), nullable=False),
+                    sa.Column('eventType', postgresql.ENUM(name='eventtypeenum', create_type=False), nullable=False),
+                    sa.Column('createdAt', sa.DateTime(timezone=True), server_default=sa.text('now()'),
+                              nullable=False),
+                    sa.Column('taskId', sa.UUID(), nullable=True),
+                    sa.Column('creatorId', sa.UUID(), nullable=True),
+                    sa.ForeignKeyConstraint(['taskId'], ['task.id'], name='notification_taskId_fkey',
+                                            ondelete='CASCADE'),
+                    sa.ForeignKeyConstraint(['creatorId'], ['user.id'], name='notification_creatorId_fkey',
+                                            ondelete='SET NULL'),
+                    sa.PrimaryKeyConstraint('id', name='notification_plain_pkey')
+                    )
+    op.execute(
+        'INSERT INTO notification_plain (id, message, "eventType", "createdAt", "taskId", "creatorId") '
+        'SELECT id, message, "eventType", "createdAt", "taskId", "creatorId" FROM notification'
+    )
+    op.create_table('recipient_notification_plain',
+                    sa.Column('recipientId', sa.UUID(), nullable=False),
+                    sa.Column('notificationId', sa.UUID(), nullable=False),
+                    sa.Column('isRead', sa.BOOLEAN(), nullable=True),
+                    sa.Column('notifiedAt', sa.DateTime(timezone=True), server_default=sa.text('now()'),
+                              nullable=False),
+                    sa.ForeignKeyConstraint(['recipientId'], ['user.id'],
+                                            name='recipient_notification_recipientId_fkey'),
+                    sa.ForeignKeyConstraint(['notificationId'], ['notification_plain.id'],
+                                            name='recipient_notification_notificationId_fkey', ondelete='CASCADE'),
+                    sa.PrimaryKeyConstraint('recipientId', 'notificationId', name='recipient_notification_plain_pkey')
+                    )
+    op.execute(
+        'INSERT INTO recipient_notification_plain ("recipientId", "notificationId", "isRead", "notifiedAt") '
+        'SELECT "recipientId", "notificationId", "isRead", "notifiedAt" FROM recipient_notification'
+    )
+
+    # dropping the partitioned tables drops their partitions and indexes
+    op.drop_table('recipient_notification')
+    op.drop_table('notification')
+    op.rename_table('notification_plain', 'notification')
+    op.execute('ALTER TABLE notification RENAME CONSTRAINT notification_plain_pkey TO notification_pkey')
+    op.rename_table('recipient_notification_plain', 'recipient_notification')
+    op.execute('ALTER TABLE recipient_notification '
+               'RENAME CONSTRAINT recipient_notification_plain_pkey TO recipient_notification_pkey')
+
+    op.create_index('ix_notification_taskId_createdAt', 'notification', ['taskId', 'createdAt'])
+    op.create_index('ix_recipient_notification_unread', 'recipient_notification', ['recipientId', 'notificationId'],
+                    postgresql_where=sa.text('"isRead" = false'))
@@ -0,0 +1,33 @@
+"""add row versions
+
+Revision ID: f7c1e4a92b63
+Revises: e2b7c5d81f46
+Create Date: 2026-10-18 15:12:48.903417
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f7c1e4a92b63'
+down_revision: Union[str, None] = 'e2b7c5d81f46'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # constant defaults, so existing rows are not rewritten
+    op.add_column('task', sa.Column('version', sa.INTEGER(), server_default='1', nullable=False))
+    op.add_column('workspace', sa.Column('version', sa.INTEGER(), server_default='1', nullable=False))
+    op.add_column('workspace', sa.Column('tasksVersion', sa.INTEGER(), server_default='1', nullable=False))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('workspace', 'tasksVersion')
+    op.drop_column('workspace', 'version')
+    op.drop_column('task', 'version')
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, ForeignKey
+from sqlalchemy import Column, ForeignKey, Index
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 
@@ -7,6 +7,10 @@ from .Base import Base
 
 class AssigneeTask(Base):
     __tablename__ = 'assignee_task'
+    __table_args__ = (
+        # assignees of a task; the primary key (assigneeId, taskId) already serves lookups by assignee
+        Index('ix_assignee_task_taskId', 'taskId'),
+    )
 
     assigneeId = Column(UUID, ForeignKey("user.id"), primary_key=True)
     taskId = Column(UUID, ForeignKey("task.id", ondelete='CASCADE'), primary_key=True)
@@ -1,5 +1,44 @@
-from sqlalchemy.orm import DeclarativeBase
+import secrets
+import threading
+import time
+import uuid
+
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.orm import DeclarativeBase, mapped_column
+
+_uuid7_lock = threading.Lock()
+_uuid7_last_ms = 0
+_uuid7_counter = 0
+
+
+def uuid7() -> uuid.UUID:
+    """
+    Time-ordered UUID (RFC 9562 version 7): a 48-bit Unix millisecond timestamp, a 12-bit counter that
+    keeps ids created in the same millisecond increasing, then random bits. New keys land at the right
+    edge of the primary key index instead of on random pages.
+    """
+    global _uuid7_last_ms, _uuid7_counter
+    with _uuid7_lock:
+        timestamp_ms = time.time_ns() // 1_000_000
+        if timestamp_ms > _uuid7_last_ms:
+            # random start, leaving room to count up within the millisecond
+            _uuid7_last_ms, _uuid7_counter = timestamp_ms, secrets.randbits(11)
+        elif _uuid7_counter < 0xFFF:
+            _uuid7_counter += 1
+        else:
+            # counter exhausted (or the clock went back): continue in the next millisecond
+            _uuid7_last_ms, _uuid7_counter = _uuid7_last_ms + 1, secrets.randbits(11)
+        timestamp_ms, counter = _uuid7_last_ms, _uuid7_counter
+
+    value = (timestamp_ms << 80) | (0x7 << 76) | (counter << 64) | (0b10 << 62) | secrets.randbits(62)
+    return uuid.UUID(int=value)
 
 
 class Base(DeclarativeBase):
     pass
+
+
+class UUIDPrimaryKeyMixin:
+    # generated by the application, so existing uuid4 keys stay valid next to the new ones;
+    # sort_order keeps id the first column (and first in composite primary keys)
+    id = mapped_column(UUID, primary_key=True, default=uuid7, sort_order=-1)
@@ -1,12 +1,11 @@
-import uuid
 from enum import Enum
 
-from sqlalchemy import Column, ForeignKey, DateTime
+from sqlalchemy import Column, ForeignKey, DateTime, Index
 from sqlalchemy.dialects.postgresql import ENUM, UUID, TEXT
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 
-from .Base import Base
+from .Base import Base, UUIDPrimaryKeyMixin
 
 
 class EventTypeEnum(Enum):
@@ -21,13 +20,20 @@ class EventTypeEnum(Enum):
     TASK_TITLE_CHANGED = "TASK_TITLE_CHANGED"
 
 
-class Notification(Base):
+class Notification(UUIDPrimaryKeyMixin, Base):
     __tablename__ = 'notification'
+    __table_args__ = (
+        # notifications of a task, newest first
+        Index('ix_notification_taskId_createdAt', 'taskId', 'createdAt'),
+        # monthly partitions (see db/partitions.py); old months are dropped instead of deleted row by row
+        {'postgresql_partition_by': 'RANGE ("createdAt")'},
+    )
 
-    id = Column(UUID, primary_key=True, default=uuid.uuid4)
     message = Column(TEXT, nullable=False)
     eventType = Column(ENUM(EventTypeEnum), nullable=False)
+    # partition key, part of the primary key as Postgres requires
     createdAt = Column(DateTime(timezone=True),
+                       primary_key=True,
                        server_default=func.now(),
                        default=func.now(),
                        nullable=False)
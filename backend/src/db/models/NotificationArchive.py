@@ -0,0 +1,39 @@
+from sqlalchemy import Column, DateTime, Index
+from sqlalchemy.dialects.postgresql import ENUM, UUID, TEXT
+from sqlalchemy.orm import relationship, synonym
+from sqlalchemy.sql import func
+
+from .Base import Base
+from .Notification import EventTypeEnum
+
+
+class NotificationArchive(Base):
+    """
+    Read notifications moved out of notification/recipient_notification by the retention job, one row
+    per recipient. Range partitioned by month on createdAt. There are no foreign keys: archived rows stay
+    when their task is deleted and are only listed while the task exists.
+    """
+    __tablename__ = 'notification_archive'
+    __table_args__ = (
+        # history of a user, newest first
+        Index('ix_notification_archive_recipientId_createdAt', 'recipientId', 'createdAt'),
+        {'postgresql_partition_by': 'RANGE ("createdAt")'},
+    )
+
+    recipientId = Column(UUID, primary_key=True)
+    notificationId = Column(UUID, primary_key=True)
+    # partition key, part of the primary key as Postgres requires
+    createdAt = Column(DateTime(timezone=True), primary_key=True)
+    message = Column(TEXT, nullable=False)
+    eventType = Column(ENUM(EventTypeEnum), nullable=False)
+    taskId = Column(UUID(as_uuid=True))
+    creatorId = Column(UUID(as_uuid=True))
+    notifiedAt = Column(DateTime(timezone=True), nullable=False)
+    archivedAt = Column(DateTime(timezone=True),
+                        server_default=func.now(),
+                        default=func.now(),
+                        nullable=False)
+
+    # same shape as Notification for the notification history
+    id = synonym("notificationId")
+    task = relationship("Task", primaryjoin="foreign(NotificationArchive.taskId) == Task.id", viewonly=True)
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, ForeignKey, BOOLEAN, DateTime
+from sqlalchemy import Column, ForeignKey, ForeignKeyConstraint, BOOLEAN, DateTime, Index, text
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
@@ -8,9 +8,23 @@ from .Base import Base
 
 class RecipientNotification(Base):
     __tablename__ = 'recipient_notification'
+    __table_args__ = (
+        ForeignKeyConstraint(
+            ['notificationId', 'notificationCreatedAt'],
+            ['notification.id', 'notification.createdAt'],
+            ondelete='CASCADE',
+        ),
+        # unread lists and counters; read rows, the large majority, stay out of the index
+        Index('ix_recipient_notification_unread', 'recipientId', 'notificationId',
+              postgresql_where=text('"isRead" = false')),
+        # partitioned by the month of the notification, so a month of both tables is dropped together
+        {'postgresql_partition_by': 'RANGE ("notificationCreatedAt")'},
+    )
 
     recipientId = Column(UUID, ForeignKey("user.id"), primary_key=True)
-    notificationId = Column(UUID, ForeignKey("notification.id", ondelete='CASCADE'), primary_key=True)
+    notificationId = Column(UUID, primary_key=True)
+    # createdAt of the notification: partition key and second half of the foreign key
+    notificationCreatedAt = Column(DateTime(timezone=True), primary_key=True)
     isRead = Column(BOOLEAN, default=False)
     notifiedAt = Column(DateTime(timezone=True),
                         server_default=func.now(),
@@ -1,19 +1,35 @@
-import uuid
+from sqlalchemy import Column, ForeignKey, Index, Computed
+from sqlalchemy.dialects.postgresql import UUID, TEXT, VARCHAR, DATE, INTEGER, TSVECTOR
+from sqlalchemy.orm import relationship, deferred
 
-from sqlalchemy import Column, ForeignKey
-from sqlalchemy.dialects.postgresql import UUID, TEXT, VARCHAR, DATE
-from sqlalchemy.orm import relationship
+from .Base import Base, UUIDPrimaryKeyMixin
 
-from .Base import Base
 
-
-class Task(Base):
+class Task(UUIDPrimaryKeyMixin, Base):
     __tablename__ = 'task'
+    __table_args__ = (
+        # workspace task listing: keyset pages, optionally filtered by status or due date
+        Index('ix_task_workspaceId_id', 'workspaceId', 'id'),
+        Index('ix_task_workspaceId_statusId_id', 'workspaceId', 'statusId', 'id'),
+        Index('ix_task_workspaceId_dueDate', 'workspaceId', 'dueDate'),
+        # full-text search, and substring/fuzzy matches on the title (pg_trgm)
+        Index('ix_task_searchVector', 'searchVector', postgresql_using='gin'),
+        Index('ix_task_title_trgm', 'title', postgresql_using='gin', postgresql_ops={'title': 'gin_trgm_ops'}),
+    )
+    # the generated search vector isn't read back after INSERT/UPDATE
+    __mapper_args__ = {'eager_defaults': False}
 
-    id = Column(UUID, primary_key=True, default=uuid.uuid4)
     title = Column(VARCHAR(225), nullable=False)
     description = Column(TEXT)
     dueDate = Column(DATE)
+    # bumped by every write to the task or its assignees; the ETag of GET /api/task/{id}
+    version = Column(INTEGER, nullable=False, default=1, server_default="1")
+    # title words rank above description words in search results; deferred, it is only used in WHERE/ORDER BY
+    searchVector = deferred(Column(TSVECTOR, Computed(
+        "setweight(to_tsvector('english', coalesce(title, '')), 'A') || "
+        "setweight(to_tsvector('english', coalesce(description, '')), 'B')",
+        persisted=True,
+    )))
 
     # Foreign keys
     workspaceId = Column(UUID, ForeignKey('workspace.id', ondelete='CASCADE'))
@@ -0,0 +1,22 @@
+from sqlalchemy import Column, ForeignKey, Index, DateTime, func
+from sqlalchemy.dialects.postgresql import UUID, INTEGER, BOOLEAN
+
+from .Base import Base
+
+
+# One row per task written by a commit, the change feed of GET /api/workspace/{id}/changes
+class TaskChange(Base):
+    __tablename__ = 'task_change'
+    __table_args__ = (
+        # pruning by age
+        Index('ix_task_change_createdAt', 'createdAt'),
+    )
+
+    workspaceId = Column(UUID, ForeignKey('workspace.id', ondelete='CASCADE'), primary_key=True)
+    # workspace.tasksVersion after the write; writers of a workspace serialize on that row, so versions commit in
+    # order and without gaps
+    version = Column(INTEGER, primary_key=True)
+    # no foreign key, tombstones outlive their task
+    taskId = Column(UUID, primary_key=True)
+    deleted = Column(BOOLEAN, nullable=False, default=False)
+    createdAt = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
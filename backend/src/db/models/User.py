@@ -1,16 +1,13 @@
-import uuid
-
 from sqlalchemy import Column
-from sqlalchemy.dialects.postgresql import UUID, VARCHAR
+from sqlalchemy.dialects.postgresql import VARCHAR
 from sqlalchemy.orm import relationship
 
-from .Base import Base
+from .Base import Base, UUIDPrimaryKeyMixin
 
 
-class User(Base):
+class User(UUIDPrimaryKeyMixin, Base):
     __tablename__ = 'user'
 
-    id = Column(UUID, primary_key=True, default=uuid.uuid4)
     email = Column(VARCHAR(320), unique=True, nullable=False)
     username = Column(VARCHAR(50), unique=True, nullable=False)
     passwordHash = Column(VARCHAR, nullable=False)
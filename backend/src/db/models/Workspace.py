@@ -1,11 +1,10 @@
-import uuid
 from enum import Enum
 
 from sqlalchemy import Column
-from sqlalchemy.dialects.postgresql import ENUM, UUID, TEXT, VARCHAR
+from sqlalchemy.dialects.postgresql import ENUM, TEXT, VARCHAR, INTEGER
 from sqlalchemy.orm import relationship
 
-from .Base import Base
+from .Base import Base, UUIDPrimaryKeyMixin
 
 
 class WorkspaceStatusEnum(Enum):
@@ -15,13 +14,16 @@ class WorkspaceStatusEnum(Enum):
     COMPLETED = "COMPLETED"
 
 
-class Workspace(Base):
+class Workspace(UUIDPrimaryKeyMixin, Base):
     __tablename__ = 'workspace'
 
-    id = Column(UUID, primary_key=True, default=uuid.uuid4)
     name = Column(VARCHAR(225), nullable=False)
     description = Column(TEXT)
     status = Column(ENUM(WorkspaceStatusEnum), nullable=False, default=WorkspaceStatusEnum.ACTIVE)
+    # bumped by writes to the workspace; the ETag of GET /api/workspace/{id}
+    version = Column(INTEGER, nullable=False, default=1, server_default="1")
+    # bumped by every task write in the workspace; the ETag of GET /api/workspace/{id}/tasks
+    tasksVersion = Column(INTEGER, nullable=False, default=1, server_default="1")
 
     # relationships
     tasks = relationship("Task", back_populates="workspace", cascade="all, delete-orphan")
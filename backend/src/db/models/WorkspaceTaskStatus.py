@@ -1,16 +1,13 @@
-import uuid
-
 from sqlalchemy import Column, ForeignKey
 from sqlalchemy.dialects.postgresql import UUID, VARCHAR
 from sqlalchemy.orm import relationship
 
-from .Base import Base
+from .Base import Base, UUIDPrimaryKeyMixin
 
 
-class WorkspaceTaskStatus(Base):
+class WorkspaceTaskStatus(UUIDPrimaryKeyMixin, Base):
     __tablename__ = 'workspaceTaskStatus'
 
-    id = Column(UUID, primary_key=True, default=uuid.uuid4)
     name = Column(VARCHAR(225), nullable=False)
 
     # Foreign keys
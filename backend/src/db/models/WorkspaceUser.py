@@ -1,4 +1,4 @@
-from sqlalchemy import Column, ForeignKey
+from sqlalchemy import Column, ForeignKey, Index
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 
@@ -7,6 +7,10 @@ from .Base import Base
 
 class WorkspaceUser(Base):
     __tablename__ = 'workspace_user'
+    __table_args__ = (
+        # workspaces of a user; the primary key only serves lookups by workspace
+        Index('ix_workspace_user_userId', 'userId'),
+    )
 
     workspaceId = Column(UUID, ForeignKey("workspace.id"), primary_key=True)
     userId = Column(UUID, ForeignKey("user.id"), primary_key=True)
@@ -1,8 +1,10 @@
 from .AssigneeTask import AssigneeTask
 from .Base import Base
 from .Notification import Notification
+from .NotificationArchive import NotificationArchive
 from .RecipientNotification import RecipientNotification
 from .Task import Task
+from .TaskChange import TaskChange
 from .User import User
 from .Workspace import Workspace
 from .WorkspaceTaskStatus import WorkspaceTaskStatus
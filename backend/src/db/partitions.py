@@ -0,0 +1,92 @@
+import re
+from datetime import date, datetime, timezone
+from typing import Dict, Optional
+
+from sqlalchemy import text
+
+
+def month_start(value: date) -> date:
+    return date(value.year, value.month, 1)
+
+
+def add_months(month: date, months: int) -> date:
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def month_partition_name(table: str, month: date) -> str:
+    return f"{table}_y{month.year}m{month.month:02d}"
+
+
+def month_partition_ddl(table: str, month: date, parent: Optional[str] = None) -> str:
+    """
+    CREATE TABLE for the partition of `table` (range partitioned on a timestamptz) holding `month`, in UTC.
+    `parent` attaches it to a differently named table, e.g. one that is renamed to `table` afterwards.
+    """
+    month = month_start(month)
+    return (
+        f'CREATE TABLE IF NOT EXISTS "{month_partition_name(table, month)}" PARTITION OF "{parent or table}" '
+        f"FOR VALUES FROM ('{month.isoformat()} 00:00:00+00') TO ('{add_months(month, 1).isoformat()} 00:00:00+00')"
+    )
+
+
+# Partitioning is Postgres only; on other databases (e.g. a SQLite stand-in) the tables are plain tables
+def supports_partitions(db) -> bool:
+    return db.get_bind().dialect.name == "postgresql"
+
+
+async def ensure_month_partitions(db, table: str, start: datetime, end: datetime):
+    """Creates the missing monthly partitions of `table` from the month of `start` to the month of `end`."""
+    if not supports_partitions(db):
+        return
+    # partition bounds are UTC months, whatever time zone the timestamps come in
+    month, last = month_start(start.astimezone(timezone.utc)), month_start(end.astimezone(timezone.utc))
+    while month <= last:
+        await db.execute(text(month_partition_ddl(table, month)))
+        month = add_months(month, 1)
+
+
+async def list_month_partitions(db, table: str) -> Dict[date, str]:
+    """Monthly partitions of `table` by the first day of their month."""
+    if not supports_partitions(db):
+        return {}
+    names = await db.scalars(
+        text(
+            "SELECT child.relname FROM pg_inherits "
+            "JOIN pg_class parent ON parent.oid = pg_inherits.inhparent "
+            "JOIN pg_class child ON child.oid = pg_inherits.inhrelid "
+            "WHERE parent.relname = :table"
+        ),
+        {"table": table},
+    )
+    pattern = re.compile(rf"^{re.escape(table)}_y(\d{{4}})m(\d{{2}})$")
+    partitions = {}
+    for name in names:
+        match = pattern.match(name)
+        if match:
+            partitions[date(int(match[1]), int(match[2]), 1)] = name
+    return partitions
+
+
+# advisory lock key serializing partition drops between workers ("drop" in ASCII)
+PARTITION_DROP_LOCK_KEY = 0x64726F70
+
+
+async def try_lock_partition_drops(db) -> bool:
+    """
+    Takes the partition drop lock for the current transaction, if no other session holds it. The transaction
+    level lock is released by the commit, so a pooled connection never keeps it.
+    """
+    if not supports_partitions(db):
+        return True
+    return await db.scalar(text("SELECT pg_try_advisory_xact_lock(:key)"), {"key": PARTITION_DROP_LOCK_KEY})
+
+
+async def drop_partition(db, table: str, name: str):
+    """
+    Detaches the partition `name` from `table`, then drops it. A partition of a table referenced by a foreign
+    key (notification) can't be dropped while attached, as the constraint depends on it; detaching it checks
+    that nothing references its rows, so detach the referencing side's partition first.
+    """
+    await db.execute(text(f'ALTER TABLE "{table}" DETACH PARTITION "{name}"'))
+    await db.execute(text(f'DROP TABLE "{name}"'))
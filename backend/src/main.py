@@ -1,14 +1,32 @@
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
 from controllers.auth import router as auth_router
+from controllers.metrics import router as metrics_router
 from controllers.notifications import router as notifications_router
 from controllers.task import router as task_router
 from controllers.user import router as user_router
 from controllers.workspace import router as workspace_router
-from websocket import router as websocket_router
+from db.instrumentation import QueryInstrumentationMiddleware
+from services.retention import retention_job
+from websocket import router as websocket_router, manager as connection_manager, notification_manager
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # connects the websocket backplane so this worker receives events published by the others
+    await notification_manager.start()
+    await connection_manager.start()
+    await retention_job.start()
+    yield
+    await retention_job.stop()
+    await connection_manager.stop()
+    await notification_manager.stop()
 
-app = FastAPI()
+
+app = FastAPI(lifespan=lifespan)
 
 origins = [
     "http://localhost:5173",
@@ -22,6 +40,9 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# outside CORS, so the Server-Timing header is on every response
+app.add_middleware(QueryInstrumentationMiddleware)
+
 app.include_router(auth_router)
 app.include_router(user_router)
 app.include_router(workspace_router)
@@ -29,3 +50,4 @@ app.include_router(task_router)
 app.include_router(websocket_router)
 
 app.include_router(notifications_router)
+app.include_router(metrics_router)
@@ -1,5 +1,6 @@
 from datetime import datetime
 from enum import Enum
+from typing import List, Optional
 from uuid import UUID
 
 from pydantic import BaseModel
@@ -28,14 +29,24 @@ class NotificationResponse(BaseModel):
     message: str
     eventType: EventTypeEnum
     createdAt: datetime
-    taskId: UUID
-    taskName: str
-    workspaceId: UUID
-    workspaceName: str
-    creatorId: UUID
-    creatorName: str
+    taskId: Optional[UUID] = None
+    taskName: Optional[str] = None
+    workspaceId: Optional[UUID] = None
+    workspaceName: Optional[str] = None
+    creatorId: Optional[UUID] = None
+    creatorName: Optional[str] = None
     isRead: bool
     notifiedAt: datetime
 
     class Config:
         from_attributes = True
+
+
+# Marks several notifications read at once: the given ids, those notified up to `before`, or all of them
+class NotificationsReadUpdate(BaseModel):
+    ids: Optional[List[UUID]] = None
+    before: Optional[datetime] = None
+
+
+class NotificationsReadResponse(BaseModel):
+    updated: int
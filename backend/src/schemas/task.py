@@ -17,6 +17,10 @@ class TaskCreate(BaseModel):
     assignees: List[UUID]
 
 
+class TaskBulkCreate(BaseModel):
+    tasks: List[TaskCreate]
+
+
 class TaskUpdate(BaseModel):
     title: Optional[str] = None
     description: Optional[str] = None
@@ -51,6 +55,17 @@ class TaskResponse(BaseModel):
         from_attributes = True
 
 
+class TaskChangesResponse(BaseModel):
+    # pass as `since` to get the next changes
+    cursor: int
+    # the changes since the given cursor are not available; reload the whole task list
+    reset: bool
+    # current state of the tasks created or updated since the cursor
+    tasks: List[TaskResponse]
+    # ids of the tasks deleted since the cursor
+    deleted: List[UUID]
+
+
 # to assign user to task
 class AssigneeTask(BaseModel):
     assigneeId: UUID
@@ -1,4 +1,5 @@
 from datetime import datetime, date
+from typing import Optional
 from uuid import UUID
 
 from pydantic import BaseModel
@@ -31,8 +32,8 @@ class UserResponse(UserBase):
 class NotificationTaskResponse(BaseModel):
     id: UUID
     title: str
-    description: str
-    dueDate: date
+    description: Optional[str]
+    dueDate: Optional[date]
     workspace: WorkspaceResponse
     status: WorkspaceStatusResponse
 
@@ -1,77 +1,257 @@
-from typing import List
+import os
+from collections import Counter
+from dataclasses import dataclass
+from datetime import datetime
+from typing import List, Optional, Dict, Iterable
 from uuid import UUID
 
-from sqlalchemy.orm import Session
+from sqlalchemy import select, func, insert, tuple_, update, and_
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from db.models import Notification, RecipientNotification
-from schemas.notifications import NotificationResponse
+from db.bulk import insert_rows
+from db.models import Notification, RecipientNotification, Task, Workspace, User
+from schemas.notifications import NotificationResponse, EventTypeEnum
+from utils.cache import create_cache
+from websocket import notification_manager
 
+DEFAULT_NOTIFICATIONS_PAGE_SIZE = 50
+MAX_NOTIFICATIONS_PAGE_SIZE = 200
 
-class NotificationService:
-    def __init__(self, db: Session):
+# Maintained per-user unread counters, keyed by user id. The TTL bounds how long a counter can drift
+# if an increment races with a recount.
+unread_counts = create_cache(
+    "unread_count",
+    maxsize=int(os.getenv("UNREAD_COUNT_CACHE_SIZE", "50000")),
+    ttl=float(os.getenv("UNREAD_COUNT_CACHE_TTL", "600")),
+)
+
+
+@dataclass
+class PendingNotification:
+    eventType: EventTypeEnum
+    message: str
+    recipientIds: List[UUID]
+    id: Optional[UUID] = None
+    createdAt: Optional[datetime] = None
+
+
+class NotificationBatch:
+    """
+    Collects the notifications of one task change. They are written with bulk inserts inside the
+    caller's transaction and pushed over the websocket only after that transaction has committed.
+    """
+
+    def __init__(self, db: AsyncSession, task_id: UUID, creator_id: UUID):
         self.db = db
+        self.task_id = task_id
+        self.creator_id = creator_id
+        self.pending: List[PendingNotification] = []
+
+    def add(self, event_type: EventTypeEnum, message: str, recipient_ids: List[UUID]):
+        recipient_ids = list(dict.fromkeys(recipient_ids))
+        if recipient_ids:
+            self.pending.append(PendingNotification(event_type, message, recipient_ids))
 
-    def list_notifications(self, user_id: UUID) -> List[NotificationResponse]:
-        # join Notification ← RecipientNotification
-        results = (
-            self.db.query(Notification, RecipientNotification)
-            .join(
-                RecipientNotification,
-                Notification.id == RecipientNotification.notificationId
+    async def create_notifications(self):
+        if not self.pending:
+            return
+
+        # one multi-row INSERT for all notification records
+        created = await self.db.execute(
+            insert(Notification).returning(Notification.id, Notification.createdAt, sort_by_parameter_order=True),
+            [
+                {
+                    "message": pending.message,
+                    "eventType": pending.eventType,
+                    "taskId": self.task_id,
+                    "creatorId": self.creator_id,
+                }
+                for pending in self.pending
+            ]
+        )
+        for pending, (notification_id, created_at) in zip(self.pending, created):
+            pending.id = notification_id
+            pending.createdAt = created_at
+
+        # one multi-row INSERT (per chunk) for all of their recipients
+        await insert_rows(self.db, RecipientNotification, [
+            {
+                "recipientId": recipient_id,
+                "notificationId": pending.id,
+                "notificationCreatedAt": pending.createdAt,
+                "isRead": False,
+            }
+            for pending in self.pending
+            for recipient_id in pending.recipientIds
+        ])
+
+    async def send(self, task_name: str, workspace_id: UUID, workspace_name: str, creator_name: str):
+        for pending in self.pending:
+            await notification_manager.notify_task_event(
+                notification_id=pending.id,
+                task_id=self.task_id,
+                task_name=task_name,
+                workspace_id=workspace_id,
+                workspace_name=workspace_name,
+                event_type=pending.eventType,
+                message=pending.message,
+                creator_id=self.creator_id,
+                creator_name=creator_name,
+                assignee_ids=pending.recipientIds,
+                notified_at=pending.createdAt,
             )
-            .filter(RecipientNotification.recipientId == user_id)
-            .filter(RecipientNotification.isRead == False)
-            .order_by(Notification.createdAt.desc())
-            .all()
+
+        # every recipient got one more unread notification per pending notification
+        await NotificationService(self.db).update_unread_counts(
+            Counter(recipient_id for pending in self.pending for recipient_id in pending.recipientIds)
         )
 
-        out: List[NotificationResponse] = []
-
-        for notif, rn in results:
-            task = notif.task  # relationship on Notification
-            workspace = task.workspace  # relationship on Task
-            creator = notif.creator  # relationship on Task
-
-            out.append(NotificationResponse(
-                id=notif.id,
-                message=notif.message,
-                eventType=notif.eventType,
-                createdAt=notif.createdAt,
-                taskId=notif.taskId,
-                taskName=task.title,
-                workspaceId=workspace.id,
-                workspaceName=workspace.name,
-                creatorId=creator.id,
-                creatorName=creator.fullName,
-                isRead=rn.isRead,
-                notifiedAt=rn.notifiedAt,
+
+class NotificationService:
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def list_notifications(
+            self,
+            user_id: UUID,
+            before: Optional[UUID] = None,
+            limit: int = DEFAULT_NOTIFICATIONS_PAGE_SIZE
+    ) -> List[NotificationResponse]:
+        # one joined projection: Notification ← RecipientNotification, Task, Workspace, creator User. The task and
+        # creator are optional (a deleted creator is set to NULL), so they are outer joined and every unread row
+        # the counter counts is listed
+        query = (
+            select(
+                Notification.id,
+                Notification.message,
+                Notification.eventType,
+                Notification.createdAt,
+                Notification.taskId,
+                Task.title.label("taskName"),
+                Workspace.id.label("workspaceId"),
+                Workspace.name.label("workspaceName"),
+                User.id.label("creatorId"),
+                User.fullName.label("creatorName"),
+                RecipientNotification.isRead,
+                RecipientNotification.notifiedAt,
+            )
+            .join(RecipientNotification, and_(
+                Notification.id == RecipientNotification.notificationId,
+                # same month partitions on both sides
+                Notification.createdAt == RecipientNotification.notificationCreatedAt,
             ))
+            .outerjoin(Task, Notification.taskId == Task.id)
+            .outerjoin(Workspace, Task.workspaceId == Workspace.id)
+            .outerjoin(User, Notification.creatorId == User.id)
+            .where(RecipientNotification.recipientId == user_id)
+            .where(RecipientNotification.isRead == False)
+        )
+
+        # keyset pagination: everything older than the notification the previous page ended with
+        if before is not None:
+            cursor = select(Notification.createdAt).where(Notification.id == before).scalar_subquery()
+            query = query.where(tuple_(Notification.createdAt, Notification.id) < tuple_(cursor, before))
+
+        results = await self.db.execute(
+            query
+            .order_by(Notification.createdAt.desc(), Notification.id.desc())
+            .limit(limit)
+        )
 
-        return out
+        return [NotificationResponse.model_validate(row._mapping) for row in results]
 
-    def update_notification_read(self, notification_id: UUID, user_id: UUID):
-        rn = (
-            self.db.query(RecipientNotification)
+    async def update_notification_read(self, notification_id: UUID, user_id: UUID):
+        rn = await self.db.scalar(
+            select(RecipientNotification)
             .filter_by(
                 recipientId=user_id,
                 notificationId=notification_id
             )
-            .first()
         )
         if not rn:
             return None
 
+        was_unread = not rn.isRead
         rn.isRead = True
-        self.db.commit()
+        await self.db.commit()
+
+        if was_unread:
+            await self.update_unread_counts({user_id: -1})
 
         return rn
 
-    def get_unred_notifications_count(self, user_id: UUID):
-        unread_notifications = (
-            self.db
-            .query(RecipientNotification)
-            .filter_by(recipientId=user_id, isRead=False)
-            .count()
+    async def mark_notifications_read(
+            self,
+            user_id: UUID,
+            ids: Optional[List[UUID]] = None,
+            before: Optional[datetime] = None,
+    ) -> int:
+        """Marks the user's unread notifications read in one UPDATE and returns how many changed."""
+        query = (
+            update(RecipientNotification)
+            .where(RecipientNotification.recipientId == user_id)
+            .where(RecipientNotification.isRead == False)
+        )
+        if ids is not None:
+            query = query.where(RecipientNotification.notificationId.in_(ids))
+        if before is not None:
+            # notifiedAt equals the notification's createdAt; the latter lets newer partitions be pruned
+            query = query.where(RecipientNotification.notifiedAt <= before)
+            query = query.where(RecipientNotification.notificationCreatedAt <= before)
+
+        result = await self.db.execute(
+            query.values(isRead=True).execution_options(synchronize_session=False)
         )
+        await self.db.commit()
+
+        if result.rowcount:
+            await self.update_unread_counts({user_id: -result.rowcount})
+
+        return result.rowcount
+
+    async def get_unred_notifications_count(self, user_id: UUID):
+        unread_notifications = await unread_counts.aget(str(user_id))
+        if unread_notifications is None:
+            unread_notifications = (await self.count_unread([user_id])).get(user_id, 0)
+            await unread_counts.aset(str(user_id), unread_notifications)
 
         return unread_notifications
+
+    async def count_unread(self, user_ids: Iterable[UUID]) -> Dict[UUID, int]:
+        rows = await self.db.execute(
+            select(RecipientNotification.recipientId, func.count())
+            .where(RecipientNotification.recipientId.in_(user_ids))
+            .where(RecipientNotification.isRead == False)
+            .group_by(RecipientNotification.recipientId)
+        )
+        return {recipient_id: count for recipient_id, count in rows}
+
+    async def update_unread_counts(self, deltas: Dict[UUID, int]):
+        """
+        Applies committed changes to the cached unread counters and pushes the new values over the
+        websocket. Counters that are not cached are recounted in one query.
+        """
+        counts: Dict[UUID, int] = {}
+        missing: List[UUID] = []
+        for user_id, delta in deltas.items():
+            count = await unread_counts.aincr(str(user_id), delta)
+            if count is None:
+                missing.append(user_id)
+            else:
+                counts[user_id] = count
+
+        if missing:
+            recounted = await self.count_unread(missing)
+            for user_id in missing:
+                counts[user_id] = recounted.get(user_id, 0)
+                await unread_counts.aset(str(user_id), counts[user_id])
+
+        for user_id, count in counts.items():
+            await notification_manager.notify_unread_count(user_id, count)
+
+    async def refresh_unread_counts(self, user_ids: Iterable[UUID]):
+        # drop the cached counters so update_unread_counts recounts them
+        user_ids = list(user_ids)
+        for user_id in user_ids:
+            await unread_counts.adelete(str(user_id))
+        await self.update_unread_counts({user_id: 0 for user_id in user_ids})
@@ -0,0 +1,272 @@
+import asyncio
+import logging
+import os
+from dataclasses import dataclass, asdict
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+
+from sqlalchemy import select, func, insert, delete, exists, tuple_, and_, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from db.db import AsyncSessionLocal
+from db.models import Notification, NotificationArchive, RecipientNotification
+from db.partitions import (
+    ensure_month_partitions, list_month_partitions, drop_partition, try_lock_partition_drops, month_start, add_months,
+)
+from services.taskChange import TaskChangeService, TASK_CHANGE_RETENTION_DAYS
+
+logger = logging.getLogger(__name__)
+
+# Read notifications older than this many days are moved to notification_archive
+NOTIFICATION_RETENTION_DAYS = int(os.getenv("NOTIFICATION_RETENTION_DAYS", "90"))
+# Rows moved per transaction, so locks and WAL bursts stay small
+NOTIFICATION_RETENTION_BATCH_SIZE = int(os.getenv("NOTIFICATION_RETENTION_BATCH_SIZE", "1000"))
+# Seconds between runs of the job on every worker (0 disables it); concurrent runs skip each other's rows
+NOTIFICATION_RETENTION_INTERVAL = float(os.getenv("NOTIFICATION_RETENTION_INTERVAL", "3600"))
+# Monthly partitions of notification/recipient_notification created ahead of the current month
+NOTIFICATION_PARTITION_MONTHS_AHEAD = int(os.getenv("NOTIFICATION_PARTITION_MONTHS_AHEAD", "3"))
+# Seconds between checks that those partitions exist, independent of the retention interval (0: at startup only)
+NOTIFICATION_PARTITION_INTERVAL = float(os.getenv("NOTIFICATION_PARTITION_INTERVAL", "86400"))
+# Months of notification_archive kept; older partitions are dropped (0 keeps everything)
+NOTIFICATION_ARCHIVE_MONTHS = int(os.getenv("NOTIFICATION_ARCHIVE_MONTHS", "0"))
+
+# tables range partitioned by the month of the notification
+NOTIFICATION_TABLES = (Notification.__tablename__, RecipientNotification.__tablename__)
+
+
+@dataclass
+class RetentionProgress:
+    running: bool = False
+    startedAt: Optional[datetime] = None
+    finishedAt: Optional[datetime] = None
+    cutoff: Optional[datetime] = None
+    # counts of the current (or last) run
+    batches: int = 0
+    archived: int = 0
+    deletedNotifications: int = 0
+    droppedPartitions: int = 0
+    # since this worker started
+    totalArchived: int = 0
+    lastError: Optional[str] = None
+
+
+# progress of the job on this worker
+progress = RetentionProgress()
+
+
+class NotificationRetentionService:
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def run(self):
+        cutoff = datetime.now(timezone.utc) - timedelta(days=NOTIFICATION_RETENTION_DAYS)
+        progress.running = True
+        progress.startedAt = datetime.now(timezone.utc)
+        progress.finishedAt = None
+        progress.cutoff = cutoff
+        progress.batches = progress.archived = progress.deletedNotifications = progress.droppedPartitions = 0
+        progress.lastError = None
+        try:
+            await self.ensure_notification_partitions()
+            await self.ensure_archive_partitions(cutoff)
+            while await self.archive_batch(cutoff) == NOTIFICATION_RETENTION_BATCH_SIZE:
+                pass
+            while await self.delete_orphans_batch(cutoff) == NOTIFICATION_RETENTION_BATCH_SIZE:
+                pass
+            await self.drop_archived_months(cutoff)
+            await self.drop_expired_archive_months()
+        except Exception as e:
+            progress.lastError = repr(e)
+            raise
+        finally:
+            progress.running = False
+            progress.finishedAt = datetime.now(timezone.utc)
+
+    async def ensure_notification_partitions(self):
+        now = datetime.now(timezone.utc)
+        ahead = add_months(month_start(now), NOTIFICATION_PARTITION_MONTHS_AHEAD)
+        for table in NOTIFICATION_TABLES:
+            await ensure_month_partitions(self.db, table, now, ahead)
+        await self.db.commit()
+
+    async def ensure_archive_partitions(self, cutoff: datetime):
+        oldest = await self.db.scalar(
+            select(func.min(RecipientNotification.notificationCreatedAt))
+            .where(RecipientNotification.isRead == True, RecipientNotification.notificationCreatedAt < cutoff)
+        )
+        if oldest is not None:
+            await ensure_month_partitions(self.db, NotificationArchive.__tablename__, oldest, cutoff)
+            await self.db.commit()
+
+    async def archive_batch(self, cutoff: datetime) -> int:
+        """Moves one batch of read recipient rows older than the cutoff to the archive; returns its size."""
+        # the partition key bounds the scan to the months before the cutoff
+        keys = (await self.db.execute(
+            select(
+                RecipientNotification.recipientId,
+                RecipientNotification.notificationId,
+                RecipientNotification.notificationCreatedAt,
+            )
+            .where(RecipientNotification.isRead == True, RecipientNotification.notificationCreatedAt < cutoff)
+            .limit(NOTIFICATION_RETENTION_BATCH_SIZE)
+            .with_for_update(skip_locked=True)
+        )).all()
+        if not keys:
+            return 0
+
+        in_batch = tuple_(
+            RecipientNotification.recipientId,
+            RecipientNotification.notificationId,
+            RecipientNotification.notificationCreatedAt,
+        ).in_(keys)
+        same_notification = and_(
+            Notification.id == RecipientNotification.notificationId,
+            Notification.createdAt == RecipientNotification.notificationCreatedAt,
+        )
+        await self.db.execute(
+            insert(NotificationArchive).from_select(
+                ["recipientId", "notificationId", "createdAt", "message", "eventType", "taskId", "creatorId",
+                 "notifiedAt"],
+                select(
+                    RecipientNotification.recipientId,
+                    Notification.id,
+                    Notification.createdAt,
+                    Notification.message,
+                    Notification.eventType,
+                    Notification.taskId,
+                    Notification.creatorId,
+                    RecipientNotification.notifiedAt,
+                )
+                .join(Notification, same_notification)
+                .where(in_batch)
+            )
+        )
+        await self.db.execute(delete(RecipientNotification).where(in_batch))
+        # notifications whose last recipient was just archived
+        deleted = await self.db.execute(
+            delete(Notification)
+            .where(tuple_(Notification.id, Notification.createdAt).in_({(key[1], key[2]) for key in keys}))
+            .where(~exists().where(same_notification))
+        )
+        await self.db.commit()
+
+        progress.batches += 1
+        progress.archived += len(keys)
+        progress.totalArchived += len(keys)
+        progress.deletedNotifications += deleted.rowcount
+        return len(keys)
+
+    async def delete_orphans_batch(self, cutoff: datetime) -> int:
+        """Deletes one batch of notifications older than the cutoff that have no recipients left."""
+        deleted = await self.db.execute(
+            delete(Notification).where(
+                tuple_(Notification.id, Notification.createdAt).in_(
+                    select(Notification.id, Notification.createdAt)
+                    .where(Notification.createdAt < cutoff)
+                    .where(~exists().where(
+                        RecipientNotification.notificationId == Notification.id,
+                        RecipientNotification.notificationCreatedAt == Notification.createdAt,
+                    ))
+                    .limit(NOTIFICATION_RETENTION_BATCH_SIZE)
+                )
+            )
+        )
+        await self.db.commit()
+
+        progress.batches += 1
+        progress.deletedNotifications += deleted.rowcount
+        return deleted.rowcount
+
+    async def drop_archived_months(self, cutoff: datetime):
+        """Drops the months before the cutoff that archiving emptied, instead of deleting what is left."""
+        # every worker runs the job; while one is dropping, the others skip the step
+        if not await try_lock_partition_drops(self.db):
+            await self.db.rollback()
+            return
+        notification_partitions, recipient_partitions = [
+            await list_month_partitions(self.db, table) for table in NOTIFICATION_TABLES
+        ]
+        for month, notification_partition in sorted(notification_partitions.items()):
+            if add_months(month, 1) > month_start(cutoff):
+                break
+            recipient_partition = recipient_partitions.get(month)
+            # months with unread (or not yet archived) notifications stay
+            if recipient_partition and await self.has_rows(recipient_partition):
+                continue
+            if await self.has_rows(notification_partition):
+                continue
+            # the referencing side first
+            if recipient_partition:
+                await drop_partition(self.db, RecipientNotification.__tablename__, recipient_partition)
+            await drop_partition(self.db, Notification.__tablename__, notification_partition)
+            progress.droppedPartitions += 1
+        await self.db.commit()
+
+    async def drop_expired_archive_months(self):
+        if NOTIFICATION_ARCHIVE_MONTHS <= 0:
+            return
+        if not await try_lock_partition_drops(self.db):
+            await self.db.rollback()
+            return
+        oldest_kept = add_months(month_start(datetime.now(timezone.utc)), -NOTIFICATION_ARCHIVE_MONTHS)
+        for month, partition in (await list_month_partitions(self.db, NotificationArchive.__tablename__)).items():
+            if month < oldest_kept:
+                await drop_partition(self.db, NotificationArchive.__tablename__, partition)
+                progress.droppedPartitions += 1
+        await self.db.commit()
+
+    async def has_rows(self, table: str) -> bool:
+        return await self.db.scalar(text(f'SELECT EXISTS (SELECT 1 FROM "{table}")'))
+
+
+class RetentionJob:
+    """
+    Runs the notification retention (and prunes the task change feed) periodically in the background of a
+    worker. The partitions ahead are kept on their own schedule, starting at startup, so inserts never miss
+    their month even when retention is disabled.
+    """
+
+    def __init__(self):
+        self.task: Optional[asyncio.Task] = None
+        self.partitions_task: Optional[asyncio.Task] = None
+
+    async def start(self):
+        self.partitions_task = asyncio.create_task(self.maintain_partitions())
+        self.task = asyncio.create_task(self.run_periodically())
+
+    async def stop(self):
+        for task in (self.partitions_task, self.task):
+            if task:
+                task.cancel()
+
+    async def maintain_partitions(self):
+        while True:
+            try:
+                async with AsyncSessionLocal() as db:
+                    await NotificationRetentionService(db).ensure_notification_partitions()
+            except Exception:
+                logger.exception("Creating notification partitions failed")
+            if NOTIFICATION_PARTITION_INTERVAL <= 0:
+                return
+            await asyncio.sleep(NOTIFICATION_PARTITION_INTERVAL)
+
+    async def run_periodically(self):
+        while NOTIFICATION_RETENTION_INTERVAL > 0:
+            await asyncio.sleep(NOTIFICATION_RETENTION_INTERVAL)
+            try:
+                async with AsyncSessionLocal() as db:
+                    await NotificationRetentionService(db).run()
+            except Exception:
+                logger.exception("Notification retention run failed")
+            try:
+                async with AsyncSessionLocal() as db:
+                    cutoff = datetime.now(timezone.utc) - timedelta(days=TASK_CHANGE_RETENTION_DAYS)
+                    await TaskChangeService(db).prune(cutoff)
+            except Exception:
+                logger.exception("Pruning task changes failed")
+
+    def progress(self) -> dict:
+        return asdict(progress)
+
+
+retention_job = RetentionJob()
@@ -1,44 +1,116 @@
-from typing import List, Tuple
+from typing import List, Optional, Tuple, Set
 from uuid import UUID
 
-from sqlalchemy.orm import Session
+from sqlalchemy import select, delete, and_, or_, func, cast
+from sqlalchemy.dialects.postgresql import REGCONFIG
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
 
-from db.models import Task, Notification, User, RecipientNotification, AssigneeTask, WorkspaceTaskStatus
+from db.bulk import insert_rows
+from db.models import Task, User, AssigneeTask, WorkspaceTaskStatus, Notification, RecipientNotification, \
+    WorkspaceUser
 from schemas.notifications import EventTypeEnum
-from schemas.task import TaskCreate, TaskUpdate
+from schemas.task import TaskCreate, TaskUpdate, TaskCreateResponse
+from services.notifications import NotificationBatch, NotificationService
+from services.taskChange import TaskChangeService
+from services.user import invalidate_dashboard_summaries_async
+from services.workspaceMetadata import get_cached_metadata, STATUSES
 from websocket import notification_manager
 
+DEFAULT_SEARCH_PAGE_SIZE = 20
+MAX_SEARCH_PAGE_SIZE = 100
+# text search configuration task.searchVector is built with
+SEARCH_CONFIG = "english"
+
+
+# task as sent to the workspace's websocket subscribers
+def task_event_data(task: Task) -> dict:
+    return TaskCreateResponse(
+        id=task.id,
+        title=task.title,
+        description=task.description,
+        dueDate=task.dueDate,
+        workspaceId=task.workspaceId,
+        statusId=task.statusId,
+        assigneesIds=[assignee.assigneeId for assignee in task.assignees],
+    ).model_dump(mode="json")
+
 
 class TaskService:
-    def __init__(self, db: Session):
+    def __init__(self, db: AsyncSession):
         self.db = db
 
     # tasks
     async def create_task(self, task_create: TaskCreate, creatorId: UUID):
-        # Create a task
-        task = Task(
-            title=task_create.title,
-            description=task_create.description,
-            workspaceId=task_create.workspaceId,
-            dueDate=task_create.dueDate,
-            statusId=task_create.statusId
+        tasks = await self.create_tasks([task_create], creatorId)
+        return tasks[0]
+
+    async def create_tasks(self, task_creates: List[TaskCreate], creatorId: UUID) -> List[Task]:
+        # Check every assignee of every task with one IN (...) query
+        await self.check_assignees_exist({aid for tc in task_creates for aid in tc.assignees})
+
+        # Create the tasks
+        tasks = [
+            Task(
+                title=task_create.title,
+                description=task_create.description,
+                workspaceId=task_create.workspaceId,
+                dueDate=task_create.dueDate,
+                statusId=task_create.statusId
+            )
+            for task_create in task_creates
+        ]
+        self.db.add_all(tasks)
+        await self.db.flush()  # assigns task ids
+
+        # Assign assignees to tasks with multi-row INSERTs
+        rows = [
+            {"assigneeId": assignee_id, "taskId": task.id}
+            for task, task_create in zip(tasks, task_creates)
+            for assignee_id in dict.fromkeys(task_create.assignees)  # drop duplicates, keep order
+        ]
+        await self.insert_assignees(rows)
+        versions = await TaskChangeService(self.db).record([(task.workspaceId, task.id) for task in tasks])
+
+        await self.db.commit()
+        await invalidate_dashboard_summaries_async({row["assigneeId"] for row in rows})
+
+        # Load the assignees of all created tasks in one query
+        result = await self.db.scalars(
+            select(Task)
+            .where(Task.id.in_([task.id for task in tasks]))
+            .options(selectinload(Task.assignees))
+            .execution_options(populate_existing=True)
         )
+        by_id = {task.id: task for task in result}
+        tasks = [by_id[task.id] for task in tasks]
 
-        # Assign assignees to task
-        for assignee_id in task_create.assignees:
-            user = self.db.query(User).filter(User.id == assignee_id).first()
-            if not user:
-                return f"User with id {assignee_id} not found"
-            task.assignees.append(AssigneeTask(assigneeId=user.id, taskId=task.id))
+        for workspace_id, version in versions.items():
+            await notification_manager.notify_workspace_tasks(
+                workspace_id, "created", version,
+                [task_event_data(task) for task in tasks if task.workspaceId == workspace_id]
+            )
 
-        self.db.add(task)
-        self.db.commit()
-        self.db.refresh(task)
+        return tasks
 
-        return task
+    async def check_assignees_exist(self, assignee_ids: Set[UUID]):
+        if not assignee_ids:
+            return
+
+        found = set(await self.db.scalars(select(User.id).where(User.id.in_(assignee_ids))))
+        missing = assignee_ids - found
+        if missing:
+            raise ValueError(f"User with id {next(iter(missing))} not found")
+
+    async def insert_assignees(self, rows: List[dict]):
+        await insert_rows(self.db, AssigneeTask, rows)
 
     async def update_task(self, task_id: UUID, update_data: TaskUpdate, updatedBy: UUID):
-        task = self.db.query(Task).filter(Task.id == task_id).first()
+        task = await self.db.scalar(
+            select(Task)
+            .where(Task.id == task_id)
+            .options(selectinload(Task.status), selectinload(Task.workspace), selectinload(Task.assignees))
+        )
         if not task:
             return None
 
@@ -77,163 +149,183 @@ class TaskService:
         if update_data.statusId is not None and update_data.statusId != task.statusId:
             old_status = task.status.name
             task.statusId = update_data.statusId
-            new_status = self.db.query(WorkspaceTaskStatus).filter(
-                WorkspaceTaskStatus.id == update_data.statusId).first()
+            new_status_name = await self.get_status_name(task.workspaceId, update_data.statusId)
             events.append((
                 EventTypeEnum.TASK_STATUS_CHANGED,
-                f"Status changed from '{old_status}' to '{new_status.name}'"
+                f"Status changed from '{old_status}' to '{new_status_name}'"
             ))
 
+        # all notifications of this update are written in the task's transaction
+        notifications = NotificationBatch(self.db, task_id=task.id, creator_id=updatedBy)
+        current_ids = [a.assigneeId for a in task.assignees]
+        old_assignee_ids = list(current_ids)
+
         if update_data.assignees is not None:
-            old_ids = {a.assigneeId for a in task.assignees}
+            old_ids = set(current_ids)
             new_ids = set(update_data.assignees)
-            actor = self.db.query(User).filter(User.id == updatedBy).first()
+            removed_ids = old_ids - new_ids
+            added_ids = new_ids - old_ids
 
             # Unassignments
-            for rid in old_ids - new_ids:
-                # remove association
-                self.db.query(AssigneeTask).filter(
-                    AssigneeTask.taskId == task.id,
-                    AssigneeTask.assigneeId == rid
-                ).delete()
-
-                if rid != updatedBy:
-                    notif = self.create_notification(
-                        taskId=task.id,
-                        event_type=EventTypeEnum.TASK_UNASSIGNED,
-                        message=f"You were unassigned",
-                        recipient_ids=[rid],
-                        creator_id=updatedBy
-                    )
-                    await notification_manager.notify_task_event(
-                        notification_id=notif.id,
-                        task_id=task.id,
-                        task_name=task.title,
-                        workspace_id=task.workspaceId,
-                        workspace_name=task.workspace.name,
-                        event_type=EventTypeEnum.TASK_UNASSIGNED,
-                        message=notif.message,
-                        creator_id=updatedBy,
-                        creator_name=actor.fullName,
-                        assignee_ids=[rid],
-                        notified_at=notif.createdAt
-                    )
+            if removed_ids:
+                await self.db.execute(
+                    delete(AssigneeTask)
+                    .where(AssigneeTask.taskId == task.id, AssigneeTask.assigneeId.in_(removed_ids))
+                    .execution_options(synchronize_session=False)
+                )
+                notifications.add(
+                    EventTypeEnum.TASK_UNASSIGNED,
+                    "You were unassigned",
+                    [rid for rid in removed_ids if rid != updatedBy]
+                )
+
             # Assignments
-            for aid in new_ids - old_ids:
-                task.assignees.append(AssigneeTask(assigneeId=aid, taskId=task.id))
-                if aid != updatedBy:
-                    notif = self.create_notification(
-                        taskId=task.id,
-                        event_type=EventTypeEnum.TASK_ASSIGNED,
-                        message=f"You were assigned",
-                        recipient_ids=[aid],
-                        creator_id=updatedBy
-                    )
-                    await notification_manager.notify_task_event(
-                        notification_id=notif.id,
-                        task_id=task.id,
-                        task_name=task.title,
-                        workspace_id=task.workspaceId,
-                        workspace_name=task.workspace.name,
-                        event_type=EventTypeEnum.TASK_ASSIGNED,
-                        message=notif.message,
-                        creator_id=updatedBy,
-                        creator_name=actor.fullName,
-                        assignee_ids=[aid],
-                        notified_at=notif.createdAt
-                    )
-        self.db.commit()
-        self.db.refresh(task)
-
-        # for notifying users
-        creator = self.db.query(User).filter(User.id == updatedBy).first()
-        current_ids = [a.assigneeId for a in task.assignees]
-        recipients = [aid for aid in current_ids if aid != updatedBy]
+            if added_ids:
+                await self.check_assignees_exist(added_ids)
+                await self.insert_assignees([{"assigneeId": aid, "taskId": task.id} for aid in added_ids])
+                notifications.add(
+                    EventTypeEnum.TASK_ASSIGNED,
+                    "You were assigned",
+                    [aid for aid in added_ids if aid != updatedBy]
+                )
 
-        if len(events) > 0:
-            self.db.add(task)
-            self.db.commit()
+            current_ids = [aid for aid in current_ids if aid not in removed_ids] + list(added_ids)
+
+        versions = {}
+        if events or current_ids != old_assignee_ids:
+            # incremented by the database, so concurrent updates can't end on the same version
+            task.version = Task.version + 1
+            versions = await TaskChangeService(self.db).record([(task.workspaceId, task.id)])
 
+        if len(events) > 0:
             if len(events) == 1:
                 evt, msg = events[0]
             else:
                 evt = EventTypeEnum.TASK_UPDATED
                 msg = "; ".join(m for _, m in events)
 
-            if len(recipients) > 0:
-                notif = self.create_notification(
-                    taskId=task.id,
-                    event_type=evt,
-                    message=msg,
-                    recipient_ids=recipients,
-                    creator_id=updatedBy
-                )
+            # for notifying users
+            notifications.add(evt, msg, [aid for aid in current_ids if aid != updatedBy])
 
-                await notification_manager.notify_task_event(
-                    notification_id=notif.id,
-                    task_id=task.id,
-                    task_name=task.title,
-                    workspace_id=task.workspaceId,
-                    workspace_name=task.workspace.name,
-                    event_type=evt,
-                    message=notif.message,
-                    creator_id=updatedBy,
-                    creator_name=creator.fullName,
-                    assignee_ids=recipients,
-                    notified_at=notif.createdAt,
-                )
+        await notifications.create_notifications()
+        await self.db.commit()
+        await self.db.refresh(task, attribute_names=["assignees"])
 
-        return task
+        # open/completed counts of previous and current assignees may have changed
+        await invalidate_dashboard_summaries_async(set(old_assignee_ids) | {a.assigneeId for a in task.assignees})
 
-    def get_task(self, task_id: UUID):
-        task = self.db.query(Task).filter(Task.id == task_id).first()
-        assignees = self.db.query(User).join(AssigneeTask).filter(AssigneeTask.taskId == task_id).all()
+        # websocket pushes only go out once the change is committed
+        if versions:
+            await notification_manager.notify_workspace_tasks(
+                task.workspaceId, "updated", versions[task.workspaceId], [task_event_data(task)]
+            )
+        if notifications.pending:
+            creator = await self.db.scalar(select(User).where(User.id == updatedBy))
+            await notifications.send(
+                task_name=task.title,
+                workspace_id=task.workspaceId,
+                workspace_name=task.workspace.name,
+                creator_name=creator.fullName
+            )
 
-        return task, assignees
+        return task
 
-    def get_task_status(self, task_id: UUID):
-        task = self.db.query(Task).filter(Task.id == task_id).first()
-        status = self.db.query(WorkspaceTaskStatus).filter(WorkspaceTaskStatus.id == task.statusId)
-        return status
+    async def get_status_name(self, workspace_id: UUID, status_id: UUID) -> str:
+        # the board keeps the workspace's statuses cached, so this rarely needs a query; statuses are never
+        # renamed, so an entry of an older version has the right name too
+        statuses = get_cached_metadata(workspace_id, STATUSES) or []
+        name = next((status["name"] for status in statuses if status["id"] == str(status_id)), None)
+        if name is None:
+            name = await self.db.scalar(select(WorkspaceTaskStatus.name).where(WorkspaceTaskStatus.id == status_id))
+        return name
 
-    # notifications
-    def create_notification(
+    async def search_tasks(
             self,
-            taskId: UUID,
-            event_type: EventTypeEnum,
-            message: str,
-            recipient_ids: List[UUID],
-            creator_id: UUID
-    ) -> Notification:
-        # create the notification record
-        notification = Notification(
-            message=message,
-            eventType=event_type,
-            taskId=taskId,
-            creatorId=creator_id
+            user_id: UUID,
+            text: str,
+            workspace_id: Optional[UUID] = None,
+            offset: int = 0,
+            limit: int = DEFAULT_SEARCH_PAGE_SIZE,
+    ) -> List[Task]:
+        """
+        Tasks of the user's workspaces matching the text, best first: full-text matches on the title and
+        description (websearch syntax), plus substring and fuzzy matches on the title through the trigram index.
+        """
+        query = func.websearch_to_tsquery(cast(SEARCH_CONFIG, REGCONFIG), text)
+        rank = func.ts_rank_cd(Task.searchVector, query) + func.similarity(Task.title, text)
+        member_workspaces = select(WorkspaceUser.workspaceId).where(WorkspaceUser.userId == user_id)
+
+        statement = (
+            select(Task)
+            .where(Task.workspaceId.in_(member_workspaces))
+            .where(or_(
+                Task.searchVector.op("@@")(query),
+                Task.title.icontains(text, autoescape=True),
+                Task.title.op("%")(text),
+            ))
         )
-        self.db.add(notification)
-        self.db.commit()
-        self.db.refresh(notification)
-
-        # only assign it to the filtered recipients
-        for recipient_id in recipient_ids:
-            recipient_notification = RecipientNotification(
-                recipientId=recipient_id,
-                notificationId=notification.id,
-                isRead=False
-            )
-            self.db.add(recipient_notification)
-        self.db.commit()
+        if workspace_id is not None:
+            statement = statement.where(Task.workspaceId == workspace_id)
+
+        tasks = await self.db.scalars(
+            statement
+            .options(selectinload(Task.status), selectinload(Task.assignees).selectinload(AssigneeTask.assignee))
+            .order_by(rank.desc(), Task.id)
+            .offset(offset)
+            .limit(limit)
+        )
+        return tasks.all()
 
-        return notification
+    async def get_task_version(self, task_id: UUID) -> Optional[int]:
+        return await self.db.scalar(select(Task.version).where(Task.id == task_id))
+
+    async def get_task(self, task_id: UUID):
+        task = await self.db.scalar(select(Task).where(Task.id == task_id).options(selectinload(Task.status)))
+        assignees = (
+            await self.db.scalars(select(User).join(AssigneeTask).where(AssigneeTask.taskId == task_id))
+        ).all()
+
+        return task, assignees
+
+    async def get_task_status(self, task_id: UUID):
+        status = await self.db.scalar(
+            select(WorkspaceTaskStatus)
+            .join(Task, Task.statusId == WorkspaceTaskStatus.id)
+            .where(Task.id == task_id)
+        )
+        return status
 
     async def delete_task(self, task_id: UUID):
-        task = self.db.query(Task).filter(Task.id == task_id).first()
+        task = await self.db.get(Task, task_id)
         if not task:
             return False
 
-        self.db.delete(task)
-        self.db.commit()
+        # unread notifications of the task are deleted with it
+        unread_recipient_ids = await self.get_unread_recipient_ids(task_id)
+
+        assignee_ids = set(await self.db.scalars(
+            select(AssigneeTask.assigneeId).where(AssigneeTask.taskId == task_id)
+        ))
+
+        versions = await TaskChangeService(self.db).record([(task.workspaceId, task.id)], deleted=True)
+        await self.db.delete(task)
+        await self.db.commit()
+        await invalidate_dashboard_summaries_async(assignee_ids)
+        await notification_manager.notify_workspace_tasks(
+            task.workspaceId, "deleted", versions[task.workspaceId], [{"id": str(task_id)}]
+        )
+
+        if unread_recipient_ids:
+            await NotificationService(self.db).refresh_unread_counts(unread_recipient_ids)
 
         return True
+
+    async def get_unread_recipient_ids(self, task_id: UUID) -> Set[UUID]:
+        return set(await self.db.scalars(
+            select(RecipientNotification.recipientId)
+            .join(Notification, and_(
+                Notification.id == RecipientNotification.notificationId,
+                Notification.createdAt == RecipientNotification.notificationCreatedAt,
+            ))
+            .where(Notification.taskId == task_id, RecipientNotification.isRead == False)
+        ))
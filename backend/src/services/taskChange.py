@@ -0,0 +1,113 @@
+import os
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+from uuid import UUID
+
+from sqlalchemy import select, update, delete, func
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
+
+from db.bulk import insert_rows
+from db.models import Task, TaskChange, Workspace, AssigneeTask
+from schemas.task import TaskResponse, TaskChangesResponse
+
+# Changes are kept this many days; clients further behind reload the whole list
+TASK_CHANGE_RETENTION_DAYS = int(os.getenv("TASK_CHANGE_RETENTION_DAYS", "30"))
+# Changed tasks returned by one delta before the client is told to reload the whole list instead
+MAX_CHANGED_TASKS = int(os.getenv("MAX_CHANGED_TASKS", "1000"))
+
+
+def bump_tasks_versions_statement(workspace_ids: Iterable[UUID]):
+    return (
+        update(Workspace)
+        .where(Workspace.id.in_(set(workspace_ids)))
+        .values(tasksVersion=Workspace.tasksVersion + 1)
+        .returning(Workspace.id, Workspace.tasksVersion)
+        .execution_options(synchronize_session=False)
+    )
+
+
+def task_change_rows(tasks: List[Tuple[UUID, UUID]], versions: Dict[UUID, int], deleted: bool) -> List[dict]:
+    """Rows for the (workspace id, task id) pairs, stamped with the new task versions of their workspaces."""
+    return [
+        {"workspaceId": workspace_id, "version": versions[workspace_id], "taskId": task_id, "deleted": deleted}
+        for workspace_id, task_id in dict.fromkeys(tasks)
+    ]
+
+
+class TaskChangeService:
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def record(self, tasks: List[Tuple[UUID, UUID]], deleted: bool = False) -> Dict[UUID, int]:
+        """
+        Bumps the task version of the workspaces of the (workspace id, task id) pairs and writes their changes,
+        in the caller's transaction. Returns the new version (change feed cursor) of each workspace.
+        """
+        if not tasks:
+            return {}
+        result = await self.db.execute(bump_tasks_versions_statement(workspace_id for workspace_id, _ in tasks))
+        versions = dict(result.all())
+        await insert_rows(self.db, TaskChange, task_change_rows(tasks, versions, deleted))
+        return versions
+
+    async def get_changes(self, workspace_id: UUID, since: Optional[int]) -> Optional[TaskChangesResponse]:
+        # read first: tasks loaded below are at least this new, later changes are delivered again next time
+        cursor = await self.db.scalar(select(Workspace.tasksVersion).where(Workspace.id == workspace_id))
+        if cursor is None:
+            return None
+        if since is not None and since == cursor:
+            return TaskChangesResponse(cursor=cursor, reset=False, tasks=[], deleted=[])
+        if since is None or since > cursor or not await self.has_change(workspace_id, since + 1):
+            # unknown cursor, or the changes after it were pruned
+            return TaskChangesResponse(cursor=cursor, reset=True, tasks=[], deleted=[])
+
+        changes = (await self.db.execute(
+            select(TaskChange.taskId, func.max(TaskChange.version))
+            .where(TaskChange.workspaceId == workspace_id, TaskChange.version > since, TaskChange.version <= cursor)
+            .group_by(TaskChange.taskId)
+            .limit(MAX_CHANGED_TASKS + 1)
+        )).all()
+        if len(changes) > MAX_CHANGED_TASKS:
+            return TaskChangesResponse(cursor=cursor, reset=True, tasks=[], deleted=[])
+
+        task_ids = [task_id for task_id, _ in changes]
+        tasks = (await self.db.scalars(
+            select(Task)
+            .where(Task.id.in_(task_ids), Task.workspaceId == workspace_id)
+            .options(selectinload(Task.status), selectinload(Task.assignees).selectinload(AssigneeTask.assignee))
+            .order_by(Task.id)
+        )).all()
+        # changed tasks that are gone are tombstones
+        found = {task.id for task in tasks}
+        return TaskChangesResponse(
+            cursor=cursor,
+            reset=False,
+            tasks=[
+                TaskResponse(
+                    id=task.id,
+                    title=task.title,
+                    description=task.description,
+                    dueDate=task.dueDate,
+                    workspaceId=task.workspaceId,
+                    status=task.status,
+                    assignees=[a.assignee for a in task.assignees],
+                )
+                for task in tasks
+            ],
+            deleted=[task_id for task_id in task_ids if task_id not in found],
+        )
+
+    async def has_change(self, workspace_id: UUID, version: int) -> bool:
+        return await self.db.scalar(
+            select(
+                select(TaskChange.version)
+                .where(TaskChange.workspaceId == workspace_id, TaskChange.version == version)
+                .exists()
+            )
+        )
+
+    async def prune(self, cutoff: datetime) -> int:
+        deleted = await self.db.execute(delete(TaskChange).where(TaskChange.createdAt < cutoff))
+        await self.db.commit()
+        return deleted.rowcount
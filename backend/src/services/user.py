@@ -1,19 +1,45 @@
 # services/user_service.py
-import uuid
+import os
+from typing import Iterable, Optional
 from uuid import UUID
 
-from sqlalchemy.orm import Session
+from sqlalchemy import select, update, insert, func, not_, tuple_
+from sqlalchemy.orm import Session, selectinload
 
-from db.models import User, Notification, RecipientNotification, WorkspaceUser, AssigneeTask, Task, WorkspaceTaskStatus
+from db.models import User, Notification, RecipientNotification, WorkspaceUser, AssigneeTask, Task, \
+    WorkspaceTaskStatus, NotificationArchive, TaskChange
 from schemas.user import UserCreate, UserUpdate, DashboardSummary
-from utils.auth import get_password_hash
+from services.notifications import unread_counts, DEFAULT_NOTIFICATIONS_PAGE_SIZE
+from services.taskChange import bump_tasks_versions_statement, task_change_rows
+from services.workspaceMetadata import bump_metadata_versions_statement
+from utils.auth import get_password_hash, evict_principal
+from utils.cache import create_cache
+
+
+# Dashboard summaries (without the unread count, which has its own counter) per user id
+dashboard_summaries = create_cache(
+    "dashboard_summary",
+    maxsize=int(os.getenv("DASHBOARD_SUMMARY_CACHE_SIZE", "10000")),
+    ttl=float(os.getenv("DASHBOARD_SUMMARY_CACHE_TTL", "30")),
+)
+
+
+def invalidate_dashboard_summaries(user_ids: Iterable[UUID]):
+    for user_id in user_ids:
+        dashboard_summaries.delete(str(user_id))
+
+
+# for the async services, which must not wait on a shared cache from the event loop
+async def invalidate_dashboard_summaries_async(user_ids: Iterable[UUID]):
+    for user_id in user_ids:
+        await dashboard_summaries.adelete(str(user_id))
 
 
 class UserService:
     def __init__(self, db: Session):
         self.db = db
 
-    def create_user(self, user: UserCreate):
+    def check_user_available(self, user: UserCreate):
         # Check if email exists
         if self.db.query(User).filter(User.email == user.email).first():
             raise ValueError("User with this email already exists.")
@@ -22,10 +48,13 @@ class UserService:
         if self.db.query(User).filter(User.username == user.username).first():
             raise ValueError("User with this username already exists.")
 
-        hashedPassword = get_password_hash(user.password)
+    def create_user(self, user: UserCreate, password_hash: str | None = None):
+        self.check_user_available(user)
+
+        # callers on the event loop hash in the password pool beforehand
+        hashedPassword = password_hash or get_password_hash(user.password)
 
         new_user = User(
-            id=uuid.uuid4(),
             email=user.email,
             username=user.username,
             passwordHash=hashedPassword,
@@ -45,7 +74,7 @@ class UserService:
         users = self.db.query(User).all()
         return users
 
-    def update_user(self, user_id: UUID, user_update: UserUpdate):
+    def update_user(self, user_id: UUID, user_update: UserUpdate, password_hash: str | None = None):
         user = self.db.query(User).filter(User.id == user_id).first()
         if not user:
             return None
@@ -53,11 +82,17 @@ class UserService:
         # Update user fields
         user.email = user_update.email or user.email
         user.username = user_update.username or user.username
-        user.passwordHash = user_update.password_hash or user.passwordHash
-        user.fullName = user_update.full_name or user.fullName
+        user.fullName = user_update.fullName or user.fullName
+        if user_update.password:
+            # callers on the event loop hash in the password pool beforehand
+            user.passwordHash = password_hash or get_password_hash(user_update.password)
+        self.bump_assigned_task_versions(user_id)
+        # the cached member lists of the user's workspaces carry the user's fields
+        self.db.execute(bump_metadata_versions_statement(self.get_workspace_ids(user_id)))
 
         self.db.commit()
         self.db.refresh(user)
+        evict_principal(user_id)
         return user
 
     def delete_user(self, user_id: UUID):
@@ -65,71 +100,127 @@ class UserService:
         if not user:
             return None
 
+        self.bump_assigned_task_versions(user_id)
+        self.db.execute(bump_metadata_versions_statement(self.get_workspace_ids(user_id)))
         self.db.delete(user)
         self.db.commit()
+        evict_principal(user_id)
         return user
 
-    def get_user_notifications(self, user_id: UUID):
-        notifications = self.db.query(Notification).join(RecipientNotification).filter(
-            RecipientNotification.recipientId == user_id).all()
-
-        return notifications
-
-    def get_dashboard_summary(self, user_id: UUID) -> DashboardSummary | None:
-        user = self.db.query(User).filter(User.id == user_id).first()
-        if not user:
-            return None
-
-        # total workspaces
-        workspace_count = (
-            self.db
-            .query(WorkspaceUser)
-            .filter_by(userId=user.id)
-            .count()
+    # task responses embed their assignees, so the user's tasks change with the user
+    def bump_assigned_task_versions(self, user_id: UUID):
+        task_ids = select(AssigneeTask.taskId).where(AssigneeTask.assigneeId == user_id)
+        tasks = self.db.execute(select(Task.workspaceId, Task.id).where(Task.id.in_(task_ids))).all()
+        if not tasks:
+            return
+        self.db.execute(
+            update(Task)
+            .where(Task.id.in_(task_ids))
+            .values(version=Task.version + 1)
+            .execution_options(synchronize_session=False)
         )
-
-        rows = (
-            self.db
-            .query(WorkspaceTaskStatus.id)
-            .filter(WorkspaceTaskStatus.name == 'Completed')
-            .all()
+        versions = dict(self.db.execute(bump_tasks_versions_statement(workspace_id for workspace_id, _ in tasks)).all())
+        self.db.execute(insert(TaskChange), task_change_rows([tuple(task) for task in tasks], versions, deleted=False))
+
+    def get_workspace_ids(self, user_id: UUID):
+        return self.db.scalars(select(WorkspaceUser.workspaceId).where(WorkspaceUser.userId == user_id)).all()
+
+    def get_user_notifications(
+            self,
+            user_id: UUID,
+            before: Optional[UUID] = None,
+            limit: int = DEFAULT_NOTIFICATIONS_PAGE_SIZE
+    ):
+        # the history spans live notifications and those moved to the archive by the retention job
+        live = (
+            self.db.query(Notification)
+            .join(RecipientNotification)
+            .filter(RecipientNotification.recipientId == user_id)
         )
-        done_ids = [row[0] for row in rows]
-
-        # only tasks not done
-        open_task_count = (
-            self.db
-            .query(AssigneeTask)
-            .join(AssigneeTask.task)
-            .filter(
-                AssigneeTask.assigneeId == user.id,
-                Task.statusId.not_in(done_ids)
-            )
-            .count()
+        archived = (
+            self.db.query(NotificationArchive)
+            .join(Task, Task.id == NotificationArchive.taskId)
+            .filter(NotificationArchive.recipientId == user_id)
         )
 
-        # only tasks done
-        completed_task_count = (
-            self.db
-            .query(AssigneeTask)
-            .join(AssigneeTask.task)
-            .filter(
-                AssigneeTask.assigneeId == user.id,
-                Task.statusId.in_(done_ids)
+        # keyset pagination: everything older than the notification the previous page ended with
+        if before is not None:
+            cursor = func.coalesce(
+                select(Notification.createdAt).where(Notification.id == before).scalar_subquery(),
+                select(NotificationArchive.createdAt)
+                .where(NotificationArchive.recipientId == user_id, NotificationArchive.notificationId == before)
+                .scalar_subquery(),
+            )
+            live = live.filter(tuple_(Notification.createdAt, Notification.id) < tuple_(cursor, before))
+            archived = archived.filter(
+                tuple_(NotificationArchive.createdAt, NotificationArchive.notificationId) < tuple_(cursor, before)
             )
-            .count()
-        )
 
-        unread_notifications = (
-            self.db
-            .query(RecipientNotification)
-            .filter_by(recipientId=user.id, isRead=False)
-            .count()
-        )
+        pages = []
+        for query, model in ((live, Notification), (archived, NotificationArchive)):
+            pages += (
+                query
+                .options(
+                    selectinload(model.task).selectinload(Task.workspace),
+                    selectinload(model.task).selectinload(Task.status),
+                )
+                .order_by(model.createdAt.desc(), model.id.desc())
+                .limit(limit)
+                .all()
+            )
+
+        return sorted(pages, key=lambda n: (n.createdAt, n.id), reverse=True)[:limit]
+
+    def get_dashboard_summary(self, user_id: UUID) -> DashboardSummary | None:
+        unread_notifications = unread_counts.get(str(user_id))
+
+        summary = dashboard_summaries.get(str(user_id))
+        if summary is None or unread_notifications is None:
+            done = WorkspaceTaskStatus.name == 'Completed'
+            columns = [
+                User.id,
+                # total workspaces
+                select(func.count())
+                .select_from(WorkspaceUser)
+                .where(WorkspaceUser.userId == User.id)
+                .scalar_subquery()
+                .label("workspaceCount"),
+                # only tasks not done / only tasks done, by the status of the task's own workspace
+                func.count(Task.id).filter(not_(done)).label("taskCount"),
+                func.count(Task.id).filter(done).label("completedTaskCount"),
+            ]
+            if unread_notifications is None:
+                columns.append(
+                    select(func.count())
+                    .select_from(RecipientNotification)
+                    .where(RecipientNotification.recipientId == User.id, RecipientNotification.isRead == False)
+                    .scalar_subquery()
+                    .label("unreadNotifications")
+                )
+
+            # one aggregate query for the whole summary
+            row = self.db.execute(
+                select(*columns)
+                .select_from(User)
+                .outerjoin(AssigneeTask, AssigneeTask.assigneeId == User.id)
+                .outerjoin(Task, Task.id == AssigneeTask.taskId)
+                .outerjoin(WorkspaceTaskStatus, WorkspaceTaskStatus.id == Task.statusId)
+                .where(User.id == user_id)
+                .group_by(User.id)
+            ).first()
+            if not row:
+                return None
+
+            summary = {
+                "workspaceCount": row.workspaceCount,
+                "taskCount": row.taskCount,
+                "completedTaskCount": row.completedTaskCount,
+            }
+            dashboard_summaries.set(str(user_id), summary)
+
+            if unread_notifications is None:
+                unread_notifications = row.unreadNotifications
+                unread_counts.set(str(user_id), unread_notifications)
+
+        return DashboardSummary(**summary, unreadNotifications=unread_notifications)
 
-        return DashboardSummary(
-            workspaceCount=workspace_count,
-            taskCount=open_task_count,
-            completedTaskCount=completed_task_count,
-            unreadNotifications=unread_notifications
-        )
@@ -1,11 +1,20 @@
+from datetime import date
+from typing import Optional
 from uuid import UUID
 
-from sqlalchemy import select
-from sqlalchemy.orm import Session, joinedload
+from sqlalchemy import select, or_
+from sqlalchemy.orm import Session, selectinload
 
 from db.models import Workspace, WorkspaceUser, User, Task, AssigneeTask
+from schemas.user import UserResponse
 from schemas.workspace import WorkspaceCreate
+from services.user import invalidate_dashboard_summaries
+from services.workspaceMetadata import read_through_metadata, bump_metadata_versions_statement, MEMBERS
 from services.workspaceTaskStatus import WorkspaceTaskStatusService
+from websocket import notification_manager
+
+DEFAULT_TASKS_PAGE_SIZE = 200
+MAX_TASKS_PAGE_SIZE = 1000
 
 
 class WorkspaceService:
@@ -30,6 +39,7 @@ class WorkspaceService:
         )
         self.db.add(workspace_user)
         self.db.commit()
+        invalidate_dashboard_summaries([userId])
 
         # when creating workspace create 3 default workspace task statuses
         workspace_task_status_service = WorkspaceTaskStatusService(self.db)
@@ -44,7 +54,9 @@ class WorkspaceService:
                 userId=userId
             )
             self.db.add(workspace_user)
+        self.bump_version(workspaceId)
         self.db.commit()
+        invalidate_dashboard_summaries(userIds)
         return self.get_workspace_by_id(workspaceId)
 
     def remove_member(self, userId: UUID, workspaceId: UUID):
@@ -58,10 +70,32 @@ class WorkspaceService:
         )
 
         self.db.delete(workspace_user)
+        self.bump_version(workspaceId)
         self.db.commit()
+        invalidate_dashboard_summaries([userId])
+        # ends the user's live board subscription on every worker
+        notification_manager.revoke_workspace_threadsafe([userId], workspaceId)
 
         return self.get_workspace_by_id(workspaceId)
 
+    def bump_version(self, workspace_id: UUID):
+        self.db.execute(bump_metadata_versions_statement([workspace_id]))
+
+    def get_workspace_version(self, workspace_id: UUID):
+        return self.db.scalar(select(Workspace.version).where(Workspace.id == workspace_id))
+
+    def get_tasks_version(self, workspace_id: UUID):
+        return self.db.scalar(select(Workspace.tasksVersion).where(Workspace.id == workspace_id))
+
+    def get_workspace_versions_by_user(self, user_id: UUID):
+        # what GET /api/workspace/all returns depends only on these pairs
+        return self.db.execute(
+            select(Workspace.id, Workspace.version)
+            .join(WorkspaceUser)
+            .where(WorkspaceUser.userId == user_id)
+            .order_by(Workspace.id)
+        ).all()
+
     def get_workspace_by_id(self, workspace_id: UUID):
         return self.db.query(Workspace).filter(Workspace.id == workspace_id).first()
 
@@ -76,14 +110,20 @@ class WorkspaceService:
     def delete_workspace(self, workspace_id: UUID):
         workspace = self.db.query(Workspace).filter(Workspace.id == workspace_id).first()
         if workspace:
+            member_ids = [membership.userId for membership in workspace.memberships]
             self.db.delete(workspace)
             self.db.commit()
+            invalidate_dashboard_summaries(member_ids)
+            notification_manager.revoke_workspace_threadsafe(member_ids, workspace_id)
 
-    def get_workspace_statuses(self, workspace_id: UUID):
-        workspace = self.db.query(Workspace).filter(Workspace.id == workspace_id).first()
-        return workspace.taskStatuses
+    def get_workspace_statuses(self, workspace_id: UUID, version: Optional[int] = None):
+        return WorkspaceTaskStatusService(self.db).get_workspace_task_statuses_by_workspace(workspace_id, version)
+
+    def get_workspace_members(self, workspace_id: UUID, version: Optional[int] = None):
+        return read_through_metadata(self.db, workspace_id, MEMBERS,
+                                     lambda: self.load_workspace_members(workspace_id), version)
 
-    def get_workspace_members(self, workspace_id: UUID):
+    def load_workspace_members(self, workspace_id: UUID):
         user_ids_subquery = (
             select(WorkspaceUser.userId)
             .where(WorkspaceUser.workspaceId == workspace_id)
@@ -92,13 +132,48 @@ class WorkspaceService:
         # Query all users in a single query
         members = self.db.query(User).filter(User.id.in_(user_ids_subquery)).all()
 
-        return members
+        return [UserResponse.model_validate(member).model_dump(mode="json") for member in members]
+
+    def get_workspace_tasks(
+            self,
+            workspace_id: UUID,
+            after: Optional[UUID] = None,
+            limit: int = DEFAULT_TASKS_PAGE_SIZE,
+            status_id: Optional[UUID] = None,
+            assignee_id: Optional[UUID] = None,
+            due_from: Optional[date] = None,
+            due_to: Optional[date] = None,
+            text: Optional[str] = None,
+    ):
+        # keyset pagination on the task id, so every page is an index range scan instead of an OFFSET
+        query = self.db.query(Task).filter(Task.workspaceId == workspace_id)
+        if after is not None:
+            query = query.filter(Task.id > after)
+        if status_id is not None:
+            query = query.filter(Task.statusId == status_id)
+        if assignee_id is not None:
+            query = query.filter(
+                select(AssigneeTask.taskId)
+                .where(AssigneeTask.taskId == Task.id, AssigneeTask.assigneeId == assignee_id)
+                .exists()
+            )
+        if due_from is not None:
+            query = query.filter(Task.dueDate >= due_from)
+        if due_to is not None:
+            query = query.filter(Task.dueDate <= due_to)
+        if text:
+            # autoescape: % and _ in the text are matched literally
+            query = query.filter(or_(Task.title.icontains(text, autoescape=True),
+                                     Task.description.icontains(text, autoescape=True)))
 
-    def get_workspace_tasks(self, workspace_id: UUID):
         tasks = (
-            self.db.query(Task)
-            .filter(Task.workspaceId == workspace_id)
-            .options(joinedload(Task.assignees).joinedload(AssigneeTask.assignee))
+            query
+            .options(
+                selectinload(Task.status),
+                selectinload(Task.assignees).selectinload(AssigneeTask.assignee),
+            )
+            .order_by(Task.id)
+            .limit(limit)
             .all()
         )
         return tasks
@@ -0,0 +1,59 @@
+import os
+from typing import Callable, Iterable, List, Optional
+from uuid import UUID
+
+from sqlalchemy import select, update
+from sqlalchemy.orm import Session
+
+from db.models import Workspace
+from utils.cache import create_cache
+
+STATUSES = "statuses"
+MEMBERS = "members"
+
+# Statuses and members (as JSON dicts) per workspace, each stamped with the workspace version it was read under
+metadata_entries = create_cache(
+    "workspace_metadata",
+    maxsize=int(os.getenv("WORKSPACE_METADATA_CACHE_SIZE", "10000")),
+    ttl=float(os.getenv("WORKSPACE_METADATA_CACHE_TTL", "600")),
+)
+
+
+# Workspace.version is the metadata version: every change to the statuses or the members of a workspace bumps
+# it in its own transaction, so all workers agree on it and drop their stale entries on the next read
+def bump_metadata_versions_statement(workspace_ids: Iterable[UUID]):
+    return (
+        update(Workspace)
+        .where(Workspace.id.in_(workspace_ids))
+        .values(version=Workspace.version + 1)
+        .execution_options(synchronize_session=False)
+    )
+
+
+def get_metadata_version(db: Session, workspace_id: UUID) -> Optional[int]:
+    return db.scalar(select(Workspace.version).where(Workspace.id == workspace_id))
+
+
+def get_cached_metadata(workspace_id: UUID, kind: str, version: Optional[int] = None) -> Optional[List[dict]]:
+    """The cached items if they were read under `version`; without a version, whatever is cached."""
+    entry = metadata_entries.get(f"{workspace_id}:{kind}")
+    if entry is not None and (version is None or entry["version"] == version):
+        return entry["items"]
+    return None
+
+
+def read_through_metadata(db: Session, workspace_id: UUID, kind: str, load: Callable[[], List[dict]],
+                          version: Optional[int] = None) -> List[dict]:
+    # the version is taken before loading, so rows read after a concurrent change are stored as already stale
+    if version is None:
+        version = get_metadata_version(db, workspace_id)
+    if version is None:
+        return load()
+
+    items = get_cached_metadata(workspace_id, kind, version)
+    if items is not None:
+        return items
+
+    items = load()
+    metadata_entries.set(f"{workspace_id}:{kind}", {"version": version, "items": items})
+    return items
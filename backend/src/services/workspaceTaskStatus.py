@@ -1,9 +1,11 @@
+from typing import Optional
 from uuid import UUID
 
 from sqlalchemy.orm import Session
 
 from db.models import WorkspaceTaskStatus
-from schemas.workspaceTaskStatus import WorkspaceTaskStatusCreate
+from schemas.workspaceTaskStatus import WorkspaceTaskStatusCreate, WorkspaceTaskStatusResponse
+from services.workspaceMetadata import read_through_metadata, bump_metadata_versions_statement, STATUSES
 
 
 class WorkspaceTaskStatusService:
@@ -25,6 +27,7 @@ class WorkspaceTaskStatusService:
             workspaceId=task_status.workspaceId
         )
         self.db.add(new_status)
+        self.db.execute(bump_metadata_versions_statement([task_status.workspaceId]))
         self.db.commit()
         self.db.refresh(new_status)
 
@@ -33,5 +36,16 @@ class WorkspaceTaskStatusService:
     def get_task_status_by_id(self, task_status_id: UUID):
         return self.db.query(WorkspaceTaskStatus).filter(WorkspaceTaskStatus.id == task_status_id).first()
 
-    def get_workspace_task_statuses_by_workspace(self, workspace_id: UUID):
-        return self.db.query(WorkspaceTaskStatus).filter(WorkspaceTaskStatus.workspaceId == workspace_id).all()
+    def get_workspace_task_statuses_by_workspace(self, workspace_id: UUID, version: Optional[int] = None):
+        return read_through_metadata(self.db, workspace_id, STATUSES,
+                                     lambda: self.load_task_statuses(workspace_id), version)
+
+    def load_task_statuses(self, workspace_id: UUID):
+        # ids are time ordered, so this is the order the statuses were created in
+        statuses = (
+            self.db.query(WorkspaceTaskStatus)
+            .filter(WorkspaceTaskStatus.workspaceId == workspace_id)
+            .order_by(WorkspaceTaskStatus.id)
+            .all()
+        )
+        return [WorkspaceTaskStatusResponse.model_validate(status).model_dump(mode="json") for status in statuses]
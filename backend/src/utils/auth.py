@@ -1,6 +1,9 @@
+import asyncio
 import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from datetime import timedelta, datetime, timezone
-from typing import Optional
+from typing import Optional, Tuple
 from uuid import UUID
 
 from dotenv import load_dotenv
@@ -13,16 +16,35 @@ from sqlalchemy.orm import Session
 
 from db.db import get_db
 from db.models import User
+from schemas.user import UserResponse
+from utils.cache import create_cache
 
 load_dotenv()
 
 security = HTTPBearer()
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+
+# bcrypt work factor; hashes made with another cost are rehashed on the next successful login
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=BCRYPT_ROUNDS)
+
+# bcrypt releases the GIL, so a small dedicated thread pool runs hashes in parallel off the event loop
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", str(os.cpu_count() or 1)))
+# hashes running or waiting for a worker before new ones are rejected with 503
+PASSWORD_HASH_MAX_PENDING = int(os.getenv("PASSWORD_HASH_MAX_PENDING", str(PASSWORD_HASH_WORKERS * 8)))
 
 ACCESS_TOKEN_EXPIRE_MINUTES = 300
 ALGORITHM = "HS256"
 SECRET_KEY = os.getenv("SECRET_KEY")
 
+# Verified principals (the user row as UserResponse) by user id, so authentication doesn't query the
+# user on every request. Entries never outlive the token that loaded them.
+PRINCIPAL_CACHE_TTL = float(os.getenv("PRINCIPAL_CACHE_TTL", "300"))
+principals = create_cache(
+    "principal",
+    maxsize=int(os.getenv("PRINCIPAL_CACHE_SIZE", "10000")),
+    ttl=PRINCIPAL_CACHE_TTL,
+)
+
 
 def verify_password(plain_password, hashed_password):
     return pwd_context.verify(plain_password, hashed_password)
@@ -32,6 +54,39 @@ def get_password_hash(password):
     return pwd_context.hash(password)
 
 
+class PasswordHashPool:
+    def __init__(self, workers: int, max_pending: int):
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="password-hash")
+        self.max_pending = max_pending
+        self.pending = 0
+        self.lock = threading.Lock()
+
+    async def run(self, fn, *args):
+        with self.lock:
+            if self.pending >= self.max_pending:
+                raise HTTPException(status_code=503, detail="Server is busy, please try again",
+                                    headers={"Retry-After": "1"})
+            self.pending += 1
+
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self.executor, fn, *args)
+        finally:
+            with self.lock:
+                self.pending -= 1
+
+
+password_hash_pool = PasswordHashPool(PASSWORD_HASH_WORKERS, PASSWORD_HASH_MAX_PENDING)
+
+
+async def hash_password(password: str) -> str:
+    return await password_hash_pool.run(pwd_context.hash, password)
+
+
+# Returns whether the password matches and, if the stored hash uses an outdated cost, its replacement
+async def verify_and_update_password(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    return await password_hash_pool.run(pwd_context.verify_and_update, plain_password, hashed_password)
+
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     to_encode = data.copy()
     expire = datetime.now(timezone.utc) + (expires_delta or timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES))
@@ -47,17 +102,42 @@ def get_token_from_header(request: Request) -> str:
     return auth_header.split(" ")[1]
 
 
-def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security),
-                     db: Session = Depends(get_db)) -> User:
-    token = credentials.credentials
+def decode_access_token(token: str) -> dict:
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        user_id = UUID(payload.get("sub"))
+        payload["sub"] = UUID(payload.get("sub"))
     except (JWTError, ValueError, TypeError):
         raise HTTPException(status_code=401, detail="Invalid token")
 
+    return payload
+
+
+# For endpoints that only need the caller's id: verifies the token without touching the database
+def get_current_user_id(credentials: HTTPAuthorizationCredentials = Depends(security)) -> UUID:
+    return decode_access_token(credentials.credentials)["sub"]
+
+
+def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security),
+                     db: Session = Depends(get_db)) -> UserResponse:
+    payload = decode_access_token(credentials.credentials)
+    user_id = payload["sub"]
+
+    principal = principals.get(str(user_id))
+    if principal is not None:
+        return UserResponse.model_validate(principal)
+
     user = db.query(User).filter(User.id == user_id).first()
     if not user:
         raise HTTPException(status_code=401, detail="User not found")
 
-    return user
+    principal = UserResponse.model_validate(user)
+    ttl = min(PRINCIPAL_CACHE_TTL, payload["exp"] - datetime.now(timezone.utc).timestamp())
+    if ttl > 0:
+        principals.set(str(user_id), principal.model_dump(mode="json"), ttl=ttl)
+
+    return principal
+
+
+# Called whenever a user row changes or is deleted
+def evict_principal(user_id: UUID):
+    principals.delete(str(user_id))
@@ -0,0 +1,184 @@
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Optional
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+CACHE_BACKEND = os.getenv("CACHE_BACKEND", "memory")
+REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379/0")
+
+
+class CacheBackend:
+    """
+    Small key/value interface the application caches are written against, so the in-process LRU can be
+    swapped for a store shared by all workers. A missing or expired key reads as None.
+    Code running on the event loop uses the async variants (aget, aset, ...), which never block it.
+    """
+
+    def get(self, key: str) -> Any:
+        raise NotImplementedError
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None):
+        raise NotImplementedError
+
+    def delete(self, key: str):
+        raise NotImplementedError
+
+    def incr(self, key: str, delta: int) -> Optional[int]:
+        """Adds delta to an existing integer entry and returns the new value; missing keys stay missing."""
+        raise NotImplementedError
+
+    def clear(self):
+        raise NotImplementedError
+
+    # in-process backends answer without I/O, so the async variants just call the sync ones
+    async def aget(self, key: str) -> Any:
+        return self.get(key)
+
+    async def aset(self, key: str, value: Any, ttl: Optional[float] = None):
+        self.set(key, value, ttl)
+
+    async def adelete(self, key: str):
+        self.delete(key)
+
+    async def aincr(self, key: str, delta: int) -> Optional[int]:
+        return self.incr(key, delta)
+
+
+class LRUCache(CacheBackend):
+    def __init__(self, maxsize: int = 10000, ttl: Optional[float] = None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.entries: OrderedDict[str, tuple[Any, Optional[float]]] = OrderedDict()
+        # used from the event loop and from the threadpool that runs sync endpoints
+        self.lock = threading.Lock()
+
+    def get(self, key: str) -> Any:
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return None
+            value, expires_at = entry
+            if expires_at is not None and expires_at <= time.monotonic():
+                del self.entries[key]
+                return None
+            self.entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None):
+        ttl = ttl if ttl is not None else self.ttl
+        expires_at = time.monotonic() + ttl if ttl is not None else None
+        with self.lock:
+            self.entries[key] = (value, expires_at)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.maxsize:
+                self.entries.popitem(last=False)
+
+    def delete(self, key: str):
+        with self.lock:
+            self.entries.pop(key, None)
+
+    def incr(self, key: str, delta: int) -> Optional[int]:
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return None
+            value, expires_at = entry
+            if expires_at is not None and expires_at <= time.monotonic():
+                del self.entries[key]
+                return None
+            value = max(value + delta, 0)
+            self.entries[key] = (value, expires_at)
+            self.entries.move_to_end(key)
+            return value
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+    def __len__(self):
+        return len(self.entries)
+
+
+# INCRBY only when the key exists, so a missing counter is recomputed instead of starting at delta
+_REDIS_INCR_IF_EXISTS = """
+if redis.call('exists', KEYS[1]) == 1 then
+    local value = redis.call('incrby', KEYS[1], ARGV[1])
+    if value < 0 then
+        redis.call('set', KEYS[1], 0, 'keepttl')
+        value = 0
+    end
+    return value
+end
+return nil
+"""
+
+
+class RedisCache(CacheBackend):
+    """
+    Cache shared by every worker; values are stored as JSON. Needs the optional `redis` package.
+    The sync methods are for sync endpoints (run in the threadpool), the async ones use redis.asyncio.
+    """
+
+    def __init__(self, url: str, prefix: str, ttl: Optional[float] = None):
+        try:
+            import redis
+            import redis.asyncio
+        except ImportError as e:
+            raise RuntimeError("CACHE_BACKEND=redis requires the 'redis' package (pip install redis)") from e
+
+        self.client = redis.Redis.from_url(url)
+        self.async_client = redis.asyncio.Redis.from_url(url)
+        self.prefix = prefix
+        self.ttl = ttl
+        self.incr_if_exists = self.client.register_script(_REDIS_INCR_IF_EXISTS)
+        self.async_incr_if_exists = self.async_client.register_script(_REDIS_INCR_IF_EXISTS)
+
+    def key(self, key: str) -> str:
+        return f"{self.prefix}:{key}"
+
+    def expiry_ms(self, ttl: Optional[float]) -> Optional[int]:
+        ttl = ttl if ttl is not None else self.ttl
+        return int(ttl * 1000) if ttl is not None else None
+
+    def get(self, key: str) -> Any:
+        raw = self.client.get(self.key(key))
+        return json.loads(raw) if raw is not None else None
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None):
+        self.client.set(self.key(key), json.dumps(value), px=self.expiry_ms(ttl))
+
+    def delete(self, key: str):
+        self.client.delete(self.key(key))
+
+    def incr(self, key: str, delta: int) -> Optional[int]:
+        return self.incr_if_exists(keys=[self.key(key)], args=[delta])
+
+    def clear(self):
+        for key in self.client.scan_iter(f"{self.prefix}:*"):
+            self.client.delete(key)
+
+    async def aget(self, key: str) -> Any:
+        raw = await self.async_client.get(self.key(key))
+        return json.loads(raw) if raw is not None else None
+
+    async def aset(self, key: str, value: Any, ttl: Optional[float] = None):
+        await self.async_client.set(self.key(key), json.dumps(value), px=self.expiry_ms(ttl))
+
+    async def adelete(self, key: str):
+        await self.async_client.delete(self.key(key))
+
+    async def aincr(self, key: str, delta: int) -> Optional[int]:
+        return await self.async_incr_if_exists(keys=[self.key(key)], args=[delta])
+
+
+def create_cache(name: str, maxsize: int, ttl: Optional[float] = None) -> CacheBackend:
+    """Creates the cache named `name` on the backend selected by CACHE_BACKEND (memory or redis)."""
+    if CACHE_BACKEND == "redis":
+        return RedisCache(REDIS_URL, prefix=name, ttl=ttl)
+    return LRUCache(maxsize=maxsize, ttl=ttl)
@@ -0,0 +1,37 @@
+import hashlib
+
+from fastapi import Request, Response
+
+
+def etag_headers(etag: str) -> dict:
+    # clients may keep the response but must revalidate it on every use
+    return {"ETag": etag, "Cache-Control": "private, no-cache"}
+
+
+def version_etag(kind: str, version) -> str:
+    return f'"{kind}-{version}"'
+
+
+def digest_etag(kind: str, values) -> str:
+    """ETag of a response that depends on several rows, from the (id, version) pairs of those rows."""
+    digest = hashlib.sha1(";".join(f"{key}:{value}" for key, value in values).encode()).hexdigest()
+    return f'"{kind}-{digest}"'
+
+
+def _opaque(tag: str) -> str:
+    # If-None-Match uses the weak comparison
+    tag = tag.strip()
+    return tag[2:] if tag.startswith("W/") else tag
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    header = request.headers.get("If-None-Match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    return _opaque(etag) in {_opaque(tag) for tag in header.split(",")}
+
+
+def not_modified(etag: str) -> Response:
+    return Response(status_code=304, headers=etag_headers(etag))
@@ -1,20 +1,56 @@
+from typing import Optional
 from uuid import UUID
 
-from fastapi import APIRouter, WebSocket, WebSocketDisconnect
+from fastapi import APIRouter, HTTPException, WebSocket, WebSocketDisconnect
 
-from .connection_manager import ConnectionManager
+from utils.auth import decode_access_token
+from .backplane import create_backplane
+from .connection_manager import ConnectionManager, POLICY_VIOLATION_CLOSE_CODE
 from .notifications import NotificationManager
+from .topics import handle_client_message
 
 router = APIRouter()
 manager = ConnectionManager()
-notification_manager = NotificationManager(manager)
+notification_manager = NotificationManager(manager, create_backplane())
 
 
 @router.websocket("/ws/{user_id}")
-async def websocket_endpoint(websocket: WebSocket, user_id: UUID):
-    await manager.connect(websocket, user_id)
+async def websocket_endpoint(websocket: WebSocket, user_id: UUID, token: Optional[str] = None,
+                             since: Optional[str] = None):
+    # browsers can't set headers on a websocket, so the access token comes as a query parameter;
+    # the socket is refused before the handshake unless it was issued to the user of the path
+    try:
+        subject = decode_access_token(token)["sub"] if token else None
+    except HTTPException:
+        subject = None
+    if subject is None or subject != user_id:
+        await websocket.close(code=POLICY_VIOLATION_CLOSE_CODE)
+        return
+
+    connection = await manager.connect(websocket, subject)
+    if connection is None:
+        return
+    notification_manager.connected(connection)
+
+    # reconnect: replay only the notifications sent since the client's last one
+    if since:
+        notification_manager.replay(connection, since)
+
     try:
         while True:
-            await websocket.receive_text()
-    except WebSocketDisconnect:
-        manager.disconnect(user_id)
+            # pongs and any other client message keep the connection from being reaped
+            text = await websocket.receive_text()
+            connection.touch()
+            await handle_client_message(manager, connection, text)
+    except (WebSocketDisconnect, RuntimeError):
+        # RuntimeError: the server side already closed this socket
+        pass
+    finally:
+        manager.disconnect(connection)
+        notification_manager.disconnected(connection)
+
+
+# Gauges of this worker's websocket connections
+@router.get("/ws/stats")
+def websocket_stats():
+    return manager.stats()
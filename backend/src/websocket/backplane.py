@@ -0,0 +1,155 @@
+import asyncio
+import json
+import logging
+import os
+from typing import Any, Awaitable, Callable, List, Optional, Set
+from uuid import UUID
+
+logger = logging.getLogger(__name__)
+
+# Called with the recipients and the message once a published message reaches this worker
+Deliver = Callable[[List[UUID], Any], Awaitable[None]]
+# Called with the topic and the message once a message published to a topic reaches this worker
+DeliverTopic = Callable[[str, Any], Awaitable[None]]
+
+
+class Backplane:
+    """
+    Carries websocket messages between workers. Every worker publishes the messages it produces and
+    delivers the messages it receives to the sockets connected to it.
+    """
+
+    def __init__(self):
+        self.deliver: Optional[Deliver] = None
+        self.deliver_topic: Optional[DeliverTopic] = None
+
+    async def start(self, deliver: Deliver, deliver_topic: Optional[DeliverTopic] = None):
+        self.deliver = deliver
+        self.deliver_topic = deliver_topic
+
+    async def stop(self):
+        pass
+
+    async def publish(self, user_ids: List[UUID], data: Any):
+        raise NotImplementedError
+
+    async def publish_topic(self, topic: str, data: Any):
+        raise NotImplementedError
+
+
+class InMemoryBackplane(Backplane):
+    """Single worker: a published message is delivered straight to the local sockets."""
+
+    async def publish(self, user_ids: List[UUID], data: Any):
+        if self.deliver:
+            await self.deliver(user_ids, data)
+
+    async def publish_topic(self, topic: str, data: Any):
+        if self.deliver_topic:
+            await self.deliver_topic(topic, data)
+
+
+class PostgresBackplane(Backplane):
+    """
+    Fans messages out to every worker through Postgres LISTEN/NOTIFY. Each worker keeps one listening
+    connection; recipients are split over several NOTIFYs when a message would exceed the payload limit.
+    Topic messages carry no recipients, so callers keep them below the limit.
+    """
+
+    # Postgres rejects NOTIFY payloads of 8000 bytes or more
+    MAX_PAYLOAD_BYTES = 7900
+    RECONNECT_DELAY_SECONDS = 1
+
+    def __init__(self, dsn: str, channel: str = "insync_ws"):
+        super().__init__()
+        self.dsn = dsn
+        self.channel = channel
+        self.listen_connection = None
+        self.publish_pool = None
+        self.reconnect_task: Optional[asyncio.Task] = None
+        # deliveries in flight; the event loop only keeps weak references to tasks
+        self.delivery_tasks: Set[asyncio.Task] = set()
+        self.stopping = False
+
+    async def start(self, deliver: Deliver, deliver_topic: Optional[DeliverTopic] = None):
+        import asyncpg
+
+        await super().start(deliver, deliver_topic)
+        self.publish_pool = await asyncpg.create_pool(self.dsn, min_size=1, max_size=2)
+        await self.listen()
+
+    async def listen(self):
+        import asyncpg
+
+        self.listen_connection = await asyncpg.connect(self.dsn)
+        self.listen_connection.add_termination_listener(self.on_connection_lost)
+        await self.listen_connection.add_listener(self.channel, self.on_notification)
+
+    def on_connection_lost(self, connection):
+        if not self.stopping and (self.reconnect_task is None or self.reconnect_task.done()):
+            self.reconnect_task = asyncio.create_task(self.reconnect())
+
+    async def reconnect(self):
+        while not self.stopping:
+            try:
+                await self.listen()
+                return
+            except Exception:
+                logger.exception("Backplane listen connection failed, retrying")
+                await asyncio.sleep(self.RECONNECT_DELAY_SECONDS)
+
+    async def stop(self):
+        self.stopping = True
+        if self.reconnect_task:
+            self.reconnect_task.cancel()
+        for task in list(self.delivery_tasks):
+            task.cancel()
+        if self.listen_connection:
+            await self.listen_connection.close()
+        if self.publish_pool:
+            await self.publish_pool.close()
+
+    def on_notification(self, connection, pid, channel, payload: str):
+        message = json.loads(payload)
+        if "t" in message:
+            if self.deliver_topic:
+                self.spawn_delivery(self.deliver_topic(message["t"], message["d"]))
+            return
+        user_ids = [UUID(user_id) for user_id in message["u"]]
+        self.spawn_delivery(self.deliver(user_ids, message["d"]))
+
+    def spawn_delivery(self, delivery: Awaitable[None]):
+        task = asyncio.create_task(delivery)
+        self.delivery_tasks.add(task)
+        task.add_done_callback(self.delivery_done)
+
+    def delivery_done(self, task: asyncio.Task):
+        self.delivery_tasks.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            logger.error("Backplane delivery failed", exc_info=task.exception())
+
+    async def publish(self, user_ids: List[UUID], data: Any):
+        data_json = json.dumps(data, default=str)
+        async with self.publish_pool.acquire() as connection:
+            for payload in self.payloads([str(user_id) for user_id in user_ids], data_json):
+                await connection.execute("SELECT pg_notify($1, $2)", self.channel, payload)
+
+    async def publish_topic(self, topic: str, data: Any):
+        payload = json.dumps({"t": topic, "d": data}, default=str)
+        async with self.publish_pool.acquire() as connection:
+            await connection.execute("SELECT pg_notify($1, $2)", self.channel, payload)
+
+    def payloads(self, user_ids: List[str], data_json: str):
+        # 40 bytes per quoted, comma separated user id in the recipients list
+        per_message = max((self.MAX_PAYLOAD_BYTES - len(data_json.encode()) - 16) // 40, 1)
+        for start in range(0, len(user_ids), per_message):
+            yield f'{{"u": {json.dumps(user_ids[start:start + per_message])}, "d": {data_json}}}'
+
+
+def create_backplane() -> Backplane:
+    """Backplane selected by WEBSOCKET_BACKPLANE: memory (single worker, default) or postgres."""
+    if os.getenv("WEBSOCKET_BACKPLANE", "memory") == "postgres":
+        from db.db import get_database_url
+
+        return PostgresBackplane(get_database_url().replace("postgresql+psycopg2://", "postgresql://", 1))
+    return InMemoryBackplane()
@@ -1,21 +1,231 @@
-from typing import Any
+import asyncio
+import json
+import logging
+import os
+import time
+from typing import Any, Optional
 from uuid import UUID
 
 from fastapi import WebSocket
 
+logger = logging.getLogger(__name__)
+
+# Messages waiting to be written to one socket before it counts as a slow consumer
+SEND_QUEUE_SIZE = int(os.getenv("WEBSOCKET_SEND_QUEUE_SIZE", "100"))
+# Seconds a single write may take before the client counts as half-dead
+SEND_TIMEOUT = float(os.getenv("WEBSOCKET_SEND_TIMEOUT", "10"))
+# What happens to a slow consumer whose queue is full: "disconnect" it or "drop" the new message
+SLOW_CONSUMER_POLICY = os.getenv("WEBSOCKET_SLOW_CONSUMER_POLICY", "disconnect")
+
+# Seconds between server pings; a client that sends nothing (pong or otherwise) for IDLE_TIMEOUT is reaped
+HEARTBEAT_INTERVAL = float(os.getenv("WEBSOCKET_HEARTBEAT_INTERVAL", "30"))
+IDLE_TIMEOUT = float(os.getenv("WEBSOCKET_IDLE_TIMEOUT", "90"))
+# Open sockets allowed per user (the oldest is closed to make room) and per worker (new ones are refused)
+MAX_CONNECTIONS_PER_USER = int(os.getenv("WEBSOCKET_MAX_CONNECTIONS_PER_USER", "10"))
+MAX_CONNECTIONS = int(os.getenv("WEBSOCKET_MAX_CONNECTIONS", "50000"))
+# Topics (e.g. workspace:<id>) one socket may be subscribed to at a time
+MAX_TOPICS_PER_CONNECTION = int(os.getenv("WEBSOCKET_MAX_TOPICS_PER_CONNECTION", "50"))
+
+# 1013 "Try Again Later": the client may reconnect and refetch what it missed
+SLOW_CONSUMER_CLOSE_CODE = 1013
+# 1001 "Going Away": reaped idle sockets and sessions replaced by newer ones
+GOING_AWAY_CLOSE_CODE = 1001
+# 1008 "Policy Violation": missing or invalid access token, or one issued to another user
+POLICY_VIOLATION_CLOSE_CODE = 1008
+
+PING_MESSAGE = json.dumps({"type": "ping"})
+
+# closes started from synchronous code; the event loop only keeps weak references to tasks
+closing_tasks: set[asyncio.Task] = set()
+
+
+def close_in_background(connection: "Connection", code: int):
+    task = asyncio.create_task(connection.close(code))
+    closing_tasks.add(task)
+    task.add_done_callback(closing_tasks.discard)
+
+
+class Connection:
+    """
+    One accepted socket with its bounded outbound queue. A writer task drains the queue, so producers
+    only enqueue and never wait for the client.
+    """
+
+    def __init__(self, websocket: WebSocket, user_id: UUID):
+        self.websocket = websocket
+        self.user_id = user_id
+        # (message, its size in UTF-8 bytes)
+        self.queue: asyncio.Queue[tuple[str, int]] = asyncio.Queue(maxsize=SEND_QUEUE_SIZE)
+        self.queued_bytes = 0
+        self.writer: Optional[asyncio.Task] = None
+        self.closed = False
+        self.connected_at = time.monotonic()
+        self.last_seen = self.connected_at
+        self.topics: set[str] = set()
+
+    # any message from the client (usually a pong) proves it is alive
+    def touch(self):
+        self.last_seen = time.monotonic()
+
+    def start(self):
+        self.writer = asyncio.create_task(self.drain())
+
+    async def drain(self):
+        try:
+            while True:
+                text, size = await self.queue.get()
+                self.queued_bytes -= size
+                await asyncio.wait_for(self.websocket.send_text(text), SEND_TIMEOUT)
+        except asyncio.CancelledError:
+            pass
+        except Exception:
+            # timed out or the client went away; the receive loop notices the closed socket
+            logger.info("Closing websocket of user %s after a failed write", self.user_id)
+            await self.close(SLOW_CONSUMER_CLOSE_CODE)
+
+    # `size` is the UTF-8 length of the text, for callers enqueueing the same message on many sockets
+    def enqueue(self, text: str, size: Optional[int] = None) -> bool:
+        if self.closed:
+            return False
+        if size is None:
+            size = len(text.encode())
+        try:
+            self.queue.put_nowait((text, size))
+        except asyncio.QueueFull:
+            if SLOW_CONSUMER_POLICY == "disconnect":
+                logger.info("Disconnecting slow websocket consumer %s", self.user_id)
+                close_in_background(self, SLOW_CONSUMER_CLOSE_CODE)
+            return False
+        self.queued_bytes += size
+        return True
+
+    async def close(self, code: int = 1000):
+        if self.closed:
+            return
+        self.closed = True
+        if self.writer and self.writer is not asyncio.current_task():
+            self.writer.cancel()
+        try:
+            await asyncio.wait_for(self.websocket.close(code=code), SEND_TIMEOUT)
+        except Exception:
+            pass
+
+    # stops writing; the socket itself is closed by close() or is already gone
+    def stop(self):
+        if self.writer:
+            self.writer.cancel()
+
 
 class ConnectionManager:
     def __init__(self):
-        self.active_connections: dict[UUID, WebSocket] = {}
+        # every user can have several sessions (tabs, devices)
+        self.active_connections: dict[UUID, set[Connection]] = {}
+        # subscribers of each topic on this worker
+        self.topic_connections: dict[str, set[Connection]] = {}
+        self.connection_count = 0
+        self.heartbeat: Optional[asyncio.Task] = None
+
+    async def start(self):
+        self.heartbeat = asyncio.create_task(self.run_heartbeat())
+
+    async def stop(self):
+        if self.heartbeat:
+            self.heartbeat.cancel()
+        for connections in list(self.active_connections.values()):
+            for connection in list(connections):
+                await connection.close(GOING_AWAY_CLOSE_CODE)
+                self.disconnect(connection)
+
+    async def connect(self, websocket: WebSocket, user_id: UUID) -> Optional[Connection]:
+        if self.connection_count >= MAX_CONNECTIONS:
+            # refused before the handshake completes
+            await websocket.close(code=SLOW_CONSUMER_CLOSE_CODE)
+            return None
 
-    async def connect(self, websocket: WebSocket, user_id: UUID):
         await websocket.accept()
-        self.active_connections[user_id] = websocket
+        connection = Connection(websocket, user_id)
+        connection.start()
+
+        connections = self.active_connections.setdefault(user_id, set())
+        connections.add(connection)
+        self.connection_count += 1
+
+        if len(connections) > MAX_CONNECTIONS_PER_USER:
+            oldest = min(connections, key=lambda c: c.connected_at)
+            self.disconnect(oldest)
+            await oldest.close(GOING_AWAY_CLOSE_CODE)
+
+        return connection
+
+    def disconnect(self, connection: Connection):
+        connection.stop()
+        for topic in list(connection.topics):
+            self.unsubscribe(connection, topic)
+        connections = self.active_connections.get(connection.user_id)
+        if connections is None or connection not in connections:
+            return
 
-    def disconnect(self, user_id: UUID):
-        self.active_connections.pop(user_id, None)
+        connections.discard(connection)
+        self.connection_count -= 1
+        if not connections:
+            del self.active_connections[connection.user_id]
+
+    def subscribe(self, connection: Connection, topic: str) -> bool:
+        if topic not in connection.topics and len(connection.topics) >= MAX_TOPICS_PER_CONNECTION:
+            return False
+        connection.topics.add(topic)
+        self.topic_connections.setdefault(topic, set()).add(connection)
+        return True
+
+    def unsubscribe(self, connection: Connection, topic: str):
+        connection.topics.discard(topic)
+        connections = self.topic_connections.get(topic)
+        if connections is None:
+            return
+        connections.discard(connection)
+        if not connections:
+            del self.topic_connections[topic]
+
+    # every session of the user, e.g. once the user lost access to what the topic carries
+    def unsubscribe_user(self, user_id: UUID, topic: str):
+        for connection in list(self.active_connections.get(user_id, ())):
+            self.unsubscribe(connection, topic)
+
+    # Enqueues an already serialized message on every subscriber of the topic; returns immediately
+    def send_topic_text(self, topic: str, text: str) -> int:
+        size = len(text.encode())
+        return sum(connection.enqueue(text, size) for connection in list(self.topic_connections.get(topic, ())))
+
+    # Enqueues an already serialized message on every session of the user; returns immediately
+    def send_text(self, user_id: UUID, text: str) -> bool:
+        sent = False
+        size = len(text.encode())
+        for connection in list(self.active_connections.get(user_id, ())):
+            sent = connection.enqueue(text, size) or sent
+        return sent
 
     async def send_json(self, user_id: UUID, data: Any):
-        ws = self.active_connections.get(user_id)
-        if ws:
-            await ws.send_json(data)
+        self.send_text(user_id, json.dumps(data))
+
+    async def run_heartbeat(self):
+        while True:
+            await asyncio.sleep(HEARTBEAT_INTERVAL)
+            now = time.monotonic()
+            for connections in list(self.active_connections.values()):
+                for connection in list(connections):
+                    if connection.closed or now - connection.last_seen > IDLE_TIMEOUT:
+                        # dead or silent socket: free its entry instead of waiting for WebSocketDisconnect
+                        self.disconnect(connection)
+                        close_in_background(connection, GOING_AWAY_CLOSE_CODE)
+                    else:
+                        connection.enqueue(PING_MESSAGE)
+
+    def stats(self) -> dict:
+        connections = [c for user_connections in self.active_connections.values() for c in user_connections]
+        return {
+            "activeSockets": len(connections),
+            "activeUsers": len(self.active_connections),
+            "activeTopics": len(self.topic_connections),
+            "queuedMessages": sum(c.queue.qsize() for c in connections),
+            "queuedBytes": sum(c.queued_bytes for c in connections),
+        }
@@ -1,15 +1,74 @@
 # app/notifications/notifications.py
-from datetime import datetime
-from typing import List, Set
+import asyncio
+import json
+from datetime import datetime, timezone
+from typing import Any, List, Optional, Set
 from uuid import UUID
 
 from db.models.Notification import EventTypeEnum
-from .connection_manager import ConnectionManager
+from .backplane import Backplane
+from .connection_manager import ConnectionManager, Connection
+from .replay import ReplayBuffer
+from .topics import workspace_topic
+
+# Topic messages above this size carry only the cursor; subscribers fetch the changes (NOTIFY payload limit)
+MAX_TOPIC_MESSAGE_BYTES = 7800
 
 
 class NotificationManager:
-    def __init__(self, manager: ConnectionManager):
+    def __init__(self, manager: ConnectionManager, backplane: Backplane):
         self.manager = manager
+        self.backplane = backplane
+        self.replay_buffer = ReplayBuffer()
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+
+    async def start(self):
+        self.loop = asyncio.get_running_loop()
+        await self.backplane.start(self.deliver, self.deliver_topic)
+
+    async def stop(self):
+        await self.backplane.stop()
+
+    # messages published by any worker end up here, only local sockets are written to
+    async def deliver(self, user_ids: List[UUID], data: Any):
+        # serialized once per event, then only enqueued on each recipient's connection
+        text = json.dumps(data)
+
+        # buffered for the users connected here (or recently), who may reconnect to this worker
+        if data.get("type") == "notification":
+            notified_at = datetime.fromisoformat(data["notifiedAt"])
+            if notified_at.tzinfo is None:
+                notified_at = notified_at.replace(tzinfo=timezone.utc)
+            self.replay_buffer.record(user_ids, data["id"], notified_at, text)
+
+        # access revoked on some worker: every worker drops the users' subscriptions
+        if data.get("type") == "unsubscribed":
+            for user_id in user_ids:
+                self.manager.unsubscribe_user(user_id, data["topic"])
+
+        for user_id in user_ids:
+            self.manager.send_text(user_id, text)
+
+    # topic messages published by any worker; encoded once and enqueued on every local subscriber
+    async def deliver_topic(self, topic: str, data: Any):
+        self.manager.send_topic_text(topic, json.dumps(data))
+
+    # the user's notifications are buffered for replay while they have a socket on this worker, and a while after
+    def connected(self, connection: Connection):
+        self.replay_buffer.connected(connection.user_id)
+
+    def disconnected(self, connection: Connection):
+        self.replay_buffer.disconnected(connection.user_id)
+
+    # sends a reconnecting socket what it missed since its last notification id or timestamp
+    def replay(self, connection: Connection, since: str):
+        missed = self.replay_buffer.since(connection.user_id, since)
+        if missed is None:
+            # gap is older than the buffer: the client refetches its unread notifications
+            connection.enqueue(json.dumps({"type": "resync"}))
+            return
+        for text in missed:
+            connection.enqueue(text)
 
     async def notify_task_event(
             self,
@@ -26,6 +85,7 @@ class NotificationManager:
             notified_at: datetime,
     ):
         payload = {
+            "type": "notification",
             "id": str(notification_id),
             "taskId": str(task_id),
             "taskName": task_name,
@@ -40,6 +100,33 @@ class NotificationManager:
 
         recipients: Set[UUID] = set(assignee_ids)
 
-        # Send JSON to each
-        for user_id in recipients:
-            await self.manager.send_json(user_id, payload)
+        # Send JSON to each, through whichever worker they are connected to
+        await self.backplane.publish(list(recipients), payload)
+
+    async def notify_workspace_tasks(self, workspace_id: UUID, event: str, cursor: int, tasks: List[dict]):
+        """
+        Tells the subscribers of the workspace about created, updated or deleted tasks. `cursor` is the
+        change feed position after the write: a subscriber whose last cursor is not cursor - 1 missed changes
+        and fetches them from GET /api/workspace/{id}/changes.
+        """
+        payload = {
+            "type": "tasks",
+            "event": event,
+            "workspaceId": str(workspace_id),
+            "cursor": cursor,
+            "tasks": tasks,
+        }
+        if len(json.dumps(payload, default=str)) > MAX_TOPIC_MESSAGE_BYTES:
+            payload = {**payload, "tasks": [], "truncated": True}
+        await self.backplane.publish_topic(workspace_topic(workspace_id), payload)
+
+    async def revoke_workspace(self, user_ids: List[UUID], workspace_id: UUID):
+        await self.backplane.publish(list(user_ids), {"type": "unsubscribed", "topic": workspace_topic(workspace_id)})
+
+    # for the sync services, which run on the threadpool
+    def revoke_workspace_threadsafe(self, user_ids: List[UUID], workspace_id: UUID):
+        if self.loop is not None and user_ids:
+            asyncio.run_coroutine_threadsafe(self.revoke_workspace(user_ids, workspace_id), self.loop)
+
+    async def notify_unread_count(self, user_id: UUID, count: int):
+        await self.backplane.publish([user_id], {"type": "unreadCount", "count": count})
@@ -0,0 +1,118 @@
+import os
+import threading
+import time
+from collections import OrderedDict, deque
+from datetime import datetime, timezone
+from typing import List, Optional
+from uuid import UUID
+
+# Recent notification events kept per user
+REPLAY_EVENTS_PER_USER = int(os.getenv("WEBSOCKET_REPLAY_EVENTS_PER_USER", "50"))
+# Seconds a user's buffer outlives their last socket on this worker, and how many such idle buffers are kept
+REPLAY_USER_TTL = float(os.getenv("WEBSOCKET_REPLAY_USER_TTL", "300"))
+REPLAY_MAX_USERS = int(os.getenv("WEBSOCKET_REPLAY_MAX_USERS", "20000"))
+
+
+class UserEvents:
+    def __init__(self, complete_since: datetime):
+        # (notification id, notifiedAt, serialized message), oldest first
+        self.events: deque[tuple[str, datetime, str]] = deque(maxlen=REPLAY_EVENTS_PER_USER)
+        # every event of the user since this moment is (or was) in the buffer
+        self.complete_since = complete_since
+        # sockets of the user open on this worker
+        self.connections = 0
+
+    def record(self, notification_id: str, notified_at: datetime, text: str):
+        if len(self.events) == self.events.maxlen:
+            # anything up to the event pushed out can't be replayed anymore
+            self.complete_since = max(self.complete_since, self.events[0][1])
+        self.events.append((notification_id, notified_at, text))
+
+
+class ReplayBuffer:
+    """
+    Bounded per-user ring buffers of recent notification events, so a reconnecting client can be sent
+    only what it missed instead of refetching every unread notification. Only users connected to this
+    worker, or disconnected from it less than REPLAY_USER_TTL ago, have a buffer; a client reconnecting
+    to another worker, or after that, resyncs in full.
+    """
+
+    def __init__(self):
+        self.users: dict[UUID, UserEvents] = {}
+        # users without a socket on this worker, by the time their last one closed, oldest first
+        self.idle: OrderedDict[UUID, float] = OrderedDict()
+        self.lock = threading.Lock()
+
+    def connected(self, user_id: UUID):
+        """A socket of the user was accepted: buffer their events from now on (if not already)."""
+        with self.lock:
+            user_events = self.users.get(user_id)
+            if user_events is None:
+                user_events = self.users[user_id] = UserEvents(datetime.now(timezone.utc))
+            user_events.connections += 1
+            self.idle.pop(user_id, None)
+
+    def disconnected(self, user_id: UUID):
+        """A socket of the user is gone; after the last one, the buffer is kept for REPLAY_USER_TTL."""
+        with self.lock:
+            user_events = self.users.get(user_id)
+            if user_events is None:
+                return
+            user_events.connections -= 1
+            if user_events.connections <= 0:
+                self.idle[user_id] = time.monotonic()
+            self.expire()
+
+    def expire(self):
+        # called with the lock held
+        expired_before = time.monotonic() - REPLAY_USER_TTL
+        while self.idle:
+            user_id, idle_since = next(iter(self.idle.items()))
+            if idle_since >= expired_before and len(self.idle) <= REPLAY_MAX_USERS:
+                break
+            self.idle.popitem(last=False)
+            del self.users[user_id]
+
+    def record(self, user_ids: List[UUID], notification_id: str, notified_at: datetime, text: str):
+        with self.lock:
+            self.expire()
+            for user_id in user_ids:
+                user_events = self.users.get(user_id)
+                if user_events is not None:
+                    user_events.record(notification_id, notified_at, text)
+
+    def since(self, user_id: UUID, since: str) -> Optional[List[str]]:
+        """
+        Messages after `since` (a notification id or an ISO timestamp), oldest first. None when the gap
+        can't be covered by the buffer and the client has to resync in full.
+        """
+        with self.lock:
+            self.expire()
+            user_events = self.users.get(user_id)
+            if user_events is None:
+                # not buffered on this worker
+                return None
+            events = list(user_events.events)
+            complete_since = user_events.complete_since
+
+        try:
+            since_id = str(UUID(since))
+        except ValueError:
+            since_id = None
+
+        if since_id is not None:
+            for index, (notification_id, _, _) in enumerate(events):
+                if notification_id == since_id:
+                    return [text for _, _, text in events[index + 1:]]
+            # unknown id: from before this buffer (or another worker's restart)
+            return None
+
+        try:
+            since_time = datetime.fromisoformat(since)
+        except ValueError:
+            return None
+        if since_time.tzinfo is None:
+            since_time = since_time.replace(tzinfo=timezone.utc)
+        if since_time < complete_since:
+            return None
+        return [text for _, notified_at, text in events if notified_at > since_time]
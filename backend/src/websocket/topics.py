@@ -0,0 +1,63 @@
+import json
+from uuid import UUID
+
+from sqlalchemy import select
+
+from db.db import AsyncSessionLocal
+from db.models import WorkspaceUser
+from .connection_manager import ConnectionManager, Connection
+
+WORKSPACE_TOPIC_PREFIX = "workspace:"
+
+
+def workspace_topic(workspace_id: UUID) -> str:
+    return f"{WORKSPACE_TOPIC_PREFIX}{workspace_id}"
+
+
+async def is_workspace_member(user_id: UUID, workspace_id: UUID) -> bool:
+    async with AsyncSessionLocal() as db:
+        return await db.scalar(
+            select(
+                select(WorkspaceUser.userId)
+                .where(WorkspaceUser.workspaceId == workspace_id, WorkspaceUser.userId == user_id)
+                .exists()
+            )
+        )
+
+
+async def handle_client_message(manager: ConnectionManager, connection: Connection, text: str):
+    """
+    Handles {"type": "subscribe" | "unsubscribe", "topic": "workspace:<id>"}; anything else (pongs) only
+    keeps the connection alive.
+    """
+    try:
+        message = json.loads(text)
+    except ValueError:
+        return
+    if not isinstance(message, dict) or message.get("type") not in ("subscribe", "unsubscribe"):
+        return
+
+    # validated before either branch: topics are kept in sets, so an unhashable one would raise
+    topic = message.get("topic")
+    try:
+        if not isinstance(topic, str) or not topic.startswith(WORKSPACE_TOPIC_PREFIX):
+            raise ValueError
+        workspace_id = UUID(topic[len(WORKSPACE_TOPIC_PREFIX):])
+    except ValueError:
+        connection.enqueue(json.dumps({"type": "error", "topic": topic, "detail": "Unknown topic"}))
+        return
+    # the spelling broadcasts are published under (UUID accepts upper case, braces, no hyphens)
+    topic = workspace_topic(workspace_id)
+
+    if message["type"] == "unsubscribe":
+        manager.unsubscribe(connection, topic)
+        connection.enqueue(json.dumps({"type": "unsubscribed", "topic": topic}))
+        return
+
+    if not await is_workspace_member(connection.user_id, workspace_id):
+        connection.enqueue(json.dumps({"type": "error", "topic": topic, "detail": "Not a member of this workspace"}))
+        return
+    if not manager.subscribe(connection, topic):
+        connection.enqueue(json.dumps({"type": "error", "topic": topic, "detail": "Too many subscriptions"}))
+        return
+    connection.enqueue(json.dumps({"type": "subscribed", "topic": topic}))
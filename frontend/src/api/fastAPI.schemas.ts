@@ -20,26 +20,55 @@ export interface LoginRequest {
   password: string;
 }
 
+export type NotificationsReadUpdateIds = string[] | null;
+
+export type NotificationsReadUpdateBefore = string | null;
+
+export interface NotificationsReadUpdate {
+  ids?: NotificationsReadUpdateIds;
+  before?: NotificationsReadUpdateBefore;
+}
+
+export interface NotificationsReadResponse {
+  updated: number;
+}
+
+export type NotificationResponseTaskId = string | null;
+
+export type NotificationResponseTaskName = string | null;
+
+export type NotificationResponseWorkspaceId = string | null;
+
+export type NotificationResponseWorkspaceName = string | null;
+
+export type NotificationResponseCreatorId = string | null;
+
+export type NotificationResponseCreatorName = string | null;
+
 export interface NotificationResponse {
   id: string;
   message: string;
   eventType: SchemasNotificationsEventTypeEnum;
   createdAt: string;
-  taskId: string;
-  taskName: string;
-  workspaceId: string;
-  workspaceName: string;
-  creatorId: string;
-  creatorName: string;
+  taskId?: NotificationResponseTaskId;
+  taskName?: NotificationResponseTaskName;
+  workspaceId?: NotificationResponseWorkspaceId;
+  workspaceName?: NotificationResponseWorkspaceName;
+  creatorId?: NotificationResponseCreatorId;
+  creatorName?: NotificationResponseCreatorName;
   isRead: boolean;
   notifiedAt: string;
 }
 
+export type NotificationTaskResponseDescription = string | null;
+
+export type NotificationTaskResponseDueDate = string | null;
+
 export interface NotificationTaskResponse {
   id: string;
   title: string;
-  description: string;
-  dueDate: string;
+  description: NotificationTaskResponseDescription;
+  dueDate: NotificationTaskResponseDueDate;
   workspace: WorkspaceResponse;
   status: WorkspaceStatusResponse;
 }
@@ -85,6 +114,13 @@ export interface TaskResponse {
   assignees: UserResponse[];
 }
 
+export interface TaskChangesResponse {
+  cursor: number;
+  reset: boolean;
+  tasks: TaskResponse[];
+  deleted: string[];
+}
+
 export type TaskUpdateTitle = string | null;
 
 export type TaskUpdateDescription = string | null;
@@ -214,3 +250,49 @@ export type DeleteWorkspaceApiWorkspaceDeleteParams = {
 workspace_id: string;
 };
 
+export type GetTasksByWorkspaceApiWorkspaceWorkspaceIdTasksGetParams = {
+/**
+ * Id of the last task of the previous page
+ */
+after?: string | null;
+limit?: number;
+statusId?: string | null;
+assigneeId?: string | null;
+dueFrom?: string | null;
+dueTo?: string | null;
+/**
+ * Text to look for in the title or description
+ */
+q?: string | null;
+};
+
+export type SearchTasksApiTaskSearchGetParams = {
+/**
+ * Words, "phrases" or -excluded words
+ * @minLength 1
+ * @maxLength 200
+ */
+q: string;
+/**
+ * Only search this workspace
+ */
+workspaceId?: string | null;
+/**
+ * @minimum 0
+ * @maximum 10000
+ */
+offset?: number;
+/**
+ * @minimum 1
+ * @maximum 100
+ */
+limit?: number;
+};
+
+export type GetTaskChangesApiWorkspaceWorkspaceIdChangesGetParams = {
+/**
+ * Cursor of the previous response; omit to get the current one
+ */
+since?: number | null;
+};
+
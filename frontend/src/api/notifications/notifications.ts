@@ -5,7 +5,9 @@
  * OpenAPI spec version: 0.1.0
  */
 import type {
-  NotificationResponse
+  NotificationResponse,
+  NotificationsReadResponse,
+  NotificationsReadUpdate
 } from '../fastAPI.schemas';
 
 import { customInstance } from '../../utils/customAxios';
@@ -27,6 +29,19 @@ const listUnreadNotificationsApiNotificationsUnreadGet = (
       options);
     }
   /**
+ * @summary Mark Notifications Read
+ */
+const markNotificationsReadApiNotificationsReadPatch = (
+    notificationsReadUpdate: NotificationsReadUpdate,
+ options?: SecondParameter<typeof customInstance>,) => {
+      return customInstance<NotificationsReadResponse>(
+      {url: `/api/notifications/read`, method: 'PATCH',
+      headers: {'Content-Type': 'application/json', },
+      data: notificationsReadUpdate
+    },
+      options);
+    }
+  /**
  * @summary Mark Notification Read
  */
 const markNotificationReadApiNotificationsNotificationIdReadPatch = (
@@ -48,7 +63,8 @@ const countUnreadNotificationsApiNotificationsUnreadCountGet = (
     },
       options);
     }
-  return {listUnreadNotificationsApiNotificationsUnreadGet,markNotificationReadApiNotificationsNotificationIdReadPatch,countUnreadNotificationsApiNotificationsUnreadCountGet}};
+  return {listUnreadNotificationsApiNotificationsUnreadGet,markNotificationsReadApiNotificationsReadPatch,markNotificationReadApiNotificationsNotificationIdReadPatch,countUnreadNotificationsApiNotificationsUnreadCountGet}};
 export type ListUnreadNotificationsApiNotificationsUnreadGetResult = NonNullable<Awaited<ReturnType<ReturnType<typeof getNotifications>['listUnreadNotificationsApiNotificationsUnreadGet']>>>
+export type MarkNotificationsReadApiNotificationsReadPatchResult = NonNullable<Awaited<ReturnType<ReturnType<typeof getNotifications>['markNotificationsReadApiNotificationsReadPatch']>>>
 export type MarkNotificationReadApiNotificationsNotificationIdReadPatchResult = NonNullable<Awaited<ReturnType<ReturnType<typeof getNotifications>['markNotificationReadApiNotificationsNotificationIdReadPatch']>>>
 export type CountUnreadNotificationsApiNotificationsUnreadCountGetResult = NonNullable<Awaited<ReturnType<ReturnType<typeof getNotifications>['countUnreadNotificationsApiNotificationsUnreadCountGet']>>>
@@ -5,6 +5,7 @@
  * OpenAPI spec version: 0.1.0
  */
 import type {
+  SearchTasksApiTaskSearchGetParams,
   TaskCreate,
   TaskCreateResponse,
   TaskResponse,
@@ -47,6 +48,18 @@ const updateTaskApiTaskTaskIdPut = (
       options);
     }
   /**
+ * @summary Search Tasks
+ */
+const searchTasksApiTaskSearchGet = (
+    params: SearchTasksApiTaskSearchGetParams,
+ options?: SecondParameter<typeof customInstance>,) => {
+      return customInstance<TaskResponse[]>(
+      {url: `/api/task/search`, method: 'GET',
+        params
+    },
+      options);
+    }
+  /**
  * @summary Get Task
  */
 const getTaskApiTaskTaskIdGet = (
@@ -79,9 +92,10 @@ const getTaskStatusApiTaskTaskIdStatusGet = (
     },
       options);
     }
-  return {createTaskApiTaskPost,updateTaskApiTaskTaskIdPut,getTaskApiTaskTaskIdGet,deleteTaskApiTaskTaskIdDelete,getTaskStatusApiTaskTaskIdStatusGet}};
+  return {createTaskApiTaskPost,updateTaskApiTaskTaskIdPut,searchTasksApiTaskSearchGet,getTaskApiTaskTaskIdGet,deleteTaskApiTaskTaskIdDelete,getTaskStatusApiTaskTaskIdStatusGet}};
 export type CreateTaskApiTaskPostResult = NonNullable<Awaited<ReturnType<ReturnType<typeof getTask>['createTaskApiTaskPost']>>>
 export type UpdateTaskApiTaskTaskIdPutResult = NonNullable<Awaited<ReturnType<ReturnType<typeof getTask>['updateTaskApiTaskTaskIdPut']>>>
+export type SearchTasksApiTaskSearchGetResult = NonNullable<Awaited<ReturnType<ReturnType<typeof getTask>['searchTasksApiTaskSearchGet']>>>
 export type GetTaskApiTaskTaskIdGetResult = NonNullable<Awaited<ReturnType<ReturnType<typeof getTask>['getTaskApiTaskTaskIdGet']>>>
 export type DeleteTaskApiTaskTaskIdDeleteResult = NonNullable<Awaited<ReturnType<ReturnType<typeof getTask>['deleteTaskApiTaskTaskIdDelete']>>>
 export type GetTaskStatusApiTaskTaskIdStatusGetResult = NonNullable<Awaited<ReturnType<ReturnType<typeof getTask>['getTaskStatusApiTaskTaskIdStatusGet']>>>
@@ -6,6 +6,9 @@
  */
 import type {
   DeleteWorkspaceApiWorkspaceDeleteParams,
+  GetTaskChangesApiWorkspaceWorkspaceIdChangesGetParams,
+  GetTasksByWorkspaceApiWorkspaceWorkspaceIdTasksGetParams,
+  TaskChangesResponse,
   TaskResponse,
   UserResponse,
   WorkspaceCreate,
@@ -120,13 +123,28 @@ const getWorkspaceMembersApiWorkspaceWorkspaceIdMembersGet = (
  */
 const getTasksByWorkspaceApiWorkspaceWorkspaceIdTasksGet = (
     workspaceId: string,
+    params?: GetTasksByWorkspaceApiWorkspaceWorkspaceIdTasksGetParams,
  options?: SecondParameter<typeof customInstance>,) => {
       return customInstance<TaskResponse[]>(
-      {url: `/api/workspace/${workspaceId}/tasks`, method: 'GET'
+      {url: `/api/workspace/${workspaceId}/tasks`, method: 'GET',
+        params
+    },
+      options);
+    }
+  /**
+ * @summary Get Task Changes
+ */
+const getTaskChangesApiWorkspaceWorkspaceIdChangesGet = (
+    workspaceId: string,
+    params?: GetTaskChangesApiWorkspaceWorkspaceIdChangesGetParams,
+ options?: SecondParameter<typeof customInstance>,) => {
+      return customInstance<TaskChangesResponse>(
+      {url: `/api/workspace/${workspaceId}/changes`, method: 'GET',
+        params
     },
       options);
     }
-  return {createWorkspaceApiWorkspacePost,deleteWorkspaceApiWorkspaceDelete,addWorkspaceMembersApiWorkspaceMembersPost,deleteWorkspaceMemberApiWorkspaceWorkspaceIdMemberMemberIdDelete,getWorkspacesByUserApiWorkspaceAllGet,getWorkspaceByIdApiWorkspaceWorkspaceIdGet,getWorkspaceStatusesApiWorkspaceWorkspaceIdStatusesGet,getWorkspaceMembersApiWorkspaceWorkspaceIdMembersGet,getTasksByWorkspaceApiWorkspaceWorkspaceIdTasksGet}};
+  return {createWorkspaceApiWorkspacePost,deleteWorkspaceApiWorkspaceDelete,addWorkspaceMembersApiWorkspaceMembersPost,deleteWorkspaceMemberApiWorkspaceWorkspaceIdMemberMemberIdDelete,getWorkspacesByUserApiWorkspaceAllGet,getWorkspaceByIdApiWorkspaceWorkspaceIdGet,getWorkspaceStatusesApiWorkspaceWorkspaceIdStatusesGet,getWorkspaceMembersApiWorkspaceWorkspaceIdMembersGet,getTasksByWorkspaceApiWorkspaceWorkspaceIdTasksGet,getTaskChangesApiWorkspaceWorkspaceIdChangesGet}};
 export type CreateWorkspaceApiWorkspacePostResult = NonNullable<Awaited<ReturnType<ReturnType<typeof getWorkspace>['createWorkspaceApiWorkspacePost']>>>
 export type DeleteWorkspaceApiWorkspaceDeleteResult = NonNullable<Awaited<ReturnType<ReturnType<typeof getWorkspace>['deleteWorkspaceApiWorkspaceDelete']>>>
 export type AddWorkspaceMembersApiWorkspaceMembersPostResult = NonNullable<Awaited<ReturnType<ReturnType<typeof getWorkspace>['addWorkspaceMembersApiWorkspaceMembersPost']>>>
@@ -136,3 +154,4 @@ export type GetWorkspaceByIdApiWorkspaceWorkspaceIdGetResult = NonNullable<Await
 export type GetWorkspaceStatusesApiWorkspaceWorkspaceIdStatusesGetResult = NonNullable<Awaited<ReturnType<ReturnType<typeof getWorkspace>['getWorkspaceStatusesApiWorkspaceWorkspaceIdStatusesGet']>>>
 export type GetWorkspaceMembersApiWorkspaceWorkspaceIdMembersGetResult = NonNullable<Awaited<ReturnType<ReturnType<typeof getWorkspace>['getWorkspaceMembersApiWorkspaceWorkspaceIdMembersGet']>>>
 export type GetTasksByWorkspaceApiWorkspaceWorkspaceIdTasksGetResult = NonNullable<Awaited<ReturnType<ReturnType<typeof getWorkspace>['getTasksByWorkspaceApiWorkspaceWorkspaceIdTasksGet']>>>
+export type GetTaskChangesApiWorkspaceWorkspaceIdChangesGetResult = NonNullable<Awaited<ReturnType<ReturnType<typeof getWorkspace>['getTaskChangesApiWorkspaceWorkspaceIdChangesGet']>>>
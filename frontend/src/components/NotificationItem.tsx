@@ -17,8 +17,8 @@ export const NotificationItem = ({ notification }: NotificationItemProps) => {
     mutationFn: (notificationId: string) =>
       markNotificationReadApiNotificationsNotificationIdReadPatch(notificationId),
     onSuccess: () => {
+      // the new unread count is pushed over the websocket
       queryClient.invalidateQueries({ queryKey: ['notifications'] });
-      queryClient.invalidateQueries({ queryKey: ['notificationsCount'] });
     }
   });
 
@@ -26,7 +26,9 @@ export const NotificationItem = ({ notification }: NotificationItemProps) => {
     try {
       //await to invalidate queries before navigation
       await markReadMutation.mutateAsync(notification.id);
-      navigate(`/workspaces/${notification.workspaceId}`);
+      if (notification.workspaceId) {
+        navigate(`/workspaces/${notification.workspaceId}`);
+      }
     } catch {
       console.error('Failed to mark read before navigation');
     }
@@ -69,14 +71,16 @@ export const NotificationItem = ({ notification }: NotificationItemProps) => {
                   </Typography>
                 ))}
               </Box>
-              <Typography variant="caption" color="textSecondary">
-                by{' '}
-                {notification.creatorName
-                  .split(' ')
-                  .map((n) => n[0])
-                  .join('')
-                  .toUpperCase()}
-              </Typography>
+              {notification.creatorName && (
+                <Typography variant="caption" color="textSecondary">
+                  by{' '}
+                  {notification.creatorName
+                    .split(' ')
+                    .map((n) => n[0])
+                    .join('')
+                    .toUpperCase()}
+                </Typography>
+              )}
             </CardContent>
             {!notification.isRead && (
               <Button
@@ -1,11 +1,13 @@
-import { useQuery } from '@tanstack/react-query';
+import { useMutation, useQuery, useQueryClient } from '@tanstack/react-query';
 import type { NotificationResponse } from '../api/fastAPI.schemas';
 import { getNotifications } from '../api/notifications/notifications';
-import { Box, CircularProgress, Alert, List, Paper, Typography } from '@mui/material';
+import { Box, Button, CircularProgress, Alert, List, Paper, Typography } from '@mui/material';
 import { NotificationItem } from './NotificationItem';
 
 export function NotificationsList() {
-  const { listUnreadNotificationsApiNotificationsUnreadGet } = getNotifications();
+  const queryClient = useQueryClient();
+  const { listUnreadNotificationsApiNotificationsUnreadGet, markNotificationsReadApiNotificationsReadPatch } =
+    getNotifications();
 
   //to get all previous unread notifications
   const {
@@ -17,6 +19,21 @@ export function NotificationsList() {
     queryFn: () => listUnreadNotificationsApiNotificationsUnreadGet()
   });
 
+  //one request for the whole list; notifications that arrive meanwhile stay unread
+  const markAllReadMutation = useMutation({
+    mutationFn: () =>
+      markNotificationsReadApiNotificationsReadPatch({
+        before: notifications.reduce<string | null>(
+          (latest, n) => (latest === null || n.notifiedAt > latest ? n.notifiedAt : latest),
+          null
+        )
+      }),
+    onSuccess: () => {
+      // the new unread count is pushed over the websocket
+      queryClient.invalidateQueries({ queryKey: ['notifications'] });
+    }
+  });
+
   if (isLoading) {
     return (
       <Box display="flex" justifyContent="center" my={4}>
@@ -34,9 +51,20 @@ export function NotificationsList() {
 
   return (
     <Paper sx={{ p: 3, mt: 2 }}>
-      <Typography variant="h6" gutterBottom>
-        Notifications
-      </Typography>
+      <Box display="flex" justifyContent="space-between" alignItems="center">
+        <Typography variant="h6" gutterBottom>
+          Notifications
+        </Typography>
+        {notifications.length > 0 && (
+          <Button
+            size="small"
+            onClick={() => markAllReadMutation.mutate()}
+            disabled={markAllReadMutation.isPending}
+          >
+            Mark all as read
+          </Button>
+        )}
+      </Box>
 
       {notifications.length === 0 ? (
         <Typography variant="body2" color="textSecondary">
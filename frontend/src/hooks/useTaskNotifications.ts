@@ -1,25 +1,48 @@
-import { useEffect, useMemo, useState } from 'react';
+import { useCallback, useMemo, useRef } from 'react';
 import type { NotificationResponse } from '../api/fastAPI.schemas';
 import { useWebSocket } from './useWebSocket';
+import { getAccessToken } from '../utils/auth';
 
-export function useTaskNotifications(userId: string | null) {
+interface TaskNotificationHandlers {
+    onNotification: (notification: NotificationResponse) => void;
+    // server pushes the maintained unread counter, so the count endpoint doesn't need polling
+    onUnreadCount: (count: number) => void;
+    // the server couldn't replay everything missed while disconnected: refetch in full
+    onResync: () => void;
+}
+
+export function useTaskNotifications(userId: string | null, handlers: TaskNotificationHandlers) {
 
     const socketUrl = useMemo(() => {
         if (!userId) return null;
         const wsProto = window.location.protocol === 'https:' ? 'wss:' : 'ws:';
-        return `${wsProto}//${import.meta.env.VITE_API_URL}/ws/${userId}`;
+        const token = encodeURIComponent(getAccessToken() ?? '');
+        return `${wsProto}//${import.meta.env.VITE_API_URL}/ws/${userId}?token=${token}`;
     }, [userId]);
 
-    const { lastMessage } = useWebSocket(socketUrl)
-    const [notification, setNotification] = useState<NotificationResponse | null>(null);
-
-    useEffect(() => {
-        if (!lastMessage?.data) return;
+    // last notification received, sent on reconnect so only the gap is replayed
+    const lastNotificationId = useRef<string | null>(null);
 
+    const onMessage = useCallback((data: any) => {
+        if (data.type === 'unreadCount') {
+            handlers.onUnreadCount(data.count as number);
+        } else if (data.type === 'resync') {
+            handlers.onResync();
+        } else if (data.type === 'notification') {
+            lastNotificationId.current = data.id;
+            handlers.onNotification(data as NotificationResponse);
+        }
+    }, [handlers]);
 
-        const parsed = JSON.parse(lastMessage.data) as NotificationResponse;
-        setNotification(parsed);
-    }, [lastMessage]);
+    // the token is read again on reconnect, in case it was renewed meanwhile
+    const resumeUrl = useCallback((url: string) => {
+        const resumed = new URL(url);
+        resumed.searchParams.set('token', getAccessToken() ?? '');
+        if (lastNotificationId.current) {
+            resumed.searchParams.set('since', lastNotificationId.current);
+        }
+        return resumed.toString();
+    }, []);
 
-    return { notification };
+    useWebSocket(socketUrl, onMessage, resumeUrl);
 }
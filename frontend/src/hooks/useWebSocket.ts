@@ -1,8 +1,20 @@
 import { useEffect, useRef, useState } from 'react';
 
-export function useWebSocket(url: string | null): { lastMessage: MessageEvent | null; } {
+const MAX_RECONNECT_DELAY_MS = 30000;
+
+// `resumeUrl` builds the URL for reconnects, e.g. to tell the server what the client already has
+export function useWebSocket(
+    url: string | null,
+    onMessage?: (data: any) => void,
+    resumeUrl?: (url: string) => string
+): { lastMessage: MessageEvent | null; } {
     const wsRef = useRef<WebSocket | null>(null);
     const [lastMessage, setLastMessage] = useState<MessageEvent | null>(null);
+    // kept in refs so new callbacks don't reopen the socket
+    const onMessageRef = useRef(onMessage);
+    const resumeUrlRef = useRef(resumeUrl);
+    onMessageRef.current = onMessage;
+    resumeUrlRef.current = resumeUrl;
 
     useEffect(() => {
         if (!url) {
@@ -11,16 +23,49 @@ export function useWebSocket(url: string | null): { lastMessage: MessageEvent |
             return;
         }
 
-        const ws = new WebSocket(url);
-        wsRef.current = ws;
+        let closedByUs = false;
+        let reconnectDelay = 1000;
+        let reconnectTimer: ReturnType<typeof setTimeout> | undefined;
+
+        const open = (socketUrl: string) => {
+            const ws = new WebSocket(socketUrl);
+            wsRef.current = ws;
 
-        ws.onopen = () => console.log('socket open');
-        ws.onmessage = (event) => setLastMessage(event);
-        ws.onerror = console.error;
-        ws.onclose = () => console.log('socket closed');
+            ws.onopen = () => {
+                console.log('socket open');
+                reconnectDelay = 1000;
+            };
+            ws.onmessage = (event) => {
+                const data = JSON.parse(event.data);
+                // answer server heartbeats so the connection isn't reaped as idle
+                if (data?.type === 'ping') {
+                    ws.send(JSON.stringify({ type: 'pong' }));
+                    return;
+                }
+                onMessageRef.current?.(data);
+                setLastMessage(event);
+            };
+            ws.onerror = console.error;
+            ws.onclose = () => {
+                console.log('socket closed');
+                if (closedByUs) return;
+                // reconnect with backoff, resuming where this socket left off
+                reconnectTimer = setTimeout(
+                    () => open(resumeUrlRef.current ? resumeUrlRef.current(url) : url),
+                    reconnectDelay
+                );
+                reconnectDelay = Math.min(reconnectDelay * 2, MAX_RECONNECT_DELAY_MS);
+            };
+        };
 
-        return () => ws.close();
+        open(url);
+
+        return () => {
+            closedByUs = true;
+            clearTimeout(reconnectTimer);
+            wsRef.current?.close();
+        };
     }, [url]);
 
     return { lastMessage };
-}
\ No newline at end of file
+}
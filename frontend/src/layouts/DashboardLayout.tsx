@@ -27,7 +27,7 @@ import { Outlet, useNavigate } from 'react-router-dom';
 import { useUser } from '../hooks/useUser';
 import { getWorkspace } from '../api/workspace/workspace';
 import { useMutation, useQuery, useQueryClient } from '@tanstack/react-query';
-import { useEffect, useState } from 'react';
+import { useMemo, useState } from 'react';
 import { getNotifications } from '../api/notifications/notifications';
 import { type NotificationResponse, type WorkspaceCreate } from '../api/fastAPI.schemas';
 import CreateWorkspaceDialog from '../components/CreateWorkspaceDialog';
@@ -89,24 +89,33 @@ export default function DashboardLayout() {
 
   //WEB SOCKET hook for live messages
   //it needs to be here bc this is layout for all pages
-  const { notification: liveNotification } = useTaskNotifications(user!.id);
   const [openSnackbar, setOpenSnackbar] = useState(false);
 
-  useEffect(() => {
-    if (!liveNotification) return;
+  const notificationHandlers = useMemo(
+    () => ({
+      onNotification: (liveNotification: NotificationResponse) => {
+        //using setQueryData to update local data and not calling backend
+        //add new message to list of notifications
+        queryClient.setQueryData<NotificationResponse[]>(['notifications'], (old = []) => {
+          const alreadyExists = old.some((n) => n.id === liveNotification.id);
+          return alreadyExists ? old : [liveNotification, ...old];
+        });
 
-    //using setQueryData to update local data and not calling backend
-    //add new message to list of notifications
-    queryClient.setQueryData<NotificationResponse[]>(['notifications'], (old = []) => {
-      const alreadyExists = old.some((n) => n.id === liveNotification.id);
-      return alreadyExists ? old : [liveNotification, ...old];
-    });
-
-    // add + 1 to notifications count
-    queryClient.setQueryData<number>(['notificationsCount'], (old = 0) => old + 1);
-    queryClient.invalidateQueries({ queryKey: ['Dash'] });
-    setOpenSnackbar(true);
-  }, [liveNotification, queryClient]);
+        queryClient.invalidateQueries({ queryKey: ['Dash'] });
+        setOpenSnackbar(true);
+      },
+      // unread count pushed by the server after every change
+      onUnreadCount: (count: number) => {
+        queryClient.setQueryData<number>(['notificationsCount'], count);
+      },
+      onResync: () => {
+        queryClient.invalidateQueries({ queryKey: ['notifications'] });
+        queryClient.invalidateQueries({ queryKey: ['notificationsCount'] });
+      }
+    }),
+    [queryClient]
+  );
+  useTaskNotifications(user!.id, notificationHandlers);
 
   return (
     <Box sx={{ display: 'flex' }}>
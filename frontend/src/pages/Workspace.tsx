@@ -11,6 +11,9 @@ import { TaskDetail } from '../components/TaskDetail';
 import WorkspaceMemberSelector from '../components/WorkspaceMemberSelector';
 import { ConfirmDialog } from '../components/ConfirmDialog';
 
+// page size used to walk the workspace task listing
+const TASKS_PAGE_SIZE = 500;
+
 export default function Workspace() {
   const { id: workspaceId } = useParams<{ id: string }>();
   const queryClient = useQueryClient();
@@ -58,7 +61,20 @@ export default function Workspace() {
     error: tasksError
   } = useQuery({
     queryKey: ['workspaceTasks', workspaceId],
-    queryFn: () => getTasksByWorkspaceApiWorkspaceWorkspaceIdTasksGet(workspaceId!),
+    queryFn: async () => {
+      // the board shows every task, so follow the keyset pages until a short one
+      const allTasks: TaskResponse[] = [];
+      let after: string | undefined;
+      for (;;) {
+        const page = await getTasksByWorkspaceApiWorkspaceWorkspaceIdTasksGet(workspaceId!, {
+          after,
+          limit: TASKS_PAGE_SIZE
+        });
+        allTasks.push(...page);
+        if (page.length < TASKS_PAGE_SIZE) return allTasks;
+        after = page[page.length - 1].id;
+      }
+    },
     enabled: Boolean(workspaceId)
   });
 